@@ -1,7 +1,8 @@
-# run the 1D_ME_Explore.py for all four layers using a current and ref run
-import os
+# render the charge plots of all four pixel barrel layers for a current and ref run
+# in one batch: each run and ME is fetched once and figures are rendered in parallel
+import subprocess
 
-for i in range(1, 5):
-    command = f"python 1D_ME_Explore.py PixelPhase1/Tracks/PXBarrel/charge_PXLayer_{i} 384032 383948"
-    print(command)
-    os.system(command)
+mes = [f"PixelPhase1/Tracks/PXBarrel/charge_PXLayer_{i}" for i in range(1, 5)]
+command = ["render_batch", "-r", "384032", "-e", "383948", "-m", *mes, "--per-me"]
+print(" ".join(command))
+subprocess.run(command, check=True)
@@ -1,14 +1,37 @@
-# Data managers
-import dqmexplore.medata
-import dqmexplore.omsdata
-import dqmexplore.certhelper
-
-# Plotting
-import dqmexplore.interplt
-import dqmexplore.staticplt
-import dqmexplore.trends
-
-# Utilities
-import dqmexplore.utils
-import dqmexplore.oms
-import dqmexplore.anomaly
+import importlib
+
+# Submodules are imported on first access (e.g. dqme.medata), so that importing
+# dqmexplore does not load plotly, cmsdials, etc. until they are needed.
+_submodules = [
+    # Data managers
+    "medata",
+    "omsdata",
+    "certhelper",
+    "golden",
+    "summary",
+    # Plotting
+    "interplt",
+    "staticplt",
+    "trends",
+    "templates",
+    "export",
+    "rendercache",
+    # Utilities
+    "utils",
+    "oms",
+    "anomaly",
+]
+
+__all__ = _submodules
+
+
+def __getattr__(name):
+    if name in _submodules:
+        module = importlib.import_module(f"{__name__}.{name}")
+        globals()[name] = module
+        return module
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + _submodules)
@@ -1,5 +1,9 @@
 from dqmexplore.utils.datautils import loadJSONasDF, loadFromWeb
-from fnmatch import fnmatch
+from dqmexplore.golden import GoldenJSON
+from fnmatch import translate
+from functools import lru_cache
+import re
+import numpy as np
 import pandas as pd
 
 chftrs = [
@@ -9,30 +13,266 @@ chftrs = [
     "reference_run_reconstruction_type",
     "dataset",
 ]
+chstrftrs = [
+    "run_reconstruction_type",
+    "reference_run_reconstruction_type",
+    "dataset",
+]
+
+
+@lru_cache(maxsize=128)
+def _compile_patterns(patterns: tuple) -> re.Pattern:
+    """Compiles glob patterns into a single regex matching any of them."""
+    return re.compile("|".join(translate(pattern) for pattern in patterns))
+
+
+def _match_categorical(col: pd.Series, patterns: tuple) -> np.ndarray:
+    """
+    Matches glob patterns against a categorical column. Each category is matched
+    once and the result is broadcast to the rows through the category codes.
+    An empty tuple of patterns matches nothing.
+    """
+    if not patterns:
+        return np.zeros(len(col), dtype=bool)
+    regex = _compile_patterns(patterns)
+    cat_match = np.array(
+        [regex.match(cat) is not None for cat in col.cat.categories] + [False]
+    )
+    return cat_match[col.cat.codes.to_numpy()]  # Missing values have code -1
+
+
+def _ragged_arange(los: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Concatenation of the ranges [lo, lo + count) for each lo and count."""
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(los, counts) + offsets
+
+
+def _ragged_positions(sorted_keys, queries):
+    """
+    Finds the positions of all entries of sorted_keys matching each query with
+    searchsorted. Returns the positions and, for each of them, the index of the
+    query it belongs to.
+    """
+    queries = np.asarray(queries, dtype=np.int64)
+    los = np.searchsorted(sorted_keys, queries, side="left")
+    counts = np.searchsorted(sorted_keys, queries, side="right") - los
+    query_idxs = np.repeat(np.arange(len(queries)), counts)
+    return _ragged_arange(los, counts), query_idxs
+
+
+class RefRunGraph:
+    """
+    Graph of (run, reconstruction type) -> (reference run, reference reconstruction
+    type), built once from CHRunData.RunsDF. Reference-run chains of all runs are
+    resolved at once by pointer jumping, and the runs referencing a given run are
+    found by walking a children index, in time linear in the number of such runs.
+    Nodes are encoded as integer keys (run << 8) | reconstruction type code.
+    """
+
+    def __init__(self, RunsDF: pd.DataFrame) -> None:
+        self.recos = sorted(
+            set(RunsDF["run_reconstruction_type"].astype(str))
+            | set(RunsDF["reference_run_reconstruction_type"].astype(str))
+        )
+        run_keys = self._toKeys(RunsDF["run_number"], RunsDF["run_reconstruction_type"])
+        ref_keys = self._toKeys(
+            RunsDF["reference_run_number"], RunsDF["reference_run_reconstruction_type"]
+        )
+
+        # One node per (run, reco type), keeping the first reference of duplicates
+        self.nodes, first = np.unique(run_keys, return_index=True)
+        self.ref_keys = ref_keys[first]
+        parents = np.minimum(
+            np.searchsorted(self.nodes, self.ref_keys), len(self.nodes) - 1
+        )
+        in_table = self.nodes[parents] == self.ref_keys
+        # Runs referencing themselves or runs missing from the table end a chain
+        self.parents = np.where(in_table & (self.ref_keys != self.nodes), parents, -1)
+
+        # Children index: children of node i are _children[_child_offsets[i]:_child_offsets[i + 1]]
+        has_parent = np.flatnonzero(self.parents >= 0)
+        order = np.argsort(self.parents[has_parent], kind="stable")
+        self._children = has_parent[order]
+        self._child_offsets = np.searchsorted(
+            self.parents[self._children], np.arange(len(self.nodes) + 1)
+        )
+        # Reverse index over all reference keys, including runs missing from the table
+        self._ref_order = np.argsort(self.ref_keys, kind="stable")
+
+        self._resolve()
+
+    def _toKeys(self, runs: pd.Series, recos: pd.Series) -> np.ndarray:
+        codes = pd.Categorical(recos.astype(str), categories=self.recos).codes
+        return (runs.to_numpy(dtype=np.int64) << 8) | codes.astype(np.int64)
+
+    def _fromKeys(self, keys: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        return keys >> 8, np.array(self.recos, dtype=object)[keys & 0xFF]
+
+    def _resolve(self) -> None:
+        """
+        Resolves the anchor (last run of the chain) and chain depth of every node by
+        pointer jumping. Nodes whose chain never ends are marked as cyclic.
+        """
+        num_nodes = len(self.nodes)
+        is_end = self.parents < 0
+        root = np.where(is_end, np.arange(num_nodes), self.parents)
+        dist = (~is_end).astype(np.int64)
+        for _ in range(num_nodes.bit_length() + 1):
+            new_root = root[root]
+            if np.array_equal(new_root, root):
+                break
+            dist = dist + dist[root]
+            root = new_root
+
+        self.cyclic = ~is_end[root]
+        # The anchor is the reference of the chain end: itself, or a run not in the table
+        self.anchor_keys = np.where(self.cyclic, -1, self.ref_keys[root])
+        self.depths = np.where(
+            self.cyclic, -1, dist + (self.ref_keys[root] != self.nodes[root])
+        )
+
+    def _findNodes(self, sorted_keys, runnbs, reco_type=None) -> np.ndarray:
+        """Positions in sorted_keys of the given runs, for one or all reco types."""
+        runnbs = np.asarray(runnbs, dtype=np.int64)
+        if reco_type is None:
+            los = np.searchsorted(sorted_keys, runnbs << 8)
+            his = np.searchsorted(sorted_keys, (runnbs + 1) << 8)
+        else:
+            if reco_type not in self.recos:
+                return np.array([], dtype=np.int64)
+            keys = (runnbs << 8) | self.recos.index(reco_type)
+            los = np.searchsorted(sorted_keys, keys, side="left")
+            his = np.searchsorted(sorted_keys, keys, side="right")
+        return _ragged_arange(los, his - los)
+
+    def _toDF(self, idxs: np.ndarray) -> pd.DataFrame:
+        runs, recos = self._fromKeys(self.nodes[idxs])
+        anchor_runs, anchor_recos = self._fromKeys(
+            np.maximum(self.anchor_keys[idxs], 0)
+        )
+        cyclic = self.cyclic[idxs]
+        return pd.DataFrame(
+            {
+                "run_number": runs,
+                "run_reconstruction_type": recos,
+                "anchor_run_number": np.where(cyclic, -1, anchor_runs),
+                "anchor_reconstruction_type": np.where(cyclic, None, anchor_recos),
+                "depth": self.depths[idxs],
+                "cyclic": cyclic,
+            }
+        )
+
+    def getAnchors(self, runnbs=None, reco_type: str | None = None) -> pd.DataFrame:
+        """
+        Returns the anchor run of the reference chain of each given run (all runs if
+        runnbs is None), with the chain depth. Runs on or leading into a reference
+        cycle are flagged as cyclic and get an anchor run number of -1.
+        """
+        if runnbs is None:
+            idxs = np.arange(len(self.nodes))
+            if reco_type is not None:
+                idxs = idxs[
+                    (self.nodes & 0xFF)
+                    == (self.recos.index(reco_type) if reco_type in self.recos else -1)
+                ]
+        else:
+            if not isinstance(runnbs, list):
+                runnbs = [runnbs]
+            idxs = self._findNodes(self.nodes, runnbs, reco_type)
+        return self._toDF(idxs)
+
+    def getChain(self, runnb: int, reco_type: str) -> list[tuple[int, str]]:
+        """Returns the chain of (run, reco type) from a run to its anchor."""
+        idxs = self._findNodes(self.nodes, [runnb], reco_type)
+        if len(idxs) == 0:
+            return []
+        idx = idxs[0]
+        chain = [idx]
+        while self.parents[idx] >= 0 and len(chain) <= len(self.nodes):
+            idx = self.parents[idx]
+            if idx in chain:
+                break
+            chain.append(idx)
+        keys = list(self.nodes[chain])
+        if (not self.cyclic[chain[0]]) and self.ref_keys[idx] != self.nodes[idx]:
+            keys.append(self.ref_keys[idx])  # Anchor run not in the table
+        runs, recos = self._fromKeys(np.array(keys))
+        return list(zip(runs.tolist(), recos.tolist()))
+
+    def getReferencing(self, runnb: int, reco_type: str | None = None) -> pd.DataFrame:
+        """
+        Returns all runs whose reference chain passes through the given run, i.e.
+        that ultimately reference it, walking the children index breadth-first.
+        """
+        frontier = self._ref_order[
+            self._findNodes(self.ref_keys[self._ref_order], [runnb], reco_type)
+        ]
+        track_visited = self.cyclic[frontier].any()
+        visited = np.zeros(len(self.nodes), dtype=bool) if track_visited else None
+        found = []
+        while len(frontier):
+            if track_visited:
+                frontier = frontier[~visited[frontier]]
+                visited[frontier] = True
+            found.append(frontier)
+            los = self._child_offsets[frontier]
+            counts = self._child_offsets[frontier + 1] - los
+            frontier = self._children[_ragged_arange(los, counts)]
+        idxs = np.concatenate(found) if found else np.array([], dtype=np.int64)
+        return self._toDF(np.sort(idxs))
 
 
 class CHRunData:
     """
     Certification Helper data manager.
     This class is used to load and manage the Certification Helper data.
+    The JSON files are parsed incrementally if stream is set (by default if
+    large, see utils.datautils.loadJSONasDF).
     """
 
     def __init__(
         self,
         JSONFilePath: str,
         goldenJSONFilePath: str | None = None,
+        snapshot: bool = True,
+        stream: bool | None = None,
     ) -> None:
-        self.RunsDF = loadJSONasDF(JSONFilePath)
+        self.RunsDF = loadJSONasDF(JSONFilePath, snapshot=snapshot, stream=stream)
         self.RunsDF.dropna(inplace=True)
-        self._setGolden(goldenJSONFilePath)
-        self.RunsDF.sort_values("run_number", inplace=True)
+        self._setGolden(goldenJSONFilePath, stream=stream)
+        self.RunsDF.sort_values(
+            ["run_number", "run_reconstruction_type"], inplace=True, kind="stable"
+        )
+        self.RunsDF = self.RunsDF.astype({ftr: "category" for ftr in chstrftrs})
+        self._buildIndexes()
+        self._refgraph = None
 
-    def _setGolden(self, goldenJSONFilePath: str | None = None) -> None:
+    def _buildIndexes(self) -> None:
+        """
+        Builds the lookup indexes over RunsDF, which is sorted by (run_number,
+        run_reconstruction_type): the sorted run numbers, and the row order and
+        sorted keys of the reverse (reference run) index.
+        """
+        self._run_keys = self.RunsDF["run_number"].to_numpy(dtype=np.int64)
+        ref_runs = self.RunsDF["reference_run_number"].to_numpy(dtype=np.int64)
+        self._ref_order = np.argsort(ref_runs, kind="stable")
+        self._ref_keys = ref_runs[self._ref_order]
+
+    def _setGolden(
+        self, goldenJSONFilePath: str | None = None, stream: bool | None = None
+    ) -> None:
         if goldenJSONFilePath is None:
             return
-        self.goldenDF = loadJSONasDF(goldenJSONFilePath)
-        self.goldenDF = self.goldenDF.rename({0: "run_number", 1: "good_lss"}, axis=1)
-        self.goldenDF = self.goldenDF.astype({"run_number": int})
+        # Parsed once, the DataFrame view is built from the compiled ranges
+        self.golden = GoldenJSON(goldenJSONFilePath, stream=stream)
+        self.goldenDF = pd.DataFrame(
+            {
+                "run_number": self.golden.runs,
+                "good_lss": [
+                    self.golden.getRanges(runnb) for runnb in self.golden.runs
+                ],
+            }
+        )
 
         # Put golden info in RunsDF
         self.RunsDF = self.RunsDF.merge(self.goldenDF, on="run_number", how="left")
@@ -56,13 +296,12 @@ class CHRunData:
     def getRun(self, runnb: int, reco_type: str | None = None) -> pd.DataFrame:
         if reco_type not in [None, "express", "prompt"]:
             raise ValueError("Unexpected value for reconstruction type given.")
+        lo, hi = np.searchsorted(self._run_keys, [runnb, runnb + 1])
+        runs = self.RunsDF.iloc[lo:hi]
         if reco_type is None:
-            return self.RunsDF[self.RunsDF["run_number"] == runnb]
+            return runs
         else:
-            return self.RunsDF[
-                (self.RunsDF["run_number"] == runnb)
-                & (self.RunsDF["run_reconstruction_type"] == reco_type)
-            ]
+            return runs[runs["run_reconstruction_type"] == reco_type]
 
     def applyFilter(
         self, filters: dict = {}, exclude_bad: bool = False, return_df: bool = True
@@ -93,12 +332,10 @@ class CHRunData:
                     elif isinstance(val, (int, float)):
                         num_mask |= RunsDF[key] == val
                 mask &= num_mask
-            elif isinstance(value, str) and key in [
-                "run_reconstruction_type",
-                "reference_run_reconstruction_type",
-                "dataset",
-            ]:
-                mask &= RunsDF[key].apply(lambda x: fnmatch(x, value))
+            elif isinstance(value, (str, list)) and key in chstrftrs:
+                # str or list of glob patterns, matching any of them
+                patterns = (value,) if isinstance(value, str) else tuple(value)
+                mask &= _match_categorical(RunsDF[key], patterns)
             else:
                 raise KeyError("Unexpected key in input filter.")
 
@@ -122,6 +359,8 @@ class CHRunData:
             pd.DataFrame: DataFrame containing the filtered runs.
         """
         runs = self.RunsDF
+        if "run_number" in kwargs:
+            runs = self.getRun(kwargs.pop("run_number"))
         for key, value in kwargs.items():
             if key in chftrs:
                 runs = runs[runs[key] == value]
@@ -134,7 +373,7 @@ class CHRunData:
         Uses getruns to get the reference run number for a given run number.
         Fails if multiple reference runs are found.
         """
-        runs = self.getRuns(run_number=runnb, **kwargs)
+        runs = self.getruns(run_number=runnb, **kwargs)
 
         if len(runs) > 1:
             raise LookupError(
@@ -146,9 +385,57 @@ class CHRunData:
 
         return int(runs["reference_run_number"].values[0])
 
-    def searchRuns(self, runnbs: int | list, ref: bool = False) -> pd.DataFrame:
-        if not isinstance(runnbs, list):
-            runnbs = [runnbs]
-        return self.RunsDF[
-            self.RunsDF["reference_run_number" if ref else "run_number"].isin(runnbs)
+    def getRefRuns(self, runnbs: list, reco_type: str | None = None) -> pd.DataFrame:
+        """
+        Gets the reference runs of many runs at once through the run index.
+        Returns one row per (run, reconstruction type) found, in the order of
+        runnbs. Runs not found get a reference run number of -1.
+        """
+        if reco_type not in [None, "express", "prompt"]:
+            raise ValueError("Unexpected value for reconstruction type given.")
+        cols = [
+            "run_number",
+            "run_reconstruction_type",
+            "reference_run_number",
+            "reference_run_reconstruction_type",
         ]
+        runnbs = np.asarray(runnbs, dtype=np.int64)
+        positions, query_idxs = _ragged_positions(self._run_keys, runnbs)
+        found = self.RunsDF[cols].iloc[positions]
+        if reco_type is not None:
+            is_reco = (found["run_reconstruction_type"] == reco_type).to_numpy()
+            found, query_idxs = found[is_reco], query_idxs[is_reco]
+
+        missing = np.setdiff1d(np.arange(len(runnbs)), query_idxs)
+        not_found = pd.DataFrame(
+            {
+                "run_number": runnbs[missing],
+                "run_reconstruction_type": reco_type,
+                "reference_run_number": -1,
+                "reference_run_reconstruction_type": None,
+            }
+        )
+        order = np.argsort(np.concatenate([query_idxs, missing]), kind="stable")
+        return (
+            pd.concat([found, not_found], ignore_index=True)
+            .iloc[order]
+            .reset_index(drop=True)
+        )
+
+    def getRefGraph(self) -> RefRunGraph:
+        """Returns the reference-run graph of RunsDF, building it on first use."""
+        if self._refgraph is None:
+            self._refgraph = RefRunGraph(self.RunsDF)
+        return self._refgraph
+
+    def searchRuns(
+        self, runnbs: int | list | np.ndarray, ref: bool = False
+    ) -> pd.DataFrame:
+        if np.isscalar(runnbs):
+            runnbs = [runnbs]
+        if ref:
+            positions, _ = _ragged_positions(self._ref_keys, runnbs)
+            positions = self._ref_order[positions]
+        else:
+            positions, _ = _ragged_positions(self._run_keys, runnbs)
+        return self.RunsDF.iloc[np.unique(positions)]
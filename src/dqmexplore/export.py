@@ -0,0 +1,159 @@
+import os
+import json
+import time
+import asyncio
+import threading
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+try:
+    import kaleido
+except ImportError:
+    kaleido = None
+
+IMAGE_FORMATS = ["png", "svg", "jpg", "jpeg", "webp", "pdf"]
+
+
+class StaticExporter:
+    """
+    Static image export service for plotly figures (e.g. from
+    staticplt.plotMEs1D_static or staticplt.plotheatmaps1D).
+    Keeps a Kaleido instance with num_workers warm browser tabs running on a
+    background event loop between batches, so the renderer is only started once.
+    Requires kaleido>=1.0 and a Chrome install (see kaleido.get_chrome_sync).
+    Use as a context manager or call close() when done.
+    """
+
+    def __init__(
+        self,
+        num_workers: int = 4,
+        width: int | None = None,
+        height: int | None = None,
+        scale: float | None = None,
+        timeout: float = 90,
+    ) -> None:
+        if kaleido is None:
+            raise ImportError(
+                "Static export requires kaleido. Install it with: pip install 'dqmexplore[export]'"
+            )
+        self.num_workers = num_workers
+        self.opts = {
+            key: val
+            for key, val in {"width": width, "height": height, "scale": scale}.items()
+            if val is not None
+        }
+        self.stats = {}
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        self._kaleido = None
+        try:
+            kaleido_instance = kaleido.Kaleido(n=num_workers, timeout=timeout)
+            self._run(kaleido_instance.__aenter__())
+        except BaseException:
+            self._stopLoop()
+            raise
+        self._kaleido = kaleido_instance
+
+    def _run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def __enter__(self) -> "StaticExporter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        try:
+            if self._kaleido is not None:
+                self._run(self._kaleido.__aexit__(None, None, None))
+        finally:
+            self._kaleido = None
+            self._stopLoop()
+
+    def _stopLoop(self) -> None:
+        if self._loop.is_closed():
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    async def _write(self, fig, path: str, opts: dict) -> dict:
+        start = time.perf_counter()
+        try:
+            await self._kaleido.write_fig(fig, path=path, opts=opts)
+            status, error = "written", None
+        except Exception as e:
+            status, error = "failed", str(e)
+        return {
+            "path": path,
+            "format": opts["format"],
+            "seconds": time.perf_counter() - start,
+            "status": status,
+            "error": error,
+        }
+
+    async def _write_all(self, jobs: list) -> list:
+        return await asyncio.gather(*(self._write(*job) for job in jobs))
+
+    def export(self, figures: list, paths: list[str], fmt: str | None = None):
+        """
+        Renders a batch of figures in parallel and writes them to paths.
+        Figures can be plotly figures, figure specs (dicts with "data" and
+        "layout") or paths to figure JSON files. The format is taken from the path
+        extension unless fmt is given. Returns a DataFrame with the path, format,
+        latency (from batch submission, so including the wait for a free worker)
+        and status of every image and sets self.stats to the batch summary
+        (images, wall time, throughput and latency percentiles).
+        """
+        if len(figures) != len(paths):
+            raise ValueError("Number of figures and paths must match.")
+
+        jobs = []
+        for fig, path in zip(figures, paths):
+            img_fmt = fmt if fmt is not None else os.path.splitext(path)[1][1:].lower()
+            if img_fmt not in IMAGE_FORMATS:
+                raise ValueError(
+                    f"Invalid image format {img_fmt} for {path}. Must be one of {IMAGE_FORMATS}."
+                )
+            if isinstance(fig, str):
+                with open(fig, "r") as f:
+                    fig = json.load(f)
+            if isinstance(fig, dict):
+                fig = go.Figure(fig)
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            jobs.append((fig, path, {**self.opts, "format": img_fmt}))
+
+        start = time.perf_counter()
+        results = pd.DataFrame(
+            self._run(self._write_all(jobs)),
+            columns=["path", "format", "seconds", "status", "error"],
+        )
+        wall = time.perf_counter() - start
+
+        latencies = results["seconds"].to_numpy()
+        self.stats = {
+            "images": len(results),
+            "failed": int((results["status"] == "failed").sum()),
+            "wall_seconds": wall,
+            "images_per_second": len(results) / wall if wall > 0 else np.nan,
+            "latency_p50": (
+                float(np.percentile(latencies, 50)) if len(latencies) else np.nan
+            ),
+            "latency_p95": (
+                float(np.percentile(latencies, 95)) if len(latencies) else np.nan
+            ),
+        }
+        return results
+
+
+def export_figures(
+    figures: list, paths: list[str], fmt: str | None = None, num_workers: int = 4
+):
+    """One-off batch export with a temporary StaticExporter. Returns (results, stats)."""
+    with StaticExporter(num_workers=num_workers) as exporter:
+        results = exporter.export(figures, paths, fmt=fmt)
+    return results, exporter.stats
@@ -0,0 +1,137 @@
+from array import array
+import numpy as np
+from dqmexplore.utils.datautils import iterJSONItems
+
+
+class GoldenJSON:
+    """
+    Golden/DCS JSON ({run: [[start_ls, end_ls], ...]}) compiled into flat arrays.
+    The certified LS ranges of all runs are stored merged and sorted as half-open
+    intervals [start, end + 1), with per-run offsets into the interval arrays.
+    Internally, intervals are also kept as keys (run << 32) | ls so that lookups
+    over many runs are a single searchsorted. JSON files are parsed incrementally
+    if stream is set (by default if large, see utils.datautils.loadJSONasDF).
+    """
+
+    def __init__(self, golden: dict | str | None = None, stream=None) -> None:
+        if isinstance(golden, str):
+            items = iterJSONItems(golden, stream=stream)
+        else:
+            items = ({} if golden is None else golden).items()
+
+        runs = array("q")
+        ranges = array("q")
+        for run, run_ranges in items:
+            for start_ls, end_ls in run_ranges:
+                runs.append(int(run))
+                ranges.extend((int(start_ls), int(end_ls)))
+        runs = np.asarray(runs, dtype=np.int64)
+        ranges = np.asarray(ranges, dtype=np.int64).reshape(-1, 2)
+        self._setKeys((runs << 32) | ranges[:, 0], (runs << 32) | (ranges[:, 1] + 1))
+
+    @classmethod
+    def _fromKeys(cls, start_keys: np.ndarray, end_keys: np.ndarray) -> "GoldenJSON":
+        golden = cls.__new__(cls)
+        golden._setKeys(start_keys, end_keys)
+        return golden
+
+    def _setKeys(self, start_keys: np.ndarray, end_keys: np.ndarray) -> None:
+        """Sorts and merges overlapping or adjacent intervals, then builds the run offsets."""
+        order = np.argsort(start_keys, kind="stable")
+        start_keys = start_keys[order]
+        end_keys = end_keys[order]
+        if len(start_keys):
+            running_end = np.maximum.accumulate(end_keys)
+            is_new = np.ones(len(start_keys), dtype=bool)
+            is_new[1:] = start_keys[1:] > running_end[:-1]
+            new_idxs = np.flatnonzero(is_new)
+            start_keys = start_keys[new_idxs]
+            end_keys = np.maximum.reduceat(end_keys, new_idxs)
+
+        self._start_keys = start_keys
+        self._end_keys = end_keys
+        interval_runs = start_keys >> 32
+        self.runs = np.unique(interval_runs)
+        self.offsets = np.searchsorted(
+            interval_runs, np.append(self.runs, np.iinfo(np.int64).max)
+        )
+        self.starts = start_keys & 0xFFFFFFFF
+        self.ends = (end_keys & 0xFFFFFFFF) - 1  # Back to inclusive end LSs
+
+    def __len__(self) -> int:
+        return len(self.runs)
+
+    def __contains__(self, runnb: int) -> bool:
+        idx = np.searchsorted(self.runs, runnb)
+        return idx < len(self.runs) and self.runs[idx] == runnb
+
+    def getRuns(self) -> list:
+        return self.runs.tolist()
+
+    def getRanges(self, runnb: int) -> list:
+        """Returns the certified LS ranges of a run as [[start_ls, end_ls], ...]."""
+        idx = np.searchsorted(self.runs, runnb)
+        if idx == len(self.runs) or self.runs[idx] != runnb:
+            return []
+        lo, hi = self.offsets[idx], self.offsets[idx + 1]
+        return np.stack([self.starts[lo:hi], self.ends[lo:hi]], axis=1).tolist()
+
+    def toDict(self) -> dict:
+        return {str(runnb): self.getRanges(runnb) for runnb in self.runs}
+
+    def contains(self, runnbs, lss) -> np.ndarray:
+        """Vectorised check of whether each (run, LS) pair is certified."""
+        return self._containsKeys(
+            (np.asarray(runnbs, dtype=np.int64) << 32) | np.asarray(lss, dtype=np.int64)
+        )
+
+    def getMask(self, medata, me: str | None = None, runnb: int | None = None):
+        """
+        Returns a boolean mask of certified LSs sized to the LS axis of an MEData
+        object (of the given ME, or the first one).
+        """
+        runnb = medata.runnb if runnb is None else runnb
+        if runnb is None:
+            raise ValueError("Run number of the MEData object unknown. Pass runnb.")
+        lss = medata.getLSNumbers(me)
+        return self.contains(np.full(len(lss), runnb), lss)
+
+    def _combine(self, other: "GoldenJSON", op) -> "GoldenJSON":
+        """
+        Applies a boolean set operation to two JSONs. Membership is constant between
+        consecutive interval boundaries of either JSON, so it is evaluated once per
+        elementary segment and kept segments are merged back into intervals.
+        """
+        bounds = np.unique(
+            np.concatenate(
+                [self._start_keys, self._end_keys, other._start_keys, other._end_keys]
+            )
+        )
+        if len(bounds) < 2:
+            return GoldenJSON()
+        seg_starts = bounds[:-1]
+        keep = op(self._containsKeys(seg_starts), other._containsKeys(seg_starts))
+        prev_keep = np.concatenate([[False], keep[:-1]])
+        next_keep = np.concatenate([keep[1:], [False]])
+        return GoldenJSON._fromKeys(
+            seg_starts[keep & ~prev_keep], bounds[1:][keep & ~next_keep]
+        )
+
+    def _containsKeys(self, keys: np.ndarray) -> np.ndarray:
+        if len(self._start_keys) == 0:
+            return np.zeros(keys.shape, dtype=bool)
+        idxs = np.searchsorted(self._start_keys, keys, side="right") - 1
+        return (idxs >= 0) & (keys < self._end_keys[np.maximum(idxs, 0)])
+
+    def union(self, other: "GoldenJSON") -> "GoldenJSON":
+        return self._combine(other, np.logical_or)
+
+    def intersection(self, other: "GoldenJSON") -> "GoldenJSON":
+        return self._combine(other, np.logical_and)
+
+    def difference(self, other: "GoldenJSON") -> "GoldenJSON":
+        return self._combine(other, lambda a, b: a & ~b)
+
+    __or__ = union
+    __and__ = intersection
+    __sub__ = difference
@@ -4,6 +4,7 @@ from plotly.subplots import make_subplots
 from dqmexplore.medata import MEData
 from dqmexplore.me_ids import meIDs1D, meIDs2D
 from dqmexplore.utils.datautils import get_me_id_map
+from dqmexplore.utils.pltutils import typed_array, bin_kwargs
 import json
 
 reqkeys = ["xlim", "ylim", "xlabel", "ylabel", "logy", "norm"]
@@ -160,7 +161,29 @@ def plotMEs(
     if ref_data is not None and not isinstance(ref_data, MEData):
         raise TypeError("ref_data must be of type MEData")
 
-    # Normalizing
+    # Normalizing and reference data integration
+    normalize_data(
+        me_data, plots_config, trigger_rates=trigger_rates, ref_data=ref_data
+    )
+
+    # Plotting
+    fig = create_plot(
+        me_data,
+        figure_config,
+        plots_config,
+        ref_data=ref_data,
+    )
+
+    if show:
+        fig.show()
+    return fig
+
+
+def normalize_data(me_data, plots_config, trigger_rates=None, ref_data=None):
+    """
+    Normalizes the MEs of me_data as requested in plots_config and integrates the
+    (normalized) reference data if given.
+    """
     for me_name, config in plots_config.items():
         if config.get("norm"):
             if config["norm"] == "trig" and trigger_rates is None:
@@ -172,22 +195,9 @@ def plotMEs(
                 mes=[me_name],
             )
 
-    # Reference data integration
     if ref_data is not None:
         ref_data.integrateData(norm=True)
 
-    # Plotting
-    fig = create_plot(
-        me_data,
-        figure_config,
-        plots_config,
-        ref_data=ref_data,
-    )
-
-    if show:
-        fig.show()
-    return fig
-
 
 def create_plot(
     me_data,
@@ -229,40 +239,80 @@ def create_plot(
     )
     fig.update_annotations(font_size=10)
 
-    traces = []
-    for i, me in enumerate(mes):
-        row = (i // num_cols) + 1
-        col = (i % num_cols) + 1
-        config = plots_config.get(me, add_missing_keys({}))
-        to_plot = config.get("norm", None)
-        for ls in range(num_lss):
-            if me_data.getDims(me) == 1:
-                trace = go.Bar()
-                trace.x = me_data.getBins(me, dim="x")
-                trace.y = me_data.getData(me, ls=ls, data_type=to_plot)
-            elif me_data.getDims(me) == 2:
-                trace = go.Heatmap()
-                trace.x = me_data.getBins(me, dim="x")
-                trace.y = me_data.getBins(me, dim="y")
-                trace.z = me_data.getData(me, ls=ls, data_type=to_plot)
-            trace.name = me
-
-            trace.visible = ls == 0
-            traces.append(trace)
-            fig.add_trace(traces[-1], row=row, col=col)
-
-    steps = []
-    for i in range(num_lss):
-        step = {
-            "method": "restyle",
-            "args": [
-                {"visible": [False] * (num_mes * num_lss) + [True] * len(mes)},
-            ],
-            "label": f"{i+1}",
-        }
-        for j in range(num_mes):
-            step["args"][0]["visible"][i + j * num_lss] = True
-        steps.append(step)
+    slider_mode = figure_config.get("slider_mode", "frames")
+    if slider_mode not in ["frames", "traces"]:
+        raise ValueError(
+            f"Invalid slider_mode {slider_mode}. Must be 'frames' or 'traces'."
+        )
+
+    # Per-LS data of every ME, indexed by LS position, as typed arrays
+    float32 = figure_config.get("float32", True)
+    ls_data = [
+        typed_array(
+            me_data.getData(me, data_type=plots_config.get(me, {}).get("norm", None)),
+            float32=float32,
+        )
+        for me in mes
+    ]
+
+    if slider_mode == "frames":
+        # One trace per ME, its y (1D) or z (2D) swapped by one frame per LS. Frames
+        # only carry the per-LS data, so the figure grows linearly with the LSs.
+        for i, me in enumerate(mes):
+            fig.add_trace(
+                make_trace(me_data, me, ls_data[i][0], float32=float32),
+                row=(i // num_cols) + 1,
+                col=(i % num_cols) + 1,
+            )
+        data_keys = ["y" if me_data.getDims(me) == 1 else "z" for me in mes]
+        fig.frames = [
+            {
+                "name": str(ls + 1),
+                "data": [
+                    {"type": fig.data[i].type, data_keys[i]: ls_data[i][ls]}
+                    for i in range(num_mes)
+                ],
+                "traces": list(range(num_mes)),
+            }
+            for ls in range(num_lss)
+        ]
+        steps = [
+            {
+                "method": "animate",
+                "args": [
+                    [str(ls + 1)],
+                    {
+                        "mode": "immediate",
+                        "frame": {"duration": 0, "redraw": True},
+                        "transition": {"duration": 0},
+                    },
+                ],
+                "label": f"{ls+1}",
+            }
+            for ls in range(num_lss)
+        ]
+    else:
+        # One trace per ME per LS, toggled by visibility
+        for i, me in enumerate(mes):
+            row = (i // num_cols) + 1
+            col = (i % num_cols) + 1
+            for ls in range(num_lss):
+                trace = make_trace(me_data, me, ls_data[i][ls], float32=float32)
+                trace.visible = ls == 0
+                fig.add_trace(trace, row=row, col=col)
+
+        steps = []
+        for i in range(num_lss):
+            step = {
+                "method": "restyle",
+                "args": [
+                    {"visible": [False] * (num_mes * num_lss) + [True] * len(mes)},
+                ],
+                "label": f"{i+1}",
+            }
+            for j in range(num_mes):
+                step["args"][0]["visible"][i + j * num_lss] = True
+            steps.append(step)
 
     sliders = [
         {
@@ -288,7 +338,7 @@ def create_plot(
     for i, me in enumerate(mes):
         row = (i // num_cols) + 1
         col = (i % num_cols) + 1
-        config = plots_config.get(me, add_missing_keys({}))
+        config = plots_config.get(me, {})
         to_plot = config.get("norm", None)
         max_data = me_data.getData(me, data_type=to_plot).max()
 
@@ -313,16 +363,34 @@ def create_plot(
         fig.update_yaxes(title_text=config.get("ylabel"), row=row, col=col)
 
         if ref_data is not None:
-            trace_ref = go.Scatter()
+            trace_ref = go.Scatter(
+                **bin_kwargs(ref_data.getBins(me, dim="x"), float32=float32),
+                y=typed_array(
+                    ref_data.getData(me, data_type="integral"), float32=float32
+                ),
+            )
             trace_ref.name = me + "-Reference"
-            trace_ref.x = ref_data.getBins(me, dim="x")
-            trace_ref.y = ref_data.getData(me, data_type="integral")
             trace_ref.opacity = 0.6
             trace_ref.line = dict(shape="hvh")
             fig.add_trace(trace_ref, row=row, col=col)
     return fig
 
 
+def make_trace(me_data, me, data, float32=True):
+    """
+    Creates the Bar (1D) or Heatmap (2D) trace of an ME for the data of one LS.
+    Bins are given as start and step when uniform, see utils.pltutils.bin_kwargs.
+    """
+    x_kwargs = bin_kwargs(me_data.getBins(me, dim="x"), "x", float32=float32)
+    if me_data.getDims(me) == 1:
+        trace = go.Bar(**x_kwargs, y=data)
+    else:
+        y_kwargs = bin_kwargs(me_data.getBins(me, dim="y"), "y", float32=float32)
+        trace = go.Heatmap(**x_kwargs, **y_kwargs, z=data)
+    trace.name = me
+    return trace
+
+
 def compute_range(config, max_data, axis="y"):
     # If user provides ylim, use it
     if config.get(f"{axis}lim") is not None:
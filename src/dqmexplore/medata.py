@@ -1,5 +1,6 @@
 import numpy as np
 from dqmexplore.me_ids import meIDs1D, meIDs2D
+from dqmexplore.utils.datautils import align_lss
 import warnings
 import pandas as pd
 
@@ -7,6 +8,8 @@ import pandas as pd
 class MEData:
     def __init__(self, me_df: pd.DataFrame):
         self.me_dict = {}
+        self._lsquantities = {}  # Raw per-LS quantities, name -> (ls numbers, values)
+        self._aligned = {}  # Aligned quantities, (name, me) -> masked array
         self._generate_me_dict(me_df)
 
     def _generate_me_dict(self, me_df: pd.DataFrame):
@@ -14,6 +17,11 @@ class MEData:
         if len(me_df) == 0:
             warnings.warn("Input DataFrame is empty.")
         mes = list(me_df["me"].unique())
+        self.runnb = (
+            int(me_df["run_number"].iloc[0])
+            if ("run_number" in me_df.columns) and len(me_df)
+            else None
+        )
 
         for me in mes:
             self.me_dict[me] = {}
@@ -47,6 +55,7 @@ class MEData:
             self.me_dict[me]["dim"] = dim
             self.me_dict[me]["data"] = data_arr
             self.me_dict[me]["entries"] = entries
+            self.me_dict[me]["ls_numbers"] = sorted_dfsubset["ls_number"].to_numpy()
 
         self._setEmptyLSs()
         self.excludelumis = []
@@ -86,6 +95,11 @@ class MEData:
         else:
             raise ValueError("Invalid dimension or element is not 2D")
 
+    def getLSNumbers(self, me=None):
+        if me is None:
+            me = self.getMENames()[0]
+        return self.me_dict[me]["ls_numbers"]
+
     def getDims(self, me):
         return self.me_dict[me]["dim"]
 
@@ -107,6 +121,54 @@ class MEData:
     def getTrigNorm(self, me):
         return self.me_dict[me]["trignorm"]
 
+    def setLSQuantities(self, ls_numbers, **quantities):
+        """
+        Stores per-LS quantities (e.g. rate=..., pileup=...) given on the LS numbers
+        ls_numbers. They are aligned to each ME's LSs on first use and cached.
+        """
+        ls_numbers = np.asarray(ls_numbers)
+        for name, values in quantities.items():
+            self._lsquantities[name] = (ls_numbers, np.asarray(values, dtype=float))
+            for key in [key for key in self._aligned if key[0] == name]:
+                del self._aligned[key]
+
+    def fetchLSQuantities(self, dials=None, dataset_name="ZeroBias", quantities=None):
+        """Fetches per-LS OMS quantities for this run and stores them for alignment."""
+        from dqmexplore.oms import get_ls_quantities, LS_QUANTITIES
+
+        if self.runnb is None:
+            raise ValueError("Run number unknown. Use setLSQuantities instead.")
+        omsdf = get_ls_quantities(
+            self.runnb,
+            dials=dials,
+            dataset_name=dataset_name,
+            quantities=LS_QUANTITIES if quantities is None else quantities,
+        )[self.runnb]
+        self.setLSQuantities(
+            omsdf["lumisection"].to_numpy(),
+            **{
+                col: omsdf[col].to_numpy(dtype=float)
+                for col in omsdf.columns
+                if col != "lumisection"
+            },
+        )
+
+    def getLSQuantity(self, name, me=None) -> np.ma.MaskedArray:
+        """
+        Returns a stored per-LS quantity aligned to the LSs of the given ME.
+        LSs without a value are masked.
+        """
+        if me is None:
+            me = self.getMENames()[0]
+        if name not in self._lsquantities:
+            raise KeyError(f"LS quantity {name} not set.")
+        if (name, me) not in self._aligned:
+            ls_numbers, values = self._lsquantities[name]
+            self._aligned[(name, me)] = align_lss(
+                self.getLSNumbers(me), ls_numbers, values
+            )
+        return self._aligned[(name, me)]
+
     def _setEmptyLSs(self, thrshld=0):
         for me in self.getMENames():
             isemptyLSs_arr = np.array(self.getEntries(me)) <= thrshld
@@ -150,39 +212,112 @@ class MEData:
                 self.me_dict[me]["data"] / summation, nan=0
             )
 
+    def _alignTrigRate(self, trigger_rate, me) -> np.ma.MaskedArray:
+        """
+        Aligns a trigger rate to the LSs of an ME by LS number. Accepts the name of
+        a stored LS quantity or a pd.Series indexed by LS number (as returned by
+        oms.get_rate). A plain array is taken to hold the rates of LSs 1, 2, ...
+        and is only accepted if it covers exactly the LSs of the ME.
+        """
+        if isinstance(trigger_rate, str):
+            return self.getLSQuantity(trigger_rate, me)
+        if isinstance(trigger_rate, pd.Series):
+            return align_lss(
+                self.getLSNumbers(me), trigger_rate.index.to_numpy(), trigger_rate
+            )
+        if len(trigger_rate) == 0:
+            raise ValueError("Trigger rate array is empty.")
+        if len(trigger_rate) != self.getLSNumbers(me)[-1]:
+            raise ValueError(
+                f"Trigger rate array has {len(trigger_rate)} entries but {me} ends at "
+                f"LS {self.getLSNumbers(me)[-1]}. Pass the rate as a pd.Series "
+                "indexed by LS number (e.g. from oms.get_rate) to align it."
+            )
+        return align_lss(
+            self.getLSNumbers(me),
+            np.arange(1, len(trigger_rate) + 1),
+            np.ma.filled(np.ma.asarray(trigger_rate, dtype=float), np.nan),
+        )
+
     def _trigNormalize(self, trigger_rate, mes=None):
-        for me in self.getMENames():
+        if mes is None:
+            mes = self.getMENames()
+        for me in mes:
             medata = self.getData(me)
             dims = self.getDims(me)
+            if dims not in [1, 2]:
+                raise ValueError("Dimensions can only be 1 or 2.")
 
-            # Check length of trigger rate array
-            if len(trigger_rate) > medata.shape[0]:
-                print("SHORTENING")
-                trigger_rate = trigger_rate[: medata.shape[0]]
-            elif len(trigger_rate) < medata.shape[0]:
-                raise ValueError(
-                    "Trigger rate array is shorter than the number of LSs in the data."
+            trig_rate = self._alignTrigRate(trigger_rate, me)
+            if trig_rate.mask.any():
+                warnings.warn(
+                    f"No trigger rate for {trig_rate.mask.sum()} LS(s) of {me}. Setting them to 0."
                 )
-            if len(trigger_rate) == 0:
-                raise ValueError("Trigger rate array is empty.")
-
-            # Set data to 0 for lumisections where trigger_rate is 0
-            trig_rate = np.where(trigger_rate == 0, 1, trigger_rate)
-            medata = np.where(trigger_rate[:, np.newaxis] == 0, 0, medata)
-
-            if dims == 1:
-                self.me_dict[me]["trignorm"] = medata / trig_rate[:, np.newaxis]
-            elif dims == 2:
-                n = medata.shape[1]
-                m = medata.shape[2]
-                medata = np.where(
-                    trigger_rate[:, np.newaxis, np.newaxis] == 0, 0, medata
-                )
-                self.me_dict[me]["trignorm"] = medata / np.repeat(
-                    trig_rate[:, np.newaxis], n * m, axis=1
-                ).reshape(-1, n, m)
-            else:
-                raise ValueError("Dimensions can only be 1 or 2.")
+
+            # Set data to 0 for lumisections where trigger rate is 0 or missing
+            trig_rate = trig_rate.filled(0)
+            bcast = (slice(None),) + (np.newaxis,) * (medata.ndim - 1)
+            is_zero = (trig_rate == 0)[bcast]
+            self.me_dict[me]["trignorm"] = np.where(
+                is_zero, 0, medata / np.where(trig_rate == 0, 1, trig_rate)[bcast]
+            )
+
+    def _rebinnable(self, me, axis):
+        """Yields the data types stored for an ME with the array axis to rebin."""
+        if axis not in ["x", "y"] or (axis == "y" and self.getDims(me) != 2):
+            raise ValueError("Invalid dimension or element is not 2D")
+        for data_type in ["data", "norm", "trignorm", "integral"]:
+            if data_type in self.me_dict[me]:
+                arr = self.me_dict[me][data_type]
+                # x is the last axis; y is the one before it for 2D MEs
+                yield data_type, arr.ndim - 1 if axis == "x" else arr.ndim - 2
+
+    def rebin(self, me, factor, axis="x"):
+        """
+        Merges groups of factor consecutive bins along an axis for all LSs at once
+        with a reshape-sum. If the number of bins is not a multiple of factor, the
+        last bin merges the remaining bins. Rebins the data and any normalized or
+        integrated data, in place.
+        """
+        if factor < 1:
+            raise ValueError("Rebinning factor must be a positive integer.")
+        bins = self.getBins(me, dim=axis)
+        num_bins = len(bins)
+        num_new = -(-num_bins // factor)
+        pad = num_new * factor - num_bins
+        for data_type, ax in self._rebinnable(me, axis):
+            arr = np.moveaxis(self.me_dict[me][data_type], ax, -1)
+            arr = np.pad(arr, [(0, 0)] * (arr.ndim - 1) + [(0, pad)])
+            arr = arr.reshape(arr.shape[:-1] + (num_new, factor)).sum(axis=-1)
+            self.me_dict[me][data_type] = np.moveaxis(arr, -1, ax)
+
+        # New bin positions are the mean of the merged bins' positions
+        counts = np.minimum(factor, num_bins - np.arange(num_new) * factor)
+        self.me_dict[me][f"{axis}_bins"] = (
+            np.add.reduceat(bins, np.arange(0, num_bins, factor)) / counts
+        )
+
+    def rebin_to(self, me, edges, axis="x"):
+        """
+        Rebins an ME onto the bins defined by edges, e.g. to harmonize runs whose
+        binning differs. Each bin is assigned to the new bin containing its position
+        and the data of all LSs is rebinned with one matrix product. Bins outside
+        the edges are dropped. Rebins in place; new bin positions are the centers.
+        """
+        edges = np.asarray(edges, dtype=float)
+        if (len(edges) < 2) or np.any(np.diff(edges) <= 0):
+            raise ValueError("Edges must be increasing and define at least one bin.")
+        bins = self.getBins(me, dim=axis)
+        new_idxs = np.searchsorted(edges, bins, side="right") - 1
+        new_idxs[bins == edges[-1]] = len(edges) - 2  # Last edge is inclusive
+        inside = (new_idxs >= 0) & (new_idxs < len(edges) - 1)
+
+        rebin_matrix = np.zeros((len(bins), len(edges) - 1))
+        rebin_matrix[np.flatnonzero(inside), new_idxs[inside]] = 1
+        for data_type, ax in self._rebinnable(me, axis):
+            arr = np.moveaxis(self.me_dict[me][data_type], ax, -1)
+            self.me_dict[me][data_type] = np.moveaxis(arr @ rebin_matrix, -1, ax)
+        self.me_dict[me][f"{axis}_bins"] = (edges[:-1] + edges[1:]) / 2
 
     def integrateData(self, norm=False, mes=None, exclude=[]):
         if len(exclude) > 0:
@@ -1,39 +1,281 @@
+from collections import OrderedDict
 import numpy as np
-import plotly.graph_objects as go
+import pandas as pd
 from cmsdials.filters import OMSFilter, OMSPage
 from dqmexplore.utils.datautils import makeDF
 
+# Per-run LRU cache of OMS frames, keyed by (endpoint, extra filters, run number)
+_cache = OrderedDict()
+CACHE_SIZE = 2000  # Maximum number of cached run frames
 
-def get_rate(runnb, dials=None, dataset_name="ZeroBias", extrafilters=[]):
-    if dials is None:
-        from dqmexplore.utils.setupdials import setup_dials_object_deviceauth
+LS_QUANTITIES = ["rate", "delivered_lumi", "recorded_lumi", "pileup"]
+
+
+def _run_batches(runnbs, batch_size=50, max_gap=20):
+    """
+    Groups sorted run numbers into batches that can be fetched with a single
+    run_number range query. A new batch is started when the batch is full or
+    when its range would include more than max_gap run numbers that were not
+    requested, so sparse run lists are not fetched through their gaps.
+    """
+    batches = []
+    for runnb in sorted(set(runnbs)):
+        if (
+            batches
+            and len(batches[-1]) < batch_size
+            and runnb - batches[-1][0] - len(batches[-1]) <= max_gap
+        ):
+            batches[-1].append(runnb)
+        else:
+            batches.append([runnb])
+    return batches
+
+
+def _cache_get(key):
+    if key not in _cache:
+        return None
+    _cache.move_to_end(key)
+    return _cache[key]
+
+
+def _cache_put(key, df):
+    _cache[key] = df
+    _cache.move_to_end(key)
+    while len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+
+
+def _query_all_pages(dials, endpoint, filters, limit=5000):
+    """Queries an OMS endpoint through DIALS, following offset pages until exhausted."""
+    rows = []
+    offset = 0
+    while True:
+        data = dials.oms.query(
+            endpoint=endpoint,
+            filters=filters,
+            pages=[
+                OMSPage(attribute_name="limit", value=limit),
+                OMSPage(attribute_name="offset", value=offset),
+            ],
+        )
+        rows.extend(data["data"])
+        if len(data["data"]) < limit:
+            break
+        offset += limit
+    return {"data": rows}
+
+
+def _fetch_per_run(
+    endpoint,
+    runnbs,
+    ls_attr,
+    columns,
+    dials=None,
+    extrafilters=[],
+    batch_size=50,
+    max_gap=20,
+    use_cache=True,
+):
+    """
+    Fetches per-LS rows of an OMS endpoint for many runs in batched range queries.
+    Returns a dict of run number -> DataFrame with a "lumisection" column taken
+    from ls_attr, sorted by it. Frames are kept in an LRU cache of CACHE_SIZE
+    runs, which use_cache=False bypasses entirely (neither read nor written).
+    """
+    fltrs_key = tuple(
+        (fltr.attribute_name, fltr.operator, fltr.value) for fltr in extrafilters
+    )
+    frames = {}
+    if use_cache:
+        for runnb in set(runnbs):
+            df = _cache_get((endpoint, fltrs_key, runnb))
+            if df is not None:
+                frames[runnb] = df
+    to_fetch = [runnb for runnb in set(runnbs) if runnb not in frames]
+
+    if to_fetch:
+        if dials is None:
+            from dqmexplore.utils.setupdials import setup_dials_object_deviceauth
 
-        dials = setup_dials_object_deviceauth()
+            dials = setup_dials_object_deviceauth()
 
-    filters = [
-        OMSFilter(attribute_name="run_number", value=runnb, operator="EQ"),
-        OMSFilter(attribute_name="dataset_name", value=dataset_name, operator="EQ"),
-    ]
+        for batch in _run_batches(to_fetch, batch_size=batch_size, max_gap=max_gap):
+            if len(batch) == 1:
+                run_fltrs = [
+                    OMSFilter(
+                        attribute_name="run_number", value=batch[0], operator="EQ"
+                    )
+                ]
+            else:
+                run_fltrs = [
+                    OMSFilter(
+                        attribute_name="run_number", value=batch[0], operator="GE"
+                    ),
+                    OMSFilter(
+                        attribute_name="run_number", value=batch[-1], operator="LE"
+                    ),
+                ]
+            data = _query_all_pages(dials, endpoint, run_fltrs + extrafilters)
 
-    data = dials.oms.query(
-        endpoint="datasetrates",
-        filters=filters,
-        pages=[OMSPage(attribute_name="limit", value=5000)],
+            data_df = (
+                makeDF(data)
+                if data["data"]
+                else pd.DataFrame(columns=["run_number", ls_attr] + columns)
+            )
+            data_df["lumisection"] = data_df[ls_attr]
+            data_df = data_df.sort_values(by=["run_number", "lumisection"])
+            groups = dict(list(data_df.groupby("run_number", sort=False)))
+            for runnb in batch:
+                frames[runnb] = groups.get(runnb, data_df.iloc[0:0])[
+                    ["lumisection"] + columns
+                ].reset_index(drop=True)
+                if use_cache:
+                    _cache_put((endpoint, fltrs_key, runnb), frames[runnb])
+
+    return {runnb: frames[runnb] for runnb in runnbs}
+
+
+def get_rates(
+    runnbs,
+    dials=None,
+    dataset_name="ZeroBias",
+    extrafilters=[],
+    batch_size=50,
+    max_gap=20,
+    use_cache=True,
+):
+    """
+    Fetches per-LS trigger rates for many runs using run_number range queries.
+    Returns a dict of run number -> rate Series indexed by LS number
+    (last_lumisection_number) and sorted by it, so rates with missing or
+    duplicated LSs can be aligned onto the LSs of an ME (see MEData.normData).
+    Runs without data in OMS are mapped to an empty Series.
+    """
+    if np.isscalar(runnbs):
+        runnbs = [runnbs]
+
+    frames = _fetch_per_run(
+        "datasetrates",
+        runnbs,
+        "last_lumisection_number",
+        ["rate"],
+        dials=dials,
+        extrafilters=[
+            OMSFilter(attribute_name="dataset_name", value=dataset_name, operator="EQ")
+        ]
+        + extrafilters,
+        batch_size=batch_size,
+        max_gap=max_gap,
+        use_cache=use_cache,
     )
+    return {
+        runnb: pd.Series(
+            frame["rate"].to_numpy(dtype=float),
+            index=pd.Index(
+                frame["lumisection"].to_numpy(dtype=int), name="lumisection"
+            ),
+            name="rate",
+        )
+        for runnb, frame in frames.items()
+    }
+
+
+def get_ls_quantities(
+    runnbs,
+    dials=None,
+    dataset_name="ZeroBias",
+    quantities=LS_QUANTITIES,
+    batch_size=50,
+    max_gap=20,
+    use_cache=True,
+):
+    """
+    Fetches per-LS OMS quantities (trigger rate from datasetrates, luminosity and
+    pileup from lumisections) for many runs.
+    Returns a dict of run number -> DataFrame with a "lumisection" column and one
+    column per quantity, outer-joined on lumisection number.
+    """
+    if np.isscalar(runnbs):
+        runnbs = [runnbs]
+    lumi_qtys = [qty for qty in quantities if qty != "rate"]
+
+    joined = {runnb: pd.DataFrame({"lumisection": []}) for runnb in runnbs}
+    if "rate" in quantities:
+        frames = _fetch_per_run(
+            "datasetrates",
+            runnbs,
+            "last_lumisection_number",
+            ["rate"],
+            dials=dials,
+            extrafilters=[
+                OMSFilter(
+                    attribute_name="dataset_name", value=dataset_name, operator="EQ"
+                )
+            ],
+            batch_size=batch_size,
+            max_gap=max_gap,
+            use_cache=use_cache,
+        )
+        joined = {
+            runnb: df.merge(
+                frames[runnb].drop_duplicates("lumisection"),
+                on="lumisection",
+                how="outer",
+            )
+            for runnb, df in joined.items()
+        }
+    if lumi_qtys:
+        frames = _fetch_per_run(
+            "lumisections",
+            runnbs,
+            "lumisection_number",
+            lumi_qtys,
+            dials=dials,
+            batch_size=batch_size,
+            max_gap=max_gap,
+            use_cache=use_cache,
+        )
+        joined = {
+            runnb: df.merge(
+                frames[runnb].drop_duplicates("lumisection"),
+                on="lumisection",
+                how="outer",
+            )
+            for runnb, df in joined.items()
+        }
 
-    data_df = makeDF(data)
-    data_df.sort_values(by="last_lumisection_number", inplace=True)
+    return {runnb: df.sort_values("lumisection") for runnb, df in joined.items()}
 
-    return data_df["rate"].to_numpy()
+
+def clear_cache():
+    _cache.clear()
+
+
+def get_rate(runnb, dials=None, dataset_name="ZeroBias", extrafilters=[]):
+    """
+    Per-LS trigger rates of a run as an array sorted by LS number. Use get_rates
+    for rates indexed by LS number, which can be aligned onto the LSs of an ME.
+    """
+    return get_rates(
+        [runnb], dials=dials, dataset_name=dataset_name, extrafilters=extrafilters
+    )[runnb].to_numpy()
 
 
 def plot_rate(rate, fig_title="Trigger Rate", norm=False, show=False):
+    import plotly.graph_objects as go  # Deferred, only needed for plotting
+
     fig = go.Figure()
 
     if norm:
         rate = rate / rate.sum()
 
-    fig.add_trace(go.Scatter(x=np.arange(1, len(rate) + 1), y=rate, mode="lines"))
+    # Rates from get_rates are indexed by LS number
+    lss = (
+        rate.index.to_numpy()
+        if isinstance(rate, pd.Series)
+        else np.arange(1, len(rate) + 1)
+    )
+    fig.add_trace(go.Scatter(x=lss, y=np.asarray(rate), mode="lines"))
 
     fig.update_layout(
         title=fig_title,
@@ -42,7 +284,7 @@ def plot_rate(rate, fig_title="Trigger Rate", norm=False, show=False):
     )
 
     fig.update_yaxes(range=[0, rate.max() + rate.max() * 0.1])
-    fig.update_xaxes(range=[1, len(rate)])
+    fig.update_xaxes(range=[lss.min(), lss.max()] if len(lss) else [1, 1])
 
     if show:
         fig.show()
@@ -1,10 +1,12 @@
 import pandas as pd
 from cmsdials.filters import OMSFilter, OMSPage
 from dqmexplore.utils.datautils import makeDF
+from dqmexplore.golden import GoldenJSON
 import numpy as np
 import json
 
 OPS = ["EQ", "NEQ", "LT", "GT", "LE", "GE", "LIKE"]
+FLAGS_COL = "packed_flags"  # Prefix of the bitmask columns holding packed boolean flags
 
 
 class OMSData:
@@ -34,8 +36,10 @@ class OMSData:
     def _resetDataDict(self, endpoint="all"):
         if endpoint == "all":
             self._data = {endpoint: None for endpoint in self.endpoints}
+            self._flags = {endpoint: [] for endpoint in self.endpoints}
         else:
             self._data[endpoint] = None
+            self._flags[endpoint] = []
 
     def _resetFilters(self):
         self.filters = []
@@ -161,20 +165,214 @@ class OMSData:
 
         return query_results
 
+    def _packFlags(self, endpoint: str, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Packs boolean flag columns into uint64 bitmask columns, 64 flags per column
+        (see getFlags). The flag layout of the endpoint is kept across fetches: new
+        flags are appended to it and known flags missing from df are packed as False.
+        """
+        new_flags = [col for col in df.columns if df[col].dtype == bool]
+        if not new_flags:
+            return df
+        flags = self._flags[endpoint] + [
+            flag for flag in new_flags if flag not in self._flags[endpoint]
+        ]
+        bits = (
+            df.reindex(columns=flags, fill_value=False)
+            .astype(bool)
+            .to_numpy(dtype=np.uint64)
+        )
+        df = df.drop(columns=new_flags)
+        for i in range(0, len(flags), 64):
+            shifts = np.arange(len(flags[i : i + 64]), dtype=np.uint64)
+            df[f"{FLAGS_COL}_{i // 64}"] = np.bitwise_or.reduce(
+                bits[:, i : i + 64] << shifts, axis=1
+            )
+        self._flags[endpoint] = flags
+        return df
+
+    def _downcast(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Turns repeated strings into categoricals and downcasts integer columns to
+        the smallest integer dtype that holds them.
+        """
+        df = df.copy()
+        for col in df.columns:
+            if col.startswith(FLAGS_COL) or isinstance(
+                df[col].dtype, pd.CategoricalDtype
+            ):
+                continue
+            if df[col].dtype == object or pd.api.types.is_string_dtype(df[col]):
+                # Only strings repeated often enough are worth a categorical
+                is_str = pd.api.types.infer_dtype(df[col], skipna=True) == "string"
+                if is_str and df[col].nunique() <= len(df) // 2:
+                    df[col] = df[col].astype("category")
+            elif pd.api.types.is_integer_dtype(df[col].dtype):
+                df[col] = pd.to_numeric(df[col], downcast="integer")
+        return df
+
+    def _matchDtypes(self, old_df: pd.DataFrame, new_df: pd.DataFrame) -> tuple:
+        """
+        Casts the columns of newly fetched (downcast) rows to the dtypes of the
+        existing data so both can be concatenated without upcasting the whole frame.
+        Only when new values do not fit is the existing column widened (integers)
+        or given new categories (categoricals, without recoding). Packed flag columns
+        missing on either side are added as 0.
+        """
+        old_df = old_df.copy(deep=False)
+        new_df = new_df.copy()
+        for col in new_df.columns:
+            if col.startswith(FLAGS_COL) and col not in old_df.columns:
+                old_df[col] = np.zeros(len(old_df), dtype=np.uint64)
+        for col in old_df.columns:
+            if col.startswith(FLAGS_COL) and col not in new_df.columns:
+                new_df[col] = np.zeros(len(new_df), dtype=np.uint64)
+            if col not in new_df.columns:
+                continue
+            old_dtype, new_dtype = old_df[col].dtype, new_df[col].dtype
+            if isinstance(old_dtype, pd.CategoricalDtype):
+                new_cats = pd.Index(new_df[col].dropna().unique()).difference(
+                    old_dtype.categories
+                )
+                if len(new_cats):
+                    old_df[col] = old_df[col].cat.add_categories(new_cats)
+                new_df[col] = new_df[col].astype(old_df[col].dtype)
+            elif pd.api.types.is_integer_dtype(
+                old_dtype
+            ) and pd.api.types.is_integer_dtype(new_dtype):
+                dtype = np.promote_types(old_dtype, new_dtype)
+                if dtype != old_dtype:
+                    old_df[col] = old_df[col].astype(dtype)
+                new_df[col] = new_df[col].astype(dtype)
+            elif isinstance(new_dtype, pd.CategoricalDtype):
+                new_df[col] = new_df[col].astype(old_dtype)
+        return old_df, new_df
+
+    def _unpackFlags(self, endpoint: str, df: pd.DataFrame) -> pd.DataFrame:
+        """Replaces the bitmask columns of df by the boolean flag columns."""
+        packed_cols = [col for col in df.columns if col.startswith(FLAGS_COL)]
+        if not packed_cols:
+            return df
+        flags = self._flags[endpoint]
+        packed = df[packed_cols].to_numpy(dtype=np.uint64)
+        unpacked = {
+            flag: (packed[:, pos // 64] >> np.uint64(pos % 64)) & np.uint64(1) == 1
+            for pos, flag in enumerate(flags)
+        }
+        self._flags[endpoint] = []
+        return pd.concat(
+            [df.drop(columns=packed_cols), pd.DataFrame(unpacked, index=df.index)],
+            axis=1,
+        )
+
+    def _upsert(self, endpoint: str, new_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Merges newly fetched rows into the existing data of an endpoint. For runs
+        and lumisections, rows are keyed on their index (runnb, plus lumisection):
+        existing rows whose keys are in new_df are replaced and all others are
+        kept, so fetching only the new LSs of a run extends it. The frame is only
+        re-sorted if the new keys do not all come after the existing ones. Other
+        endpoints have no key, so new rows are appended.
+        """
+        old_df = self._data[endpoint]
+        keyed = endpoint in ["runs", "lumisections"]
+        if keyed:
+            new_df = new_df.sort_index()
+        if old_df is None:
+            return new_df
+        old_df, new_df = self._matchDtypes(old_df, new_df)
+        if not keyed:
+            return pd.concat([old_df, new_df], ignore_index=True)
+
+        kept_df = old_df[~old_df.index.isin(new_df.index)]
+        merged = pd.concat([kept_df, new_df])
+        if len(kept_df) and kept_df.index[-1] > new_df.index[0]:
+            merged = merged.sort_index(kind="stable")
+        return merged
+
+    def getFlags(self, endpoint: str, flags: list[str] | None = None) -> pd.DataFrame:
+        """
+        Returns the boolean flags of an endpoint as a DataFrame of bools, unpacking
+        them if the data was compacted (see fetchData).
+        """
+        df = self._data[endpoint]
+        if df is None:
+            return None
+        bool_cols = df.select_dtypes(include=[bool]).columns.to_list()
+        all_flags = self._flags[endpoint] + bool_cols
+        flags = all_flags if flags is None else flags
+        unpacked = {}
+        for flag in flags:
+            if flag not in all_flags:
+                raise KeyError(f"Unknown flag {flag} for endpoint {endpoint}.")
+            if flag in bool_cols:
+                unpacked[flag] = df[flag].to_numpy()
+                continue
+            pos = all_flags.index(flag)
+            packed = df[f"{FLAGS_COL}_{pos // 64}"].to_numpy(dtype=np.uint64)
+            unpacked[flag] = (packed >> np.uint64(pos % 64)) & np.uint64(1) == 1
+        return pd.DataFrame(unpacked, index=df.index)
+
+    def _uncompactedSize(self, endpoint: str) -> int:
+        """
+        Memory the current data of an endpoint would use in the uncompacted layout:
+        one bool column per flag, strings as objects and integers as int64.
+        """
+        df = self._data[endpoint]
+        size = df.index.memory_usage(deep=True) + len(df) * len(self._flags[endpoint])
+        for col in df.columns:
+            if col.startswith(FLAGS_COL):
+                continue
+            values = df[col]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                values = values.astype(object)
+            elif pd.api.types.is_integer_dtype(values.dtype):
+                values = values.astype(np.int64)
+            size += values.memory_usage(deep=True, index=False)
+        return size
+
+    def memory_report(self) -> pd.DataFrame:
+        """
+        Reports the memory used by each endpoint's current data against the size
+        the same rows would take uncompacted (see fetchData).
+        """
+        report = {}
+        for endpoint, df in self._data.items():
+            if df is None:
+                continue
+            size_before = self._uncompactedSize(endpoint)
+            size_after = df.memory_usage(deep=True).sum()
+            report[endpoint] = {
+                "before_MB": size_before / 1024**2,
+                "after_MB": size_after / 1024**2,
+                "ratio": size_after / size_before,
+            }
+        return pd.DataFrame(report).T
+
     def fetchData(
         self,
         endpoint: str = "runs",
         include: list[str] = [],
         ignore_filters: bool = False,
         match_runs: bool = False,
+        compact: bool = False,
     ):
-        """Fetches data from OMS through DIALS."""
+        """
+        Fetches data from OMS through DIALS. If data was already fetched for the
+        endpoint, the new results are merged into it (see _upsert). If compact is
+        set, the data is stored in a compact layout: boolean flag columns are
+        replaced by bitmasks (retrievable through getFlags), repeated strings are
+        made categorical and integers are downcast (see memory_report).
+        Compaction is off by default, as code indexing the flag columns of the
+        returned frames directly would break on the packed layout; pass
+        compact=True for large fetches.
+        """
 
         if endpoint not in self.endpoints:
             raise ValueError(f"Invalid endpoint: {endpoint}.")
         if self._data[endpoint] is not None:
             print(
-                f"WARNING: Data already fetched for endpoint: {endpoint}. Will try appending to the existing data."
+                f"WARNING: Data already fetched for endpoint: {endpoint}. New results will be merged into the existing data."
             )
 
         results_lst = []  # List of formatted (into dfs) query results
@@ -235,20 +433,33 @@ class OMSData:
             return None
 
         results_df = results_df[~results_df.index.duplicated(keep="first")]
-        self._data[endpoint] = results_df
+
+        # Keeping the existing data in the same (packed or unpacked) layout
+        if self._data[endpoint] is not None:
+            self._data[endpoint] = (
+                self._packFlags(endpoint, self._data[endpoint])
+                if compact
+                else self._unpackFlags(endpoint, self._data[endpoint])
+            )
+        if compact:
+            # Only the new rows are compacted, then cast to the existing dtypes
+            results_df = self._downcast(self._packFlags(endpoint, results_df))
+
+        self._data[endpoint] = self._upsert(endpoint, results_df)
         return self._data[endpoint]
 
-    def applyGoldenJSON(self, gold_runs: str | dict, keep=[]):
+    def applyGoldenJSON(self, gold_runs: str | dict | GoldenJSON, keep=[]):
         """
         Filters the 'runs' and 'lumisections' DataFrames based on a golden JSON file.
+        Runs are kept if they appear in the golden JSON, lumisections if they fall in
+        one of the certified LS ranges of their run. Runs in keep are kept entirely.
         Entries not matching the golden JSON are stored in separate DataFrames.
         """
-        if isinstance(gold_runs, str):
-            with open(gold_runs) as f:
-                gold_runs = json.load(f)
+        if not isinstance(gold_runs, GoldenJSON):
+            gold_runs = GoldenJSON(gold_runs)
 
         self._gold = gold_runs
-        gold_runnbs = list(map(int, gold_runs.keys()))
+        gold_runnbs = gold_runs.getRuns()
         self._baddata = {"runs": None, "lumisections": None}
 
         # Filtering runs DF
@@ -261,9 +472,11 @@ class OMSData:
             self._baddata["runs"] = runs_df[~golden_run_filter]
         if self._data["lumisections"] is not None:
             lss_df = self._data["lumisections"]
-            golden_ls_filter = lss_df.index.get_level_values("runnb").isin(
-                gold_runnbs
-            ) | np.array(lss_df.index.get_level_values("runnb").isin(keep))
+            ls_runnbs = lss_df.index.get_level_values("runnb")
+            golden_ls_filter = gold_runs.contains(
+                ls_runnbs,
+                lss_df.index.get_level_values("lumisection"),
+            ) | np.array(ls_runnbs.isin(keep))
             self._data["lumisections"] = lss_df[golden_ls_filter]
             self._baddata["lumisections"] = lss_df[~golden_ls_filter]
 
@@ -283,15 +496,25 @@ class OMSData:
         return runs
 
     def getAvailFtrs(self, which="all"):
+        """Lists available features per endpoint, including packed flags."""
         if which == "all":
             return {
-                key: df.columns.to_list() if isinstance(df, pd.DataFrame) else None
+                key: (
+                    [col for col in df.columns if not col.startswith(FLAGS_COL)]
+                    + self._flags[key]
+                    if isinstance(df, pd.DataFrame)
+                    else None
+                )
                 for key, df in self._data.items()
             }
         elif which == "numerical":
             return {
                 key: (
-                    df.select_dtypes(include=[int, float]).columns.to_list()
+                    [
+                        col
+                        for col in df.select_dtypes(include="number").columns
+                        if not col.startswith(FLAGS_COL)
+                    ]
                     if isinstance(df, pd.DataFrame)
                     else None
                 )
@@ -301,6 +524,7 @@ class OMSData:
             return {
                 key: (
                     df.select_dtypes(include=[bool]).columns.to_list()
+                    + self._flags[key]
                     if isinstance(df, pd.DataFrame)
                     else None
                 )
@@ -0,0 +1,236 @@
+import os
+import copy
+import json
+import hashlib
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+
+def data_hash(me_data) -> str:
+    """
+    Fast hash of an MEData object: ME names, LS numbers, bins and raw contents
+    (derived normalized/integrated arrays follow from these). Array buffers are
+    hashed directly with BLAKE2b, without copies or serialisation.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for me in sorted(me_data.getMENames()):
+        h.update(me.encode())
+        h.update(np.ascontiguousarray(me_data.getLSNumbers(me)))
+        for dim in ["x", "y"][: me_data.getDims(me)]:
+            h.update(np.ascontiguousarray(me_data.getBins(me, dim=dim)))
+        data = np.ascontiguousarray(me_data.getData(me))
+        h.update(f"{data.dtype}{data.shape}".encode())
+        h.update(data)
+    return h.hexdigest()
+
+
+def config_hash(config) -> str:
+    """
+    Hash of a canonical form of a config: configs given as file paths are read,
+    dict keys are sorted and numpy values converted, so equal configs hash equally
+    regardless of key order or origin.
+    """
+    if isinstance(config, str) and os.path.isfile(config):
+        with open(config, "r") as f:
+            config = json.load(f)
+    canonical = json.dumps(
+        config,
+        sort_keys=True,
+        separators=(",", ":"),
+        default=lambda obj: obj.tolist() if hasattr(obj, "tolist") else str(obj),
+    )
+    return hashlib.blake2b(canonical.encode(), digest_size=16).hexdigest()
+
+
+def _value_hash(value, me_data=None) -> str:
+    """
+    Hash of an optional argument such as trigger rates. Strings naming an LS
+    quantity of me_data (see MEData.setLSQuantities) are hashed by their values.
+    """
+    if value is None:
+        return ""
+    if isinstance(value, str) and me_data is not None:
+        try:
+            return value + "".join(
+                _value_hash(me_data.getLSQuantity(value, me))
+                for me in sorted(me_data.getMENames())
+            )
+        except KeyError:
+            pass
+    if isinstance(value, pd.Series):
+        return _value_hash(value.index.to_numpy()) + _value_hash(value.to_numpy())
+    if isinstance(value, (np.ndarray, list, tuple)):
+        array = np.ascontiguousarray(np.ma.filled(np.ma.asarray(value), np.nan))
+        h = hashlib.blake2b(digest_size=16)
+        h.update(f"{array.dtype}{array.shape}".encode())
+        h.update(array)
+        return h.hexdigest()
+    return config_hash(value)
+
+
+class RenderCache:
+    """
+    Cache of rendered figures keyed by the hash of the input data (see data_hash)
+    and of the canonical plots and figure configs, e.g. to avoid redrawing
+    unchanged figures when notebook cells are re-executed.
+    Figures are kept in memory in LRU order, up to maxsize figures. If directory
+    is given, they are also stored there as plotly JSON (typed arrays) and
+    evicted least recently used first when the files exceed max_disk_bytes.
+    Cached figures are returned as is, so modifying one modifies the cached copy.
+    Unlike the plotting functions, rendering through the cache does not normalize
+    or integrate me_data and ref_data in place: figures are rendered from copies,
+    so the data is left unchanged whether the figure is cached or not.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 32,
+        directory: str | None = None,
+        max_disk_bytes: int = 2 * 1024**3,
+    ) -> None:
+        self.maxsize = maxsize
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.hits = 0
+        self.misses = 0
+        self._figures = OrderedDict()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._figures)
+
+    def getKey(self, func, me_data, *configs, ref_data=None, **kwargs) -> str:
+        """Cache key of rendering me_data with func and the given configs/kwargs."""
+        h = hashlib.blake2b(digest_size=16)
+        h.update(f"{func.__module__}.{func.__qualname__}".encode())
+        h.update(data_hash(me_data).encode())
+        h.update(b"" if ref_data is None else data_hash(ref_data).encode())
+        for config in configs:
+            h.update(config_hash(config).encode())
+        for key in sorted(kwargs):
+            h.update(f"{key}={_value_hash(kwargs[key], me_data)}".encode())
+        return h.hexdigest()
+
+    def _diskPath(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str):
+        """Cached figure of a key (from memory, else disk) or None."""
+        if key in self._figures:
+            self._figures.move_to_end(key)
+            return self._figures[key]
+        if self.directory is not None and os.path.exists(self._diskPath(key)):
+            import plotly.io as pio
+
+            fig = pio.read_json(self._diskPath(key))
+            os.utime(self._diskPath(key))  # Marks the file as recently used
+            self._store(key, fig)
+            return fig
+        return None
+
+    def _store(self, key: str, fig) -> None:
+        self._figures[key] = fig
+        self._figures.move_to_end(key)
+        while len(self._figures) > self.maxsize:
+            self._figures.popitem(last=False)
+
+    def put(self, key: str, fig) -> None:
+        self._store(key, fig)
+        if self.directory is not None:
+            import plotly.io as pio
+
+            tmp_path = self._diskPath(key) + ".tmp"
+            pio.write_json(fig, tmp_path)
+            os.replace(tmp_path, self._diskPath(key))
+            self._evictDisk()
+
+    def _evictDisk(self) -> None:
+        files = [
+            os.path.join(self.directory, fname)
+            for fname in os.listdir(self.directory)
+            if fname.endswith(".json")
+        ]
+        stats = sorted(
+            ((os.stat(path).st_mtime_ns, os.path.getsize(path), path) for path in files)
+        )
+        total = sum(size for _, size, _ in stats)
+        for _, size, path in stats:
+            if total <= self.max_disk_bytes:
+                break
+            os.remove(path)
+            total -= size
+
+    def clear(self, disk: bool = False) -> None:
+        self._figures.clear()
+        if disk and self.directory is not None:
+            for fname in os.listdir(self.directory):
+                if fname.endswith(".json"):
+                    os.remove(os.path.join(self.directory, fname))
+
+    def render(self, func, me_data, *configs, ref_data=None, **kwargs):
+        """
+        Returns the cached figure of func(me_data, *configs, ref_data=ref_data,
+        **kwargs) if the data and configs are unchanged, else renders and caches it.
+        """
+        key = self.getKey(func, me_data, *configs, ref_data=ref_data, **kwargs)
+        fig = self.get(key)
+        if fig is not None:
+            self.hits += 1
+            return fig
+        self.misses += 1
+        if ref_data is not None:
+            kwargs["ref_data"] = copy.deepcopy(ref_data)
+        # Plotting functions normalize the data and may fill in missing config
+        # keys, which must not change the caller's data and configs (and so the
+        # key of the next call), nor depend on whether the figure was cached
+        fig = func(copy.deepcopy(me_data), *copy.deepcopy(configs), **kwargs)
+        self.put(key, fig)
+        return fig
+
+    def plotMEs(
+        self,
+        me_data,
+        plots_config: dict | str,
+        figure_config: dict | str,
+        trigger_rates=None,
+        ref_data=None,
+        show: bool = False,
+    ):
+        """Cached interplt.plotMEs, leaving me_data and ref_data unchanged."""
+        from dqmexplore.interplt import plotMEs
+
+        fig = self.render(
+            plotMEs,
+            me_data,
+            plots_config,
+            figure_config,
+            ref_data=ref_data,
+            trigger_rates=trigger_rates,
+        )
+        if show:
+            fig.show()
+        return fig
+
+    def plotheatmaps1D(
+        self,
+        me_data,
+        plots_config: dict | str,
+        fig_config: dict | str,
+        trigger_rates=None,
+        show: bool = False,
+    ):
+        """Cached staticplt.plotheatmaps1D, leaving me_data unchanged."""
+        from dqmexplore.staticplt import plotheatmaps1D
+
+        fig = self.render(
+            plotheatmaps1D,
+            me_data,
+            plots_config,
+            fig_config,
+            trigger_rates=trigger_rates,
+        )
+        if show:
+            fig.show()
+        return fig
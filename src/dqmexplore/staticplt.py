@@ -1,6 +1,12 @@
+import numpy as np
 import plotly.graph_objects as go
+import plotly.colors
 from plotly.subplots import make_subplots
 import json
+import zlib
+import struct
+from functools import lru_cache
+from dqmexplore.utils.pltutils import typed_array, bin_kwargs, aggregate_rows, MAX_ROWS
 
 
 def plotMEs1D_static(
@@ -10,6 +16,7 @@ def plotMEs1D_static(
     ls_filter=[],
     to_exclude=[],
     ref_data=None,
+    float32=True,
     show=False,
 ):
 
@@ -24,10 +31,15 @@ def plotMEs1D_static(
     # Integrate
     me_data.setExcluded(to_exclude)
     me_data.integrateData(norm=True)
-    ref_data.integrate(norm=True)
+    if ref_data is not None:
+        ref_data.integrateData(norm=True)
 
     fig = create_plot_static(
-        me_data, fig_title=fig_title, ref_data=ref_data, ax_labels=ax_labels
+        me_data,
+        fig_title=fig_title,
+        ref_data=ref_data,
+        ax_labels=ax_labels,
+        float32=float32,
     )
 
     if show:
@@ -35,7 +47,13 @@ def plotMEs1D_static(
     return fig
 
 
-def create_plot_static(me_data, fig_title="", ref_data=None, ax_labels=None):
+def create_plot_static(
+    me_data, fig_title="", ref_data=None, ax_labels=None, float32=True
+):
+    """
+    Creates a plotly figure of the integrated MEs. Data is embedded as typed arrays,
+    downcast to float32 if float32 is set (see utils.pltutils).
+    """
     mes = me_data.getMENames()
 
     num_mes = len(me_data)
@@ -53,16 +71,14 @@ def create_plot_static(me_data, fig_title="", ref_data=None, ax_labels=None):
     for i, me in enumerate(mes):
         row = (i // 2) + 1
         col = (i % 2) + 1
-        if me_data.getDims() == 1:
-            trace = go.Bar()
-            trace.x = me_data.getBins(me, dim="x")
-            trace.y = me_data.getData(me, data_type="integral")
+        data = typed_array(me_data.getData(me, data_type="integral"), float32=float32)
+        x_kwargs = bin_kwargs(me_data.getBins(me, dim="x"), "x", float32=float32)
+        if me_data.getDims(me) == 1:
+            trace = go.Bar(**x_kwargs, y=data)
             trace.name = me
-        elif me_data.getDims() == 2:
-            trace = go.Heatmap()
-            trace.x = me_data.getBins(me, dim="x")
-            trace.y = me_data.getBins(me, dim="y")
-            trace.z = me_data.getData(me, data_type="integral")
+        elif me_data.getDims(me) == 2:
+            y_kwargs = bin_kwargs(me_data.getBins(me, dim="y"), "y", float32=float32)
+            trace = go.Heatmap(**x_kwargs, **y_kwargs, z=data)
             trace.name = me
         fig.add_trace(trace, row=row, col=col)
 
@@ -82,26 +98,31 @@ def create_plot_static(me_data, fig_title="", ref_data=None, ax_labels=None):
 
         if me_data.getDims(me) == 1:
             ref_max = (
-                0 if ref_data is None else ref_data.getData(me, type="integral").max()
+                0
+                if ref_data is None
+                else ref_data.getData(me, data_type="integral").max()
             )
 
-            max_data = max([me_data.getData(me, type="integral").max(), ref_max]) + (
-                0.01 if me_data.getData(me, type="integral").max() < 1 else 10
-            )
+            max_data = max(
+                [me_data.getData(me, data_type="integral").max(), ref_max]
+            ) + (0.01 if me_data.getData(me, data_type="integral").max() < 1 else 10)
             fig.update_yaxes(range=[0, max_data], row=row, col=col)
 
-        if me_data.getDims(me) == 1:
-            fig.update_traces(showscale=False)
+        if me_data.getDims(me) == 2:
+            fig.update_traces(showscale=False, selector=dict(type="heatmap"))
 
         if ax_labels is not None:
             fig.update_xaxes(title_text=ax_labels[i]["x"], row=row, col=col)
             fig.update_yaxes(title_text=ax_labels[i]["y"], row=row, col=col)
 
         if ref_data is not None:
-            trace_ref = go.Scatter()
+            trace_ref = go.Scatter(
+                **bin_kwargs(ref_data.getBins(me, dim="x"), float32=float32),
+                y=typed_array(
+                    ref_data.getData(me, data_type="integral"), float32=float32
+                ),
+            )
             trace_ref.name = me + "-Reference"
-            trace_ref.x = ref_data.getBins(me, dim="x")
-            trace_ref.y = ref_data.getData(me, type="integral")
             trace_ref.opacity = 0.6
             trace_ref.line = dict(shape="hvh")
             fig.add_trace(trace_ref, row=row, col=col)
@@ -152,7 +173,13 @@ def plotheatmaps1D(
 
 
 def create_heatmap(me_data, plots_config: dict, fig_config: dict = {}) -> go.Figure:
-    """Create a heatmap figure from the given ME data."""
+    """
+    Create a heatmap figure from the given ME data. Data is embedded as typed arrays,
+    downcast to float32 unless fig_config sets "float32" to false.
+    LS rows are aggregated into at most fig_config["max_rows"] display rows by
+    summing blocks of consecutive LSs ("lod_agg": "max" in fig_config or in the ME
+    config takes the block max instead). Set "full_resolution" to draw every LS.
+    """
     mes = list(plots_config.keys())
     num_mes = len(mes)
     num_rows = (num_mes + 1) // 2
@@ -173,15 +200,29 @@ def create_heatmap(me_data, plots_config: dict, fig_config: dict = {}) -> go.Fig
     )
 
     # Adding heatmap trace to figure
+    float32 = fig_config.get("float32", True)
+    max_rows = (
+        np.inf
+        if fig_config.get("full_resolution")
+        else fig_config.get("max_rows", MAX_ROWS)
+    )
     for i, me in enumerate(mes):
         row = (i // 2) + 1
         col = (i % 2) + 1
         config = plots_config[me]
         to_plot = config.get("norm", None)
+        data, block = aggregate_rows(
+            me_data.getData(me, data_type=to_plot),
+            max_rows=max_rows,
+            how=config.get("lod_agg", fig_config.get("lod_agg", "sum")),
+        )
+        # Aggregated rows are drawn centred on the LS positions they merge
+        lod_kwargs = {} if block == 1 else {"y0": (block - 1) / 2, "dy": block}
         fig.add_trace(
             go.Heatmap(
-                z=me_data.getData(me, data_type=to_plot),
-                x=me_data.getBins(me, dim="x"),
+                z=typed_array(data, float32=float32),
+                **bin_kwargs(me_data.getBins(me, dim="x"), "x", float32=float32),
+                **lod_kwargs,
                 showscale=False,
             ),
             row=row,
@@ -213,3 +254,135 @@ def create_heatmap(me_data, plots_config: dict, fig_config: dict = {}) -> go.Fig
     fig.update_yaxes(autorange="reversed")
 
     return fig
+
+
+NUM_LEVELS = 255  # Colormap levels of raster images, index 255 is for NaNs
+
+
+@lru_cache(maxsize=32)
+def _named_lut(palette: str) -> np.ndarray:
+    return _colorscale_lut(plotly.colors.get_colorscale(palette))
+
+
+def _colorscale_lut(colorscale) -> np.ndarray:
+    """Samples a plotly colorscale into a (NUM_LEVELS, 3) uint8 lookup table."""
+    colors = plotly.colors.sample_colorscale(
+        colorscale, np.linspace(0, 1, NUM_LEVELS), colortype="tuple"
+    )
+    return np.round(np.array(colors) * 255).astype(np.uint8)
+
+
+def create_raster(
+    data,
+    log: bool = False,
+    zmin: float | None = None,
+    zmax: float | None = None,
+    palette: str | list = "Viridis",
+    nan_color: tuple = (255, 255, 255),
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Maps a 2D array to a palette image with numpy only. Returns the colour index
+    of every cell (uint8) and the (256, 3) RGB palette, built from a plotly
+    colorscale (name or [[position, color], ...]) plus nan_color at index 255.
+    Values are clipped to [zmin, zmax] (data min and max by default). With log,
+    values are mapped on a log10 scale and non-positive values are drawn as NaNs.
+    """
+    data = np.ma.filled(np.ma.asarray(data, dtype=np.float32), np.nan)
+    if log:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            data = np.log10(data)  # -inf/NaN for non-positive values
+        data[np.isneginf(data)] = np.nan
+        zmin = None if zmin is None else np.log10(zmin)
+        zmax = None if zmax is None else np.log10(zmax)
+
+    invalid = np.isnan(data)
+    if zmin is None:
+        zmin = np.nanmin(data) if not invalid.all() else 0
+    if zmax is None:
+        zmax = np.nanmax(data) if not invalid.all() else 1
+    span = zmax - zmin if zmax > zmin else 1
+
+    idxs = data - np.float32(zmin)
+    idxs *= np.float32((NUM_LEVELS - 1) / span)
+    np.clip(idxs, 0, NUM_LEVELS - 1, out=idxs)
+    idxs[invalid] = NUM_LEVELS
+    lut = _named_lut(palette) if isinstance(palette, str) else _colorscale_lut(palette)
+    return idxs.astype(np.uint8), np.vstack([lut, np.array(nan_color, dtype=np.uint8)])
+
+
+def write_png(
+    image: np.ndarray,
+    fname: str,
+    palette: np.ndarray | None = None,
+    text: dict = {},
+    compress_level: int = 1,
+):
+    """
+    Writes an image to a PNG file using zlib only: an RGB (rows x columns x 3)
+    uint8 image, or a uint8 index image with its (<= 256, 3) RGB palette. Entries
+    of text are stored as PNG tEXt chunks (e.g. ME name and axis ranges).
+    compress_level 0 skips compression, the slowest part of writing.
+    """
+
+    def chunk(tag: bytes, payload: bytes) -> bytes:
+        return (
+            struct.pack(">I", len(payload))
+            + tag
+            + payload
+            + struct.pack(">I", zlib.crc32(tag + payload))
+        )
+
+    height, width = image.shape[:2]
+    color_type = 2 if palette is None else 3  # Truecolor or indexed
+    # Every scanline starts with filter type 0 (none)
+    scanlines = np.zeros((height, image[0].size + 1), dtype=np.uint8)
+    scanlines[:, 1:] = image.reshape(height, -1)
+    with open(fname, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(
+            chunk(
+                b"IHDR", struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0)
+            )
+        )
+        if palette is not None:
+            f.write(chunk(b"PLTE", np.asarray(palette, dtype=np.uint8).tobytes()))
+        for key, val in text.items():
+            f.write(chunk(b"tEXt", f"{key}\0{val}".encode("latin-1", "replace")))
+        f.write(chunk(b"IDAT", zlib.compress(scanlines.tobytes(), compress_level)))
+        f.write(chunk(b"IEND", b""))
+
+
+def plotraster(
+    me_data,
+    me: str,
+    fname: str,
+    data_type: str | None = None,
+    log: bool = False,
+    zmin: float | None = None,
+    zmax: float | None = None,
+    palette: str | list = "Viridis",
+    scale: int = 1,
+    compress_level: int = 1,
+) -> np.ndarray:
+    """
+    Fast raster alternative to create_heatmap for bulk thumbnails. Writes a PNG of
+    an ME without going through plotly: for 1D MEs the LS x bin map (first LS on
+    top), for 2D MEs the LS-summed histogram (y increasing upwards). Each cell
+    is scale x scale pixels. The ME name and axis ranges are stored as PNG text.
+    Returns the index image (see create_raster).
+    """
+    data = me_data.getData(me, data_type=data_type)
+    x_bins = me_data.getBins(me, dim="x")
+    text = {"Title": me, "x": f"{x_bins[0]:g} to {x_bins[-1]:g}"}
+    if me_data.getDims(me) == 1:
+        text["y"] = f"LS 1 to {len(data)}"
+    else:
+        data = data.sum(axis=0)[::-1]
+        y_bins = me_data.getBins(me, dim="y")
+        text["y"] = f"{y_bins[0]:g} to {y_bins[-1]:g}"
+
+    image, palette = create_raster(data, log=log, zmin=zmin, zmax=zmax, palette=palette)
+    if scale > 1:
+        image = image.repeat(scale, axis=0).repeat(scale, axis=1)
+    write_png(image, fname, palette=palette, text=text, compress_level=compress_level)
+    return image
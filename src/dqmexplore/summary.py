@@ -0,0 +1,233 @@
+import numpy as np
+import pandas as pd
+import os
+import copy
+from dqmexplore.trends import compute_stats
+
+SUMMARY_STATS = ["entries", "mean", "stdev", "mpv", "max"]
+
+
+class SummaryStore:
+    """
+    Per-run summary store for era-wide trend queries.
+    For every ME it keeps, per run, the run-integrated histogram, the number of
+    entries and the trend statistics of the integrated histogram (computed as in
+    trends.compute_trends). Each array is stored as its own .npy file in one
+    directory per ME and memory-mapped on first access, so queries only read the
+    arrays (and rows) they use, e.g. trends never read the integrals.
+    For 2D MEs the statistics are those of the projection on the x axis.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._loaded = {}
+
+    def _meDir(self, me: str) -> str:
+        return os.path.join(self.directory, me.replace("/", "__"))
+
+    def getMENames(self) -> list:
+        return sorted(
+            dname.replace("__", "/")
+            for dname in os.listdir(self.directory)
+            if os.path.exists(os.path.join(self.directory, dname, "runs.npy"))
+        )
+
+    def _get(self, me: str, key: str) -> np.ndarray | None:
+        """Stored array of an ME, memory-mapped on first access, or None."""
+        loaded = self._loaded.setdefault(me, {})
+        if key not in loaded:
+            path = os.path.join(self._meDir(me), key + ".npy")
+            if not os.path.exists(path):
+                return None
+            loaded[key] = np.load(path, mmap_mode="r")
+        return loaded[key]
+
+    def _keys(self, me: str) -> list:
+        return [
+            fname[: -len(".npy")]
+            for fname in os.listdir(self._meDir(me))
+            if fname.endswith(".npy") and not fname.endswith(".tmp.npy")
+        ]
+
+    def _save(self, me: str, summary: dict) -> None:
+        """Writes the arrays of an ME, replacing the run numbers last."""
+        me_dir = self._meDir(me)
+        os.makedirs(me_dir, exist_ok=True)
+        for key in sorted(summary, key=lambda key: key == "runs"):
+            tmp_path = os.path.join(me_dir, key + ".tmp.npy")
+            np.save(tmp_path, summary[key])
+            os.replace(tmp_path, os.path.join(me_dir, key + ".npy"))
+        self._loaded[me] = dict(summary)
+
+    def _runSummary(self, medata, me: str, excluded: list) -> dict:
+        """Integral, entries and statistics of an ME over the LSs not excluded."""
+        keep = ~np.isin(medata.getLSNumbers(me), excluded)
+        integral = medata.getData(me)[keep].sum(axis=0)
+        x_bins = medata.getBins(me, dim="x")
+        projection = integral if medata.getDims(me) == 1 else integral.sum(axis=0)
+        run_summary = {
+            key: val[0]
+            for key, val in compute_stats(projection[np.newaxis], x_bins).items()
+            if key in SUMMARY_STATS
+        }
+        run_summary["entries"] = medata.getEntries(me)[keep].sum()
+        run_summary["integral"] = integral
+        return run_summary
+
+    def _checkBinning(self, medata, me: str, runnb: int, bins: dict) -> None:
+        """Raises a ValueError if the binning of an ME differs from bins."""
+        for dim in ["x", "y"]:
+            key = f"{dim}_bins"
+            me_bins = (
+                medata.getBins(me, dim=dim)
+                if dim == "x" or medata.getDims(me) == 2
+                else None
+            )
+            if (me_bins is None) != (key not in bins) or (
+                me_bins is not None
+                and (
+                    bins[key].shape != me_bins.shape
+                    or not np.allclose(bins[key], me_bins)
+                )
+            ):
+                raise ValueError(
+                    f"Binning of {me} in run {runnb} differs from the stored binning."
+                )
+
+    def addRun(self, medata, runnb: int | None = None, mes=None, exclude=[]) -> None:
+        """
+        Adds the per-run summary of an MEData object to the store, replacing the run
+        if it was already stored. The raw data and entries of all LSs but those in
+        exclude (see MEData.setExcluded) are integrated; medata is not modified.
+        Raises a ValueError if the binning differs from the stored binning.
+        Every call rewrites the stored arrays of the MEs, use addRuns to add many
+        runs at once.
+        """
+        self.addRuns(
+            [medata],
+            runnbs=None if runnb is None else [runnb],
+            mes=mes,
+            exclude=exclude,
+        )
+
+    def addRuns(self, medatas: list, runnbs=None, mes=None, exclude=[]) -> None:
+        """
+        Adds the per-run summaries of several MEData objects (see addRun), writing
+        the arrays of each ME once. runnbs defaults to the run numbers of the
+        MEData objects, mes to the MEs of the first one. exclude applies to all.
+        Runs given more than once keep their last summary.
+        """
+        if runnbs is None:
+            runnbs = [medata.runnb for medata in medatas]
+        if any(runnb is None for runnb in runnbs):
+            raise ValueError("Run number of an MEData object unknown. Pass runnbs.")
+        if len(runnbs) != len(medatas):
+            raise ValueError("runnbs and medatas must have the same length.")
+        if not medatas:
+            return
+        if mes is None:
+            mes = medatas[0].getMENames()
+
+        # Parsing the excluded LSs on shallow copies, leaving the MEData untouched
+        excluded = []
+        for medata in medatas:
+            medata = copy.copy(medata)
+            medata.setExcluded(exclude)
+            excluded.append(medata.getExcluded())
+
+        for me in mes:
+            bins = {}
+            if self._get(me, "runs") is not None:
+                bins = {key: self._get(me, key) for key in ["x_bins", "y_bins"]}
+                bins = {key: val for key, val in bins.items() if val is not None}
+            else:
+                bins["x_bins"] = medatas[0].getBins(me, dim="x")
+                if medatas[0].getDims(me) == 2:
+                    bins["y_bins"] = medatas[0].getBins(me, dim="y")
+            new = {key: [] for key in ["runs", "integral"] + SUMMARY_STATS}
+            for medata, runnb, run_excluded in zip(medatas, runnbs, excluded):
+                self._checkBinning(medata, me, runnb, bins)
+                run_summary = self._runSummary(medata, me, run_excluded)
+                new["runs"].append(runnb)
+                for key in ["integral"] + SUMMARY_STATS:
+                    new[key].append(run_summary[key])
+            new = {
+                key: np.asarray(val, dtype=np.int64 if key == "runs" else float)
+                for key, val in new.items()
+            }
+
+            # Last summary of each run, merged with the stored runs not replaced
+            new_runs = new["runs"]
+            last = len(new_runs) - 1 - np.unique(new_runs[::-1], return_index=True)[1]
+            new = {key: val[last] for key, val in new.items()}
+            old_runs = self._get(me, "runs")
+            summary = dict(bins)
+            if old_runs is None:
+                summary.update(new)
+            else:
+                kept = ~np.isin(old_runs, new["runs"])
+                runs = np.concatenate([old_runs[kept], new["runs"]])
+                order = np.argsort(runs, kind="stable")
+                for key in ["runs", "integral"] + SUMMARY_STATS:
+                    old = np.asarray(self._get(me, key))[kept]
+                    summary[key] = np.concatenate([old, new[key]])[order]
+            self._save(me, summary)
+
+    def getRuns(self, me: str) -> np.ndarray:
+        runs = self._get(me, "runs")
+        return np.array([], dtype=np.int64) if runs is None else runs
+
+    def getSummary(
+        self, me: str, run_range: list | None = None, keys: list | None = None
+    ) -> dict:
+        """
+        Returns the stored arrays of an ME (runs, integral, bins and statistics, or
+        only the given keys), optionally restricted to runs in
+        [run_range[0], run_range[1]]. Arrays are read-only memory maps.
+        """
+        runs = self._get(me, "runs")
+        if runs is None:
+            raise KeyError(f"No summary stored for {me}.")
+        keys = self._keys(me) if keys is None else keys
+        summary = {key: self._get(me, key) for key in keys}
+        if run_range is None:
+            return summary
+        lo = np.searchsorted(runs, min(run_range), side="left")
+        hi = np.searchsorted(runs, max(run_range), side="right")
+        return {
+            key: (val if "bins" in key else val[lo:hi]) for key, val in summary.items()
+        }
+
+    def getTrends(self, me: str, run_range: list | None = None) -> pd.DataFrame:
+        """Returns the per-run statistics of an ME as a DataFrame indexed by run."""
+        summary = self.getSummary(me, run_range, keys=["runs"] + SUMMARY_STATS)
+        return pd.DataFrame(
+            {stat: summary[stat] for stat in SUMMARY_STATS},
+            index=pd.Index(summary["runs"], name="runnb"),
+        )
+
+    def plotTrend(
+        self,
+        me: str,
+        stat: str = "mean",
+        run_range: list | None = None,
+        fig_title: str = "",
+        ylabel: str = "",
+        show: bool = False,
+    ):
+        trends = self.getTrends(me, run_range)
+        import plotly.graph_objects as go  # Deferred, only needed for plotting
+
+        fig = go.Figure()
+        fig.add_trace(
+            go.Scatter(x=trends.index, y=trends[stat], mode="lines+markers", name=stat)
+        )
+        fig.update_layout(
+            title=fig_title if fig_title else f"{me} ({stat})",
+            xaxis_title="Run",
+            yaxis_title=ylabel if ylabel else stat,
+        )
+        if show:
+            fig.show()
+        return fig
@@ -0,0 +1,291 @@
+import json
+import numpy as np
+import plotly.io as pio
+import plotly.graph_objects as go
+from dqmexplore.interplt import (
+    create_plot,
+    normalize_data,
+    add_missing_keys,
+    compute_range,
+)
+from dqmexplore.staticplt import create_heatmap, create_plot_static
+from dqmexplore.utils.pltutils import typed_array, aggregate_rows, MAX_ROWS
+
+TEMPLATE_KINDS = ["interactive", "heatmap", "static"]
+
+
+class FigureTemplate:
+    """
+    Figure compiled once from plots and figure configs and filled with the data of
+    each new run. The layout (subplots, axes, slider) and the trace skeletons are
+    built by the usual figure builder (interplt.create_plot for "interactive",
+    staticplt.create_heatmap for "heatmap" and staticplt.create_plot_static for
+    "static") on the first run, then only the trace data, frames and data-dependent
+    axis ranges are replaced. The first figure filled after compiling is validated
+    by plotly (including its first frame, as all frames share its structure);
+    later figures are plain figure dicts written without re-validation (see
+    write_html). The template is recompiled if the MEs or their binning change.
+    """
+
+    def __init__(
+        self,
+        plots_config: dict | str,
+        figure_config: dict | str = {},
+        kind: str = "interactive",
+    ) -> None:
+        if kind not in TEMPLATE_KINDS:
+            raise ValueError(f"Invalid kind {kind}. Must be one of {TEMPLATE_KINDS}.")
+        if isinstance(plots_config, str):
+            with open(plots_config, "r") as f:
+                plots_config = json.load(f)
+        if isinstance(figure_config, str):
+            with open(figure_config, "r") as f:
+                figure_config = json.load(f)
+        if kind == "interactive":
+            if figure_config.get("slider_mode", "frames") != "frames":
+                raise ValueError("Figure templates require slider_mode 'frames'.")
+            add_missing_keys(plots_config)
+
+        self.kind = kind
+        self.plots_config = plots_config
+        self.figure_config = figure_config
+        self.float32 = figure_config.get("float32", True)
+        self._signature = None
+        self._layout = None
+        self._traces = None
+        self._steps = []
+        self._validated = False
+
+    def _getSignature(self, me_data, ref_data=None) -> tuple:
+        """MEs, dimensions and binning the compiled layout depends on."""
+        mes = (
+            list(self.plots_config.keys())
+            if self.kind == "heatmap"
+            else me_data.getMENames()
+        )
+        signature = []
+        for data in [me_data, ref_data]:
+            if data is None:
+                signature.append(None)
+                continue
+            signature.append(
+                tuple(
+                    (me, data.getDims(me))
+                    + tuple(
+                        data.getBins(me, dim=dim).tobytes()
+                        for dim in ["x", "y"][: data.getDims(me)]
+                    )
+                    for me in mes
+                )
+            )
+        return tuple(signature)
+
+    def compile(self, me_data, ref_data=None) -> None:
+        """Builds the layout and trace skeletons from the (prepared) data of a run."""
+        if self.kind == "interactive":
+            fig = create_plot(
+                me_data, self.figure_config, self.plots_config, ref_data=ref_data
+            )
+        elif self.kind == "heatmap":
+            fig = create_heatmap(me_data, self.plots_config, self.figure_config)
+        else:
+            fig = create_plot_static(
+                me_data,
+                fig_title=self.figure_config.get("figure_title", ""),
+                ref_data=ref_data,
+                ax_labels=self.figure_config.get("ax_labels"),
+                float32=self.float32,
+            )
+
+        fig_dict = fig.to_plotly_json()
+        self._layout = fig_dict["layout"]
+        # Trace skeletons without the per-run data
+        self._traces = []
+        for trace in fig_dict["data"]:
+            data_keys = ["z"] if trace["type"] == "heatmap" else ["y"]
+            if self.kind == "heatmap":
+                data_keys += ["y0", "dy"]  # Set by the LS row aggregation
+            self._traces.append(
+                {key: val for key, val in trace.items() if key not in data_keys}
+            )
+        if self.kind == "interactive":
+            self._steps = self._layout["sliders"][0]["steps"]
+        self._signature = self._getSignature(me_data, ref_data)
+        self._validated = False
+
+    def _getSteps(self, num_lss: int) -> list:
+        """Slider steps of the first num_lss LSs, only ever built once."""
+        if len(self._steps) < num_lss:
+            self._steps = self._steps + [
+                {
+                    "method": "animate",
+                    "args": [
+                        [str(ls + 1)],
+                        {
+                            "mode": "immediate",
+                            "frame": {"duration": 0, "redraw": True},
+                            "transition": {"duration": 0},
+                        },
+                    ],
+                    "label": f"{ls+1}",
+                }
+                for ls in range(len(self._steps), num_lss)
+            ]
+        return self._steps[:num_lss]
+
+    def fill(
+        self,
+        me_data,
+        ref_data=None,
+        trigger_rates=None,
+        title: str | None = None,
+        exclude=[],
+    ) -> dict:
+        """
+        Prepares the data of a run as the corresponding plotting function would
+        (normalization, reference/run integration) and returns the figure dict of
+        the template filled with it. title replaces the figure title.
+        exclude are LSs left out of the integration of "static" figures.
+        """
+        if self.kind == "static":
+            me_data.setExcluded(exclude)
+            me_data.integrateData(norm=True)
+            if ref_data is not None:
+                ref_data.integrateData(norm=True)
+        else:
+            normalize_data(
+                me_data,
+                self.plots_config,
+                trigger_rates=trigger_rates,
+                ref_data=ref_data if self.kind == "interactive" else None,
+            )
+
+        if self._signature != self._getSignature(me_data, ref_data):
+            self.compile(me_data, ref_data)
+
+        layout = dict(self._layout)
+        if title is not None:
+            layout["title"] = {**layout.get("title", {}), "text": title}
+
+        if self.kind == "interactive":
+            traces, frames = self._fillInteractive(me_data, ref_data, layout)
+            fig_dict = {"data": traces, "layout": layout, "frames": frames}
+        elif self.kind == "heatmap":
+            fig_dict = {"data": self._fillHeatmap(me_data), "layout": layout}
+        else:
+            fig_dict = {
+                "data": self._fillStatic(me_data, ref_data, layout),
+                "layout": layout,
+            }
+        if not self._validated:
+            self._validate(fig_dict)
+        return fig_dict
+
+    def _validate(self, fig_dict: dict) -> None:
+        """
+        Validates a filled figure with plotly once per compiled template. Frames
+        only differ in their data, so only the first one is validated.
+        """
+        go.Figure({**fig_dict, "frames": fig_dict.get("frames", [])[:1]})
+        self._validated = True
+
+    def _setYRange(self, layout: dict, trace: dict, y_range) -> None:
+        axis = "yaxis" + trace.get("yaxis", "y")[1:]
+        layout[axis] = {**layout.get(axis, {}), "range": list(y_range)}
+
+    def _fillInteractive(self, me_data, ref_data, layout: dict):
+        mes = me_data.getMENames()
+        num_mes = len(mes)
+        num_lss = me_data.getNumLSs()
+        traces = [dict(trace) for trace in self._traces]
+
+        ls_data = []
+        for i, me in enumerate(mes):
+            config = self.plots_config.get(me, {})
+            data = me_data.getData(me, data_type=config.get("norm", None))
+            ls_data.append(typed_array(data, float32=self.float32))
+            data_key = "y" if me_data.getDims(me) == 1 else "z"
+            traces[i][data_key] = ls_data[i][0]
+            if me_data.getDims(me) == 1:
+                self._setYRange(
+                    layout, traces[i], compute_range(config, data.max(), axis="y")
+                )
+            if ref_data is not None:
+                traces[num_mes + i]["y"] = typed_array(
+                    ref_data.getData(me, data_type="integral"), float32=self.float32
+                )
+
+        data_keys = ["y" if me_data.getDims(me) == 1 else "z" for me in mes]
+        frames = [
+            {
+                "name": str(ls + 1),
+                "data": [
+                    {"type": traces[i]["type"], data_keys[i]: ls_data[i][ls]}
+                    for i in range(num_mes)
+                ],
+                "traces": list(range(num_mes)),
+            }
+            for ls in range(num_lss)
+        ]
+        layout["sliders"] = [
+            {**self._layout["sliders"][0], "steps": self._getSteps(num_lss)}
+        ]
+        return traces, frames
+
+    def _fillHeatmap(self, me_data) -> list:
+        max_rows = (
+            np.inf
+            if self.figure_config.get("full_resolution")
+            else self.figure_config.get("max_rows", MAX_ROWS)
+        )
+        traces = []
+        for trace, (me, config) in zip(self._traces, self.plots_config.items()):
+            data, block = aggregate_rows(
+                me_data.getData(me, data_type=config.get("norm", None)),
+                max_rows=max_rows,
+                how=config.get("lod_agg", self.figure_config.get("lod_agg", "sum")),
+            )
+            trace = dict(trace, z=typed_array(data, float32=self.float32))
+            if block > 1:
+                trace.update(y0=(block - 1) / 2, dy=block)
+            traces.append(trace)
+        return traces
+
+    def _fillStatic(self, me_data, ref_data, layout: dict) -> list:
+        mes = me_data.getMENames()
+        traces = [dict(trace) for trace in self._traces]
+        for i, me in enumerate(mes):
+            data = me_data.getData(me, data_type="integral")
+            data_key = "y" if me_data.getDims(me) == 1 else "z"
+            traces[i][data_key] = typed_array(data, float32=self.float32)
+            if me_data.getDims(me) != 1:
+                continue
+            ref_max = 0
+            if ref_data is not None:
+                ref_integral = ref_data.getData(me, data_type="integral")
+                traces[len(mes) + i]["y"] = typed_array(
+                    ref_integral, float32=self.float32
+                )
+                ref_max = ref_integral.max()
+            max_data = max([data.max(), ref_max]) + (0.01 if data.max() < 1 else 10)
+            self._setYRange(layout, traces[i], [0, max_data])
+        return traces
+
+    def getFigure(self, me_data, ref_data=None, **kwargs) -> go.Figure:
+        """Filled template as a (validated) plotly figure, e.g. for notebooks."""
+        return go.Figure(self.fill(me_data, ref_data=ref_data, **kwargs))
+
+    def write_html(
+        self, me_data, fname: str, ref_data=None, include_plotlyjs=True, **kwargs
+    ) -> None:
+        """
+        Fills the template and writes it to an HTML file without validating the
+        whole figure again (see fill). include_plotlyjs is passed to plotly.io.write_html (e.g. the path
+        of a shared plotly.min.js), other keyword arguments to fill.
+        """
+        pio.write_html(
+            self.fill(me_data, ref_data=ref_data, **kwargs),
+            fname,
+            include_plotlyjs=include_plotlyjs,
+            validate=False,
+        )
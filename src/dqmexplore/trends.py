@@ -1,23 +1,41 @@
-import plotly.graph_objects as go
 import numpy as np
 import pandas as pd
 from dqmexplore.utils.datautils import makeDF
+from dqmexplore.utils.pltutils import (
+    typed_array,
+    minmax_decimate,
+    MAX_POINTS,
+    WEBGL_THRESHOLD,
+)
 
 
-def compute_trends(medata, trigger_rates=None):
-    def compute_avg(histbins, x_bins):
-        weighted_sums = np.sum(histbins * x_bins, axis=1)
-        sum_of_weights = np.sum(histbins, axis=1)
-        x_avg = np.nan_to_num(weighted_sums / sum_of_weights, nan=0)
-        return x_avg
-
-    def compute_std(histbins, x_bins, x_avg):
-        sqrd_devs = np.sum(histbins * (x_bins - x_avg[:, np.newaxis]) ** 2, axis=1)
-        sum_of_weights = np.sum(histbins, axis=1)
-        variance = np.nan_to_num(sqrd_devs / sum_of_weights, nan=0)
-        std_dev = np.sqrt(variance)
-        return std_dev
+def compute_avg(histbins, x_bins):
+    weighted_sums = np.sum(histbins * x_bins, axis=1)
+    sum_of_weights = np.sum(histbins, axis=1)
+    x_avg = np.nan_to_num(weighted_sums / sum_of_weights, nan=0)
+    return x_avg
+
+
+def compute_std(histbins, x_bins, x_avg):
+    sqrd_devs = np.sum(histbins * (x_bins - x_avg[:, np.newaxis]) ** 2, axis=1)
+    sum_of_weights = np.sum(histbins, axis=1)
+    variance = np.nan_to_num(sqrd_devs / sum_of_weights, nan=0)
+    std_dev = np.sqrt(variance)
+    return std_dev
+
+
+def compute_stats(histbins, x_bins):
+    """Computes the trend statistics of each row of a (rows x bins) array of 1D histograms."""
+    stats = {}
+    stats["mean"] = compute_avg(histbins, x_bins)  # e.g. mean charge
+    stats["stdev"] = compute_std(histbins, x_bins, stats["mean"])  # e.g. std of charge
+    stats["mpv"] = x_bins[np.argmax(histbins, axis=1)]  # e.g. mpv charge
+    stats["max"] = np.max(histbins, axis=1)
+    stats["std_err_on_mean"] = stats["stdev"] / np.sqrt(histbins.shape[1])
+    return stats
 
+
+def compute_trends(medata, trigger_rates=None):
     if trigger_rates is not None:
         to_analyze = "trignorm"
         medata.normData(trigger_rate=trigger_rates)
@@ -27,16 +45,9 @@ def compute_trends(medata, trigger_rates=None):
     trends = {}
 
     for me in medata.getMENames():
-        trends[me] = {}
-        histbins = medata.getData(me, type=to_analyze)
+        histbins = medata.getData(me, data_type=to_analyze)
         x_bins = medata.getBins(me, dim="x")
-        trends[me]["mean"] = compute_avg(histbins, x_bins)  # e.g. mean charge
-        trends[me]["stdev"] = compute_std(
-            histbins, x_bins, trends[me]["mean"]
-        )  # e.g. std of charge
-        trends[me]["mpv"] = x_bins[np.argmax(histbins, axis=1)]  # e.g. mpv charge
-        trends[me]["max"] = np.max(histbins, axis=1)
-        trends[me]["std_err_on_mean"] = trends[me]["stdev"] / np.sqrt(histbins.shape[1])
+        trends[me] = compute_stats(histbins, x_bins)
         trends[me]["empty_lss"] = np.array(medata.getEmptyLSs(me))
 
     return trends
@@ -50,14 +61,27 @@ def plot_trends(
     ylabels=[],
     norm=False,
     log=False,
+    float32=True,
+    max_points=MAX_POINTS,
+    webgl_threshold=WEBGL_THRESHOLD,
+    full_resolution=False,
     show=False,
 ):
+    """
+    Plots the per-LS trends of an ME with a dropdown to select the statistic.
+    Trends are embedded as typed arrays, downcast to float32 if float32 is set.
+    Lines longer than max_points are decimated keeping the min and max of each
+    block of LSs, unless full_resolution is set. Lines with more than
+    webgl_threshold points are drawn with WebGL (Scattergl).
+    """
     to_plot = np.array(to_plot)
 
     if norm:
         for trend in to_plot:
             trends[me][trend] = trends[me][trend] / np.sum(trends[me][trend])
 
+    import plotly.graph_objects as go  # Deferred, compute_* do not need plotly
+
     fig = go.Figure()
 
     buttons = []
@@ -71,9 +95,23 @@ def plot_trends(
                 fig.update_layout(yaxis={"title": ylabel})
             else:
                 visible = False
-            trace = go.Scatter()
-            trace.y = trends[me][stat]
-            trace.x = np.arange(len(trends[me][stat])) + 1
+            if full_resolution or len(trends[me][stat]) <= max_points:
+                # LSs start at 1 with unit steps, no x array needed
+                xy_kwargs = {
+                    "y": typed_array(trends[me][stat], float32=float32),
+                    "x0": 1,
+                    "dx": 1,
+                }
+            else:
+                idxs, values = minmax_decimate(trends[me][stat], max_points)
+                xy_kwargs = {
+                    "x": typed_array(idxs + 1),
+                    "y": typed_array(values, float32=float32),
+                }
+            scatter = (
+                go.Scattergl if len(xy_kwargs["y"]) > webgl_threshold else go.Scatter
+            )
+            trace = scatter(**xy_kwargs)
             trace.mode = "lines+markers"
             trace.visible = visible
             fig.add_trace(trace)
@@ -1,2 +1,18 @@
-import dqmexplore.utils.datautils
-import dqmexplore.utils.setupdials
+import importlib
+
+# Submodules are imported on first access, see dqmexplore/__init__.py
+_submodules = ["datautils", "setupdials", "pltutils"]
+
+__all__ = _submodules
+
+
+def __getattr__(name):
+    if name in _submodules:
+        module = importlib.import_module(f"{__name__}.{name}")
+        globals()[name] = module
+        return module
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + _submodules)
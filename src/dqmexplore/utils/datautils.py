@@ -2,13 +2,16 @@ import pandas as pd
 import numpy as np
 import os
 import json
-import requests
-from cmsdials.filters import (
-    LumisectionHistogram1DFilters,
-    LumisectionHistogram2DFilters,
-)
+import shutil
+import tempfile
+from array import array
 from dqmexplore.me_ids import meIDs1D, meIDs2D
 
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
 
 def generate_me_dict(me_df):
     """
@@ -94,6 +97,36 @@ def trig_normalize(data_dict, trigger_rates: np.ndarray) -> np.ndarray:
     return data_dict
 
 
+def align_lss(target_lss, src_lss, values) -> np.ma.MaskedArray:
+    """
+    Joins per-LS values onto the target LS numbers using searchsorted.
+    LSs missing from the source are masked. For duplicated source LSs the first
+    occurrence is kept.
+    """
+    target_lss = np.asarray(target_lss)
+    src_lss = np.asarray(src_lss)
+    values = np.asarray(values, dtype=float)
+    if len(src_lss) != len(values):
+        raise ValueError("LS numbers and values must have the same length.")
+
+    order = np.argsort(src_lss, kind="stable")
+    src_lss = src_lss[order]
+    values = values[order]
+    is_first = np.ones(len(src_lss), dtype=bool)
+    is_first[1:] = src_lss[1:] != src_lss[:-1]
+    src_lss = src_lss[is_first]
+    values = values[is_first]
+
+    if len(src_lss) == 0:
+        return np.ma.masked_all(len(target_lss), dtype=float)
+
+    idxs = np.searchsorted(src_lss, target_lss)
+    idxs_clipped = np.minimum(idxs, len(src_lss) - 1)
+    found = (idxs < len(src_lss)) & (src_lss[idxs_clipped] == target_lss)
+    aligned = np.where(found, values[idxs_clipped], 0.0)
+    return np.ma.masked_array(aligned, mask=~found | np.isnan(aligned))
+
+
 def makeDF(data):
     datadict = data["data"][0]["attributes"]
     keys = datadict.keys()
@@ -126,23 +159,362 @@ def print_availMEs(dials, dims=None, contains=""):
         print(me)
 
 
-def loadJSONasDF(JSONFilePath):
+class _ColumnBuilder:
+    """
+    Accumulates the values of one column into a typed buffer as records are read:
+    ints, floats and bools into arrays, strings into codes of a dictionary of
+    distinct strings, and missing values into a mask. Columns with mixed or
+    nested values fall back to a list of Python objects.
+    """
+
+    def __init__(self, num_missing=0):
+        self.kind = None
+        self.values = None
+        self.mask = bytearray(b"\x01" * num_missing)
+        self.categories = {}
+        self.num_missing = num_missing
+
+    def _start(self, value):
+        if isinstance(value, bool):
+            self.kind, self.values = "bool", array("b")
+        elif isinstance(value, int):
+            self.kind, self.values = "int", array("q")
+        elif isinstance(value, float):
+            self.kind, self.values = "float", array("d")
+        elif isinstance(value, str):
+            self.kind, self.values = "str", array("l")
+        else:
+            self.kind, self.values = "object", []
+        filler = None if self.kind == "object" else 0
+        self.values.extend([filler] * self.num_missing)
+
+    def append(self, value):
+        if value is None:
+            if self.kind is None:
+                self.mask.append(1)
+                self.num_missing += 1
+                return
+            self.mask.append(1)
+            self.values.append(None if self.kind == "object" else 0)
+            return
+        if self.kind is None:
+            self._start(value)
+        elif self.kind == "int" and isinstance(value, float):
+            self.kind, self.values = "float", array("d", self.values)
+        elif self.kind != "object" and (
+            (self.kind == "bool") != isinstance(value, bool)
+            or (self.kind == "str") != isinstance(value, str)
+            or not isinstance(value, (int, float, str))
+        ):
+            self._toObjects()
+
+        self.mask.append(0)
+        if self.kind == "str":
+            self.values.append(self.categories.setdefault(value, len(self.categories)))
+        else:
+            self.values.append(value)
+
+    def _toObjects(self):
+        values = self.finish()
+        self.kind = "object"
+        self.values = list(values.astype(object).where(values.notna(), None))
+
+    def finish(self) -> pd.Series:
+        mask = np.frombuffer(bytes(self.mask), dtype=bool)
+        if self.kind is None:
+            return pd.Series([None] * len(mask), dtype=object)
+        if self.kind == "object":
+            return pd.Series(self.values, dtype=object)
+        if self.kind == "str":
+            codes = np.where(mask, -1, np.asarray(self.values, dtype=np.int64))
+            return pd.Series(
+                pd.Categorical.from_codes(codes, categories=list(self.categories))
+            ).astype("string")
+        values = np.asarray(
+            self.values, dtype={"bool": bool, "int": np.int64}.get(self.kind, float)
+        )
+        if self.kind == "float":
+            return pd.Series(pd.arrays.FloatingArray(values, mask))
+        if self.kind == "int":
+            return pd.Series(pd.arrays.IntegerArray(values, mask))
+        return pd.Series(pd.arrays.BooleanArray(values, mask))
+
+
+def _recordsToDF(records) -> pd.DataFrame:
+    """Builds a DataFrame column by column from an iterable of flat dict records."""
+    builders = {}
+    num_rows = 0
+    for record in records:
+        for key, value in record.items():
+            if key not in builders:
+                builders[key] = _ColumnBuilder(num_missing=num_rows)
+            builders[key].append(value)
+        num_rows += 1
+        if len(record) != len(builders):
+            for key, builder in builders.items():
+                if key not in record:
+                    builder.append(None)
+    return pd.DataFrame({key: builder.finish() for key, builder in builders.items()})
+
+
+def _jsonTopLevel(JSONFilePath) -> str:
+    with open(JSONFilePath, "rb") as f:
+        while True:
+            char = f.read(1)
+            if not char or not char.isspace():
+                return char.decode()
+
+
+# Files at least this large are streamed by default
+STREAM_MIN_BYTES = 32 * 1024**2
+
+
+def _useStreaming(JSONFilePath, stream=None) -> bool:
+    """
+    Whether to parse a JSON file incrementally with ijson. By default files of at
+    least STREAM_MIN_BYTES are streamed (if ijson is installed): json.load holds
+    the whole parsed document in memory, several times the size of the file, while
+    smaller files are parsed faster by json.load at a small memory cost.
+    """
+    if stream is None:
+        return ijson is not None and os.path.getsize(JSONFilePath) >= STREAM_MIN_BYTES
+    if stream and ijson is None:
+        raise ImportError(
+            "Streaming JSON requires ijson. Install it with: pip install 'dqmexplore[streaming]'"
+        )
+    return stream
+
+
+def iterJSONItems(JSONFilePath, stream=None):
+    """
+    Iterates over the (key, value) pairs of a top-level JSON object, parsed with
+    json.load or, if streaming (see _useStreaming), incrementally with ijson.
+    """
+    if not _useStreaming(JSONFilePath, stream):
+        with open(JSONFilePath) as f:
+            yield from json.load(f).items()
+        return
+    with open(JSONFilePath, "rb") as f:
+        yield from ijson.kvitems(f, "", use_float=True)
+
+
+def _iterJSONRecords(JSONFilePath, stream=None):
+    """
+    Iterates over the records of a JSON file: the items of a top-level list, or
+    the keys and values of a top-level object as records {0: key, 1: value}.
+    """
+    if _jsonTopLevel(JSONFilePath) != "[":
+        for key, value in iterJSONItems(JSONFilePath, stream=stream):
+            yield {0: key, 1: value}
+    elif _useStreaming(JSONFilePath, stream):
+        with open(JSONFilePath, "rb") as f:
+            yield from ijson.items(f, "item", use_float=True)
+    else:
+        with open(JSONFilePath) as f:
+            yield from json.load(f)
+
+
+def streamJSONasDF(JSONFilePath) -> pd.DataFrame:
+    """
+    Loads a JSON file with ijson, converting records into typed columns as they
+    are read rather than building the whole Python object tree first. A top-level
+    list of records gives one column per key; a top-level object gives its keys and
+    values as columns 0 and 1, like loadJSONasDF.
+    """
+    return _recordsToDF(_iterJSONRecords(JSONFilePath, stream=True))
+
+
+SNAPSHOT_VERSION = 1
+
+
+def _snapshotPath(JSONFilePath):
+    return JSONFilePath + ".snapshot"
+
+
+def _sourceStamp(JSONFilePath):
+    stat = os.stat(JSONFilePath)
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def writeSnapshot(df, JSONFilePath):
+    """
+    Writes a typed columnar snapshot of a DataFrame loaded from a JSON file into a
+    directory next to it: one .npy file per array and a meta.json recording the
+    column dtypes and the JSON file's mtime and size. Strings are stored as
+    categorical codes plus categories and nullable columns as values plus mask.
+    Returns False if a column cannot be stored without pickling.
+    """
+    meta = {
+        "version": SNAPSHOT_VERSION,
+        "source": _sourceStamp(JSONFilePath),
+        "columns": [],
+    }
+    arrays = {}
+    for i, col in enumerate(df.columns):
+        series = df[col]
+        entry = {"name": col, "dtype": str(series.dtype)}
+        if isinstance(
+            series.dtype, pd.CategoricalDtype
+        ) or pd.api.types.is_string_dtype(series):
+            if pd.api.types.infer_dtype(series, skipna=True) not in ["string", "empty"]:
+                return False
+            cat = pd.Categorical(series)
+            entry["kind"] = "str"
+            arrays[f"{i}_codes"] = cat.codes
+            arrays[f"{i}_categories"] = np.array(cat.categories, dtype=str)
+        elif isinstance(series.dtype, pd.api.extensions.ExtensionDtype):
+            if not hasattr(series.dtype, "numpy_dtype"):
+                return False
+            entry["kind"] = "masked"
+            arrays[f"{i}_values"] = series.to_numpy(
+                dtype=series.dtype.numpy_dtype, na_value=0
+            )
+            arrays[f"{i}_mask"] = series.isna().to_numpy()
+        elif series.dtype.kind in "biuf":
+            entry["kind"] = "numpy"
+            arrays[f"{i}_values"] = series.to_numpy()
+        else:
+            return False
+        meta["columns"].append(entry)
+
+    # Written into a private directory and renamed into place, so concurrent
+    # writers never share files and readers never see a partial snapshot
+    snapshot_path = _snapshotPath(JSONFilePath)
+    tmp_path = tempfile.mkdtemp(
+        dir=os.path.dirname(os.path.abspath(snapshot_path)),
+        prefix=os.path.basename(snapshot_path) + ".",
+    )
+    try:
+        for name, arr in arrays.items():
+            np.save(os.path.join(tmp_path, f"{name}.npy"), arr, allow_pickle=False)
+        with open(os.path.join(tmp_path, "meta.json"), "w") as f:
+            json.dump(meta, f)
+        _publishSnapshot(tmp_path, snapshot_path, JSONFilePath)
+    finally:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+    return True
+
+
+def _publishSnapshot(tmp_path, snapshot_path, JSONFilePath):
+    """
+    Renames a written snapshot directory into place. An up-to-date snapshot
+    already in place (e.g. written concurrently by another process) is kept; a
+    stale one is first renamed aside, as directories cannot be replaced atomically.
+    """
+    try:
+        os.rename(tmp_path, snapshot_path)
+        return
+    except OSError:
+        if not os.path.isdir(snapshot_path):
+            raise
+    if _snapshotIsCurrent(snapshot_path, JSONFilePath):
+        return
+    stale_path = tempfile.mkdtemp(
+        dir=os.path.dirname(snapshot_path), prefix=os.path.basename(snapshot_path) + "."
+    )
+    try:
+        os.replace(snapshot_path, stale_path)
+        os.rename(tmp_path, snapshot_path)
+    except OSError:
+        # Another writer replaced it in the meantime
+        if not _snapshotIsCurrent(snapshot_path, JSONFilePath):
+            raise
+    finally:
+        shutil.rmtree(stale_path, ignore_errors=True)
+
+
+def _readSnapshotMeta(snapshot_path):
+    try:
+        with open(os.path.join(snapshot_path, "meta.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _snapshotIsCurrent(snapshot_path, JSONFilePath, meta=None):
+    if meta is None:
+        meta = _readSnapshotMeta(snapshot_path)
+    return (
+        meta is not None
+        and meta.get("version") == SNAPSHOT_VERSION
+        and meta.get("source") == _sourceStamp(JSONFilePath)
+    )
+
+
+def readSnapshot(JSONFilePath):
+    """
+    Reads the snapshot of a JSON file written by writeSnapshot, memory-mapping its
+    arrays. Returns None if there is no snapshot or if it is stale, i.e. the JSON
+    file's mtime or size changed since it was written.
+    """
+    snapshot_path = _snapshotPath(JSONFilePath)
+    meta = _readSnapshotMeta(snapshot_path)
+    if not _snapshotIsCurrent(snapshot_path, JSONFilePath, meta=meta):
+        return None
+
+    def load(name):
+        return np.load(
+            os.path.join(snapshot_path, f"{name}.npy"),
+            mmap_mode="r",
+            allow_pickle=False,
+        )
+
+    columns = {}
+    for i, entry in enumerate(meta["columns"]):
+        if entry["kind"] == "str":
+            cat = pd.Categorical.from_codes(
+                load(f"{i}_codes"), categories=load(f"{i}_categories")
+            )
+            columns[entry["name"]] = pd.Series(cat).astype(entry["dtype"])
+        elif entry["kind"] == "masked":
+            columns[entry["name"]] = pd.Series(
+                pd.array(load(f"{i}_values"), dtype=entry["dtype"])
+            ).mask(load(f"{i}_mask"))
+        else:
+            columns[entry["name"]] = load(f"{i}_values")
+    return pd.DataFrame(columns)
+
+
+def loadJSONasDF(JSONFilePath, snapshot=False, stream=None):
+    """
+    Loads a JSON file into a DataFrame: one column per key of a top-level list of
+    records, or the keys and values of a top-level object as columns 0 and 1.
+    The file is parsed with json.load or, if stream is set (by default for files
+    of at least STREAM_MIN_BYTES), incrementally with ijson. Both read the same
+    records and convert them to the same dtypes. If snapshot is set, a typed
+    columnar snapshot is written next to the JSON file on the first load and
+    reused by later loads as long as the JSON file is unchanged (see
+    writeSnapshot).
+    """
     if not os.path.exists(JSONFilePath):
         raise FileNotFoundError(
             "ERROR in json_utils.py / loadjson: requested json file {} does not seem to exist...".format(
                 JSONFilePath
             )
         )
-    with open(JSONFilePath, "r") as f:
-        JSONdict = json.load(f)
-    try:
-        jsondf = pd.DataFrame(JSONdict).convert_dtypes()
-    except Exception:
-        jsondf = pd.DataFrame(JSONdict.items()).convert_dtypes()
+    if snapshot:
+        jsondf = readSnapshot(JSONFilePath)
+        if jsondf is not None:
+            return jsondf
+
+    records = _iterJSONRecords(JSONFilePath, stream=stream)
+    if _useStreaming(JSONFilePath, stream):
+        jsondf = _recordsToDF(records)  # Typed columns built as records are read
+    else:
+        jsondf = pd.DataFrame(list(records))
+    jsondf = jsondf.convert_dtypes()
+
+    if snapshot:
+        try:
+            writeSnapshot(jsondf, JSONFilePath)
+        except OSError as e:
+            print(f"WARNING: Unable to write snapshot for {JSONFilePath}: {e}")
     return jsondf
 
 
 def loadFromWeb(url, output_file):
+    import requests  # Deferred, only needed for downloads
+
     try:
         # Make request and check if successful
         response = requests.get(url)
@@ -164,6 +536,12 @@ def loadFromWeb(url, output_file):
 def fetch_data(
     runnbs: int | list[int], me_names: list[str], dials=None
 ) -> pd.DataFrame:
+    # Deferred, cmsdials is slow to import and only needed for fetching
+    from cmsdials.filters import (
+        LumisectionHistogram1DFilters,
+        LumisectionHistogram2DFilters,
+    )
+
     if dials is None:
         from dqmexplore.utils.setupdials import setup_dials_object_deviceauth
 
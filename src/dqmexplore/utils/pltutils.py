@@ -0,0 +1,77 @@
+import numpy as np
+
+
+def typed_array(data, float32: bool = True) -> np.ndarray:
+    """
+    Returns data as a contiguous numpy array, which plotly serialises as a base64
+    typed array instead of decimal JSON numbers. Floats are downcast to float32 for
+    display if float32 is set; integers are left for plotly to pack. Masked values
+    become NaN.
+    """
+    if np.ma.isMaskedArray(data):
+        data = np.ma.filled(data.astype(float), np.nan)
+    data = np.asarray(data)
+    if float32 and np.issubdtype(data.dtype, np.floating):
+        data = data.astype(np.float32, copy=False)
+    return np.ascontiguousarray(data)
+
+
+def bin_kwargs(bins, axis: str = "x", float32: bool = True) -> dict:
+    """
+    Trace keyword arguments for the bin positions of an axis. Uniform bins (the
+    default MEData binning) are given as start and step ({axis}0, d{axis}) so that
+    they are not serialised for every trace; other bins as a typed array.
+    """
+    bins = np.asarray(bins)
+    if len(bins) > 1:
+        steps = np.diff(bins)
+        if np.allclose(steps, steps[0], rtol=1e-6, atol=0):
+            return {f"{axis}0": float(bins[0]), f"d{axis}": float(steps[0])}
+    return {axis: typed_array(bins, float32=float32)}
+
+
+# Level of detail defaults
+MAX_ROWS = 1000  # Max LS rows drawn in a heatmap
+MAX_POINTS = 4000  # Max points drawn per trend line
+WEBGL_THRESHOLD = 5000  # Points above which Scattergl is used
+
+
+def aggregate_rows(data, max_rows: int = MAX_ROWS, how: str = "sum"):
+    """
+    Aggregates blocks of consecutive rows (LSs) of an array into at most max_rows
+    rows, summing or taking the max of each block. The last block may be shorter.
+    Returns the aggregated array and the block size (1 if not aggregated).
+    """
+    if how not in ["sum", "max"]:
+        raise ValueError(f"Invalid aggregation {how}. Must be 'sum' or 'max'.")
+    data = np.asarray(data)
+    block = -(-len(data) // max_rows)
+    if block <= 1:
+        return data, 1
+    starts = np.arange(0, len(data), block)
+    reduce = np.add.reduceat if how == "sum" else np.maximum.reduceat
+    return reduce(data, starts, axis=0), block
+
+
+def minmax_decimate(y, max_points: int = MAX_POINTS):
+    """
+    Decimates a line to at most max_points points keeping the minimum and maximum
+    of each bucket of consecutive points, so that spikes and dips remain visible.
+    Returns the positions of the kept points and their values.
+    """
+    y = np.asarray(y)
+    if len(y) <= max_points:
+        return np.arange(len(y)), y
+    num_buckets = max(max_points // 2, 1)
+    bucket = -(-len(y) // num_buckets)
+    num_buckets = -(-len(y) // bucket)
+    padded = np.full(num_buckets * bucket, np.nan)
+    padded[: len(y)] = y
+    padded = padded.reshape(num_buckets, bucket)
+    # NaNs (padding or missing values) never win
+    offsets = np.arange(num_buckets) * bucket
+    idx_min = offsets + np.argmin(np.where(np.isnan(padded), np.inf, padded), axis=1)
+    idx_max = offsets + np.argmax(np.where(np.isnan(padded), -np.inf, padded), axis=1)
+    idxs = np.unique(np.concatenate([idx_min, idx_max]))
+    idxs = idxs[idxs < len(y)]
+    return idxs, y[idxs]
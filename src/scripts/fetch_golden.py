@@ -1,17 +1,168 @@
 import json
+import os
 import argparse
-import runregistry
+import hashlib
+import itertools
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-runregistry.setup("production")
+CACHE_FNAME = ".fetch_golden_cache.json"
+# Outputs older than this are regenerated to pick up new certifications
+MAX_AGE_HOURS = 12
+
+_rr_lock = threading.Lock()
+_rr_setup = False
+
+
+def output_fname(dataset: str, logic_path: str, logic_dir: str | None = None) -> str:
+    """
+    Output file name for a dataset and logic file, e.g.
+    Express_Collisions2024_DQM__rr_config.json. The logic part is the path of the
+    logic file relative to logic_dir (its directory if None), so logic files with
+    the same name in different directories get different outputs.
+    """
+    dataset_part = "_".join(part for part in dataset.split("/") if part)
+    if logic_dir is None:
+        logic_dir = os.path.dirname(os.path.abspath(logic_path))
+    logic_rel = os.path.relpath(os.path.abspath(logic_path), logic_dir)
+    logic_part = "_".join(
+        part for part in os.path.splitext(logic_rel)[0].split(os.sep) if part
+    )
+    return f"{dataset_part}__{logic_part}.json"
+
+
+def inputs_hash(dataset: str, json_logic: dict, meta: bool) -> str:
+    return hashlib.sha256(
+        json.dumps(
+            {"dataset": dataset, "logic": json_logic, "meta": meta}, sort_keys=True
+        ).encode()
+    ).hexdigest()
+
+
+def file_hash(fname: str) -> str:
+    with open(fname, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _runregistry():
+    """Run Registry client, set up for production on first use."""
+    global _rr_setup
+    import runregistry  # Deferred, only needed for requests
+
+    with _rr_lock:
+        if not _rr_setup:
+            runregistry.setup("production")
+            _rr_setup = True
+    return runregistry
+
+
+def generate_json(dataset: str, json_logic: dict, fname: str, meta: bool = False):
+    """
+    Creates a Run Registry JSON for one dataset and writes it to fname. The Run
+    Registry client is set up for production on the first request.
+    """
+    runregistry = _runregistry()
+    rr_data = runregistry.create_json(
+        json_logic=json_logic,
+        dataset_name_filter=dataset,
+    )
+    with open(fname, "w") as file:
+        json.dump(rr_data if meta else rr_data["generated_json"], file, indent=4)
+    return fname
+
+
+def generate_jsons(
+    datasets: list[str],
+    logic_paths: list[str],
+    outdir: str,
+    meta: bool = False,
+    max_workers: int = 4,
+    force: bool = False,
+    max_age: float = MAX_AGE_HOURS,
+) -> dict:
+    """
+    Creates Run Registry JSONs for every combination of dataset and logic file
+    concurrently, with at most max_workers requests in flight. A cache in outdir
+    records the inputs of each output; outputs whose inputs are unchanged, that
+    were not modified since and that were generated less than max_age hours ago
+    are skipped unless force is set. The age limit lets new certifications in Run
+    Registry be picked up by regular regeneration.
+    Returns a dict of output file -> "generated", "skipped" or the error.
+    """
+    os.makedirs(outdir, exist_ok=True)
+    cache_path = os.path.join(outdir, CACHE_FNAME)
+    cache = {}
+    if os.path.exists(cache_path):
+        with open(cache_path) as f:
+            cache = json.load(f)
+
+    logics = {}
+    for logic_path in logic_paths:
+        with open(logic_path) as f:
+            logics[logic_path] = json.load(f)
+
+    logic_dir = os.path.commonpath(
+        [os.path.dirname(os.path.abspath(logic_path)) for logic_path in logic_paths]
+    )
+    status = {}
+    jobs = {}
+    for dataset, logic_path in itertools.product(datasets, logic_paths):
+        fname = os.path.join(outdir, output_fname(dataset, logic_path, logic_dir))
+        in_hash = inputs_hash(dataset, logics[logic_path], meta)
+        entry = cache.get(os.path.basename(fname))
+        if (
+            not force
+            and entry is not None
+            and entry["inputs"] == in_hash
+            and time.time() - entry.get("time", 0) < max_age * 3600
+            and os.path.exists(fname)
+            and file_hash(fname) == entry["output"]
+        ):
+            status[fname] = "skipped"
+            continue
+        jobs[fname] = (dataset, logics[logic_path], in_hash)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(generate_json, dataset, json_logic, fname, meta): fname
+            for fname, (dataset, json_logic, _) in jobs.items()
+        }
+        for future in as_completed(futures):
+            fname = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                print(f"WARNING: Unable to generate {fname}: {e}")
+                status[fname] = e
+                continue
+            cache[os.path.basename(fname)] = {
+                "inputs": jobs[fname][2],
+                "output": file_hash(fname),
+                "time": time.time(),
+            }
+            status[fname] = "generated"
+
+    with open(cache_path, "w") as f:
+        json.dump(cache, f, indent=4)
+    return status
 
 
 def main():
     parser = argparse.ArgumentParser(description="A script to get a Run Registry JSON")
     parser.add_argument(
-        "-l", "--logic", type=str, help="Path to json containing RR fetching logic."
+        "-l",
+        "--logic",
+        type=str,
+        nargs="+",
+        help="Path(s) to json(s) containing RR fetching logic.",
     )
     parser.add_argument(
-        "-d", "--dataset", type=str, default="/Express/Collisions2024/DQM"
+        "-d",
+        "--dataset",
+        type=str,
+        nargs="+",
+        default=["/Express/Collisions2024/DQM"],
     )
     parser.add_argument(
         "-f",
@@ -23,18 +174,52 @@ def main():
     parser.add_argument(
         "-m", "--meta", action="store_true", help="Include metadata in the output JSON."
     )
+    parser.add_argument(
+        "-o",
+        "--outdir",
+        type=str,
+        default=None,
+        help="Output directory. Generates one JSON per dataset and logic file, skipping unchanged ones.",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=4,
+        help="Maximum number of concurrent Run Registry requests. Default: 4",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Regenerate all JSONs even if their inputs are unchanged.",
+    )
+    parser.add_argument(
+        "--max-age",
+        type=float,
+        default=MAX_AGE_HOURS,
+        help=f"Regenerate JSONs older than this many hours even if their inputs are unchanged. Default: {MAX_AGE_HOURS}",
+    )
     args = parser.parse_args()
 
-    with open(args.logic) as f:
-        json_logic = json.load(f)
+    if args.outdir is None:
+        if len(args.dataset) > 1 or len(args.logic) > 1:
+            parser.error("Multiple datasets or logic files require --outdir.")
+        with open(args.logic[0]) as f:
+            json_logic = json.load(f)
+        generate_json(args.dataset[0], json_logic, args.fname, meta=args.meta)
+        return
 
-    rr_data = runregistry.create_json(
-        json_logic=json_logic,
-        dataset_name_filter=args.dataset,
+    status = generate_jsons(
+        args.dataset,
+        args.logic,
+        args.outdir,
+        meta=args.meta,
+        max_workers=args.jobs,
+        force=args.force,
+        max_age=args.max_age,
     )
-
-    with open(args.fname, "w") as file:
-        json.dump(rr_data if args.meta else rr_data["generated_json"], file, indent=4)
+    for fname, result in sorted(status.items()):
+        print(f"{fname}: {result}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,291 @@
+import os
+import json
+import html
+import hashlib
+import argparse
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import plotly
+from plotly.offline import get_plotlyjs
+import dqmexplore as dqme
+from dqmexplore.rendercache import data_hash, _value_hash
+from scripts.search_runs import read_runnbs
+from scripts.render_batch import fetch_runs, init_worker, render_medata, _worker
+
+PLOTLYJS_FNAME = "plotly.min.js"
+CACHE_FNAME = ".report_cache.json"
+PAGES_DIR = "runs"
+
+
+def config_hash(plots_config: dict, fig_config: dict, ref_runnb) -> str:
+    """Hash of the report settings; a plotly upgrade also invalidates pages."""
+    return hashlib.sha256(
+        json.dumps(
+            {
+                "plots_config": plots_config,
+                "fig_config": fig_config,
+                "ref_run": ref_runnb,
+                "plotly": plotly.__version__,
+            },
+            sort_keys=True,
+        ).encode()
+    ).hexdigest()
+
+
+def render_page(
+    runnb: int,
+    me_df,
+    fname: str,
+    trigger_rates,
+    cfg_hash: str,
+    old_hash: str | None,
+    force: bool = False,
+) -> dict:
+    """
+    Renders the page of a run unless its inputs (configs, run and reference data,
+    and the trigger rates if its MEs are trignorm-normalized) hash to old_hash and
+    the page exists. Pages load the shared plotly bundle.
+    """
+    me_data = dqme.medata.MEData(me_df)
+    if "ref_hash" not in _worker:
+        ref_data = _worker["ref_data"]
+        _worker["ref_hash"] = "" if ref_data is None else data_hash(ref_data)
+    trignorm = any(
+        _worker["plots_config"].get(me, {}).get("norm") == "trignorm"
+        for me in me_data.getMENames()
+    )
+    rates_hash = f"trignorm:{_value_hash(trigger_rates)}" if trignorm else ""
+    in_hash = hashlib.sha256(
+        (cfg_hash + _worker["ref_hash"] + data_hash(me_data) + rates_hash).encode()
+    ).hexdigest()
+
+    if not force and in_hash == old_hash and os.path.exists(fname):
+        entry = {"run": runnb, "mes": me_data.getMENames(), "output": fname}
+        entry["status"] = "skipped"
+    else:
+        entry = render_medata(
+            runnb,
+            me_data,
+            fname,
+            trigger_rates,
+            include_plotlyjs=f"../{PLOTLYJS_FNAME}",
+        )
+    entry["hash"] = in_hash
+    return entry
+
+
+def write_plotlyjs(outdir: str) -> None:
+    """Writes the plotly.js bundle shared by all pages if missing or outdated."""
+    bundle = get_plotlyjs()
+    fname = os.path.join(outdir, PLOTLYJS_FNAME)
+    if os.path.exists(fname):
+        with open(fname, "r", encoding="utf-8") as f:
+            if f.read() == bundle:
+                return
+    with open(fname, "w", encoding="utf-8") as f:
+        f.write(bundle)
+
+
+def write_index(outdir: str, entries: list[dict], title: str, ref_runnb) -> None:
+    rows = []
+    for entry in entries:
+        link = (
+            f'<a href="{html.escape(os.path.relpath(entry["output"], outdir))}">'
+            f'{entry["run"]}</a>'
+            if entry["status"] in ["rendered", "skipped"]
+            else str(entry["run"])
+        )
+        rows.append(
+            f"<tr><td>{link}</td><td>{html.escape(entry['status'])}</td>"
+            f"<td>{len(entry.get('mes', []))}</td>"
+            f"<td>{html.escape(entry.get('error', '') or '')}</td></tr>"
+        )
+    with open(os.path.join(outdir, "index.html"), "w", encoding="utf-8") as f:
+        f.write(
+            "<!DOCTYPE html>\n<html>\n<head>\n<meta charset='utf-8'>\n"
+            f"<title>{html.escape(title)}</title>\n"
+            "<style>body{font-family:sans-serif}td,th{padding:2px 12px}</style>\n"
+            "</head>\n<body>\n"
+            f"<h1>{html.escape(title)}</h1>\n"
+            f"<p>Reference run: {ref_runnb if ref_runnb else 'none'}. "
+            f"Generated {datetime.now():%Y-%m-%d %H:%M}.</p>\n"
+            "<table>\n<tr><th>Run</th><th>Status</th><th>MEs</th><th>Error</th></tr>\n"
+            + "\n".join(rows)
+            + "\n</table>\n</body>\n</html>\n"
+        )
+
+
+def make_report(
+    runnbs: list[int],
+    me_names: list[str],
+    plots_config: dict,
+    fig_config: dict,
+    outdir: str,
+    ref_runnb: int | None = None,
+    title: str = "DQM report",
+    max_workers: int | None = None,
+    force: bool = False,
+    dials=None,
+) -> list[dict]:
+    """
+    Renders a static HTML report: one interactive page per run in outdir/runs,
+    all loading a single shared plotly.min.js, and an index.html linking them.
+    Pages are rendered in parallel from figure templates with float32 typed-array
+    data. Runs whose inputs (configs, run and reference data, trigger rates) are
+    unchanged since the last report are not re-rendered unless force is set.
+    """
+    pages_dir = os.path.join(outdir, PAGES_DIR)
+    os.makedirs(pages_dir, exist_ok=True)
+    write_plotlyjs(outdir)
+
+    cache_path = os.path.join(outdir, CACHE_FNAME)
+    cache = {}
+    if os.path.exists(cache_path):
+        with open(cache_path) as f:
+            cache = json.load(f)
+
+    runnbs = sorted(set(int(runnb) for runnb in runnbs))
+    runs_dfs, ref_df, trig_rates = fetch_runs(
+        runnbs, me_names, plots_config, ref_runnb=ref_runnb, dials=dials
+    )
+    cfg_hash = config_hash(plots_config, fig_config, ref_runnb)
+
+    entries = []
+    jobs = []
+    for runnb in runnbs:
+        if runnb not in runs_dfs:
+            entries.append({"run": runnb, "mes": [], "status": "no data"})
+            continue
+        fname = os.path.join(pages_dir, f"{runnb}.html")
+        jobs.append(
+            (
+                runnb,
+                runs_dfs[runnb],
+                fname,
+                trig_rates.get(runnb),
+                cfg_hash,
+                cache.get(str(runnb)),
+                force,
+            )
+        )
+
+    print(f"[NOTE] Rendering {len(jobs)} pages...")
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=init_worker,
+        initargs=(ref_df, plots_config, fig_config),
+    ) as executor:
+        futures = {executor.submit(render_page, *job): job for job in jobs}
+        for future in as_completed(futures):
+            runnb, _, fname = futures[future][:3]
+            try:
+                entry = future.result()
+            except Exception as e:
+                print(f"WARNING: Unable to render {fname}: {e}")
+                cache.pop(str(runnb), None)
+                entries.append(
+                    {"run": runnb, "output": fname, "status": "failed", "error": str(e)}
+                )
+                continue
+            cache[str(runnb)] = entry.pop("hash")
+            entries.append(entry)
+
+    entries.sort(key=lambda entry: entry["run"])
+    with open(cache_path, "w") as f:
+        json.dump(cache, f, indent=4)
+    write_index(outdir, entries, title, ref_runnb)
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="A script to make a static HTML report of per-LS plots for many runs"
+    )
+    parser.add_argument(
+        "-r", "--runnbs", type=int, nargs="+", help="Run number(s) to include."
+    )
+    parser.add_argument(
+        "--from-file",
+        type=str,
+        default=None,
+        help="File with run numbers separated by whitespace or commas ('-' for stdin).",
+    )
+    parser.add_argument(
+        "-p", "--plot_config", type=str, help="Path to the plot configuration file."
+    )
+    parser.add_argument(
+        "-f", "--fig_config", type=str, help="Path to the figure configuration file."
+    )
+    parser.add_argument(
+        "-m",
+        "--mes",
+        type=str,
+        nargs="+",
+        default=None,
+        help="MEs to plot. Default: all MEs in the plot configuration.",
+    )
+    parser.add_argument(
+        "-e",
+        "--ref_runnb",
+        type=int,
+        default=0,
+        help="Reference run number for comparison.",
+    )
+    parser.add_argument(
+        "-o", "--outdir", type=str, default="./report", help="Report directory."
+    )
+    parser.add_argument(
+        "-t", "--title", type=str, default="DQM report", help="Report title."
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of rendering processes. Default: number of cores.",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-render all pages even if their inputs are unchanged.",
+    )
+    args = parser.parse_args()
+
+    if args.runnbs is None and args.from_file is None:
+        parser.error("One of -r/--runnbs or --from-file is required.")
+    runnbs = list(args.runnbs or []) + (
+        read_runnbs(args.from_file).tolist() if args.from_file else []
+    )
+
+    plots_config = {}
+    if args.plot_config:
+        with open(args.plot_config) as f:
+            plots_config = json.load(f)
+    fig_config = {}
+    if args.fig_config:
+        with open(args.fig_config) as f:
+            fig_config = json.load(f)
+    me_names = args.mes if args.mes else list(plots_config.keys())
+    if not me_names:
+        parser.error("No MEs given. Use -m/--mes or a plot configuration.")
+
+    entries = make_report(
+        runnbs,
+        me_names,
+        plots_config,
+        fig_config,
+        args.outdir,
+        ref_runnb=args.ref_runnb if args.ref_runnb != 0 else None,
+        title=args.title,
+        max_workers=args.jobs,
+        force=args.force,
+    )
+    counts = {}
+    for entry in entries:
+        counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+    print(f"[NOTE] Report written to {os.path.join(args.outdir, 'index.html')}")
+    print("  " + ", ".join(f"{status}: {num}" for status, num in counts.items()))
+
+
+if __name__ == "__main__":
+    main()
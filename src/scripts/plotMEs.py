@@ -30,7 +30,7 @@ def main():
     trig_rate = None
     for val in plot_config.values():
         if val.get("norm", None) == "trignorm":
-            trig_rate = dqme.oms.get_rate(args.runnb)
+            trig_rate = dqme.oms.get_rates(args.runnb)[args.runnb]  # LS-indexed
             break
 
     me_names = list(plot_config.keys())
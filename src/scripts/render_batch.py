@@ -0,0 +1,244 @@
+import os
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import dqmexplore as dqme
+from scripts.search_runs import read_runnbs
+
+MANIFEST_FNAME = "manifest.json"
+
+# Per-worker state, set once by init_worker
+_worker = {}
+
+
+def init_worker(ref_df, plots_config: dict, fig_config: dict):
+    """Builds the shared reference data once per worker process."""
+    _worker["ref_data"] = (
+        None if ref_df is None or ref_df.empty else dqme.medata.MEData(ref_df)
+    )
+    _worker["plots_config"] = plots_config
+    _worker["fig_config"] = fig_config
+    _worker["templates"] = {}
+
+
+def render(runnb: int, me_df, fname: str, trigger_rates=None) -> dict:
+    """Renders one figure of the MEs in me_df and writes it to fname."""
+    return render_medata(runnb, dqme.medata.MEData(me_df), fname, trigger_rates)
+
+
+def render_medata(
+    runnb: int, me_data, fname: str, trigger_rates=None, include_plotlyjs=True
+) -> dict:
+    """
+    Renders one figure of an MEData object with the worker's templates. Figure
+    configs with slider_mode "traces", which templates do not support, are
+    plotted with interplt.plotMEs instead.
+    """
+    start = time.perf_counter()
+    mes = me_data.getMENames()
+    plots_config = {me: dict(_worker["plots_config"].get(me, {})) for me in mes}
+    if _worker["fig_config"].get("slider_mode", "frames") != "frames":
+        fig = dqme.interplt.plotMEs(
+            me_data,
+            plots_config,
+            dict(_worker["fig_config"]),
+            trigger_rates=trigger_rates,
+            ref_data=_worker["ref_data"],
+        )
+        fig.write_html(fname, include_plotlyjs=include_plotlyjs)
+    else:
+        # One template per ME set, compiled on the first run and filled afterwards
+        if tuple(mes) not in _worker["templates"]:
+            _worker["templates"][tuple(mes)] = dqme.templates.FigureTemplate(
+                plots_config, dict(_worker["fig_config"])
+            )
+        _worker["templates"][tuple(mes)].write_html(
+            me_data,
+            fname,
+            ref_data=_worker["ref_data"],
+            include_plotlyjs=include_plotlyjs,
+            trigger_rates=trigger_rates,
+        )
+    return {
+        "run": runnb,
+        "mes": mes,
+        "output": fname,
+        "status": "rendered",
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+def fetch_runs(
+    runnbs: list[int],
+    me_names: list[str],
+    plots_config: dict,
+    ref_runnb: int | None = None,
+    dials=None,
+) -> tuple:
+    """
+    Fetches the MEs of all runs and of the reference run in one go, and their
+    trigger rates if requested in plots_config. Returns the per-run DataFrames,
+    the reference run DataFrame (or None) and the per-run trigger rates.
+    """
+    to_fetch = runnbs + ([ref_runnb] if ref_runnb and ref_runnb not in runnbs else [])
+    print(f"[NOTE] Fetching {len(me_names)} MEs for {len(to_fetch)} runs...")
+    query_rslt = dqme.utils.datautils.fetch_data(to_fetch, me_names, dials=dials)
+    runs_dfs = dict(tuple(query_rslt.groupby("run_number")))
+    ref_df = runs_dfs.get(ref_runnb) if ref_runnb else None
+
+    trig_rates = {}
+    if any(plots_config.get(me, {}).get("norm") == "trignorm" for me in me_names):
+        trig_rates = dqme.oms.get_rates(runnbs, dials=dials)
+    return runs_dfs, ref_df, trig_rates
+
+
+def render_batch(
+    runnbs: list[int],
+    me_names: list[str],
+    plots_config: dict,
+    fig_config: dict,
+    outdir: str,
+    ref_runnb: int | None = None,
+    per_me: bool = False,
+    max_workers: int | None = None,
+    dials=None,
+) -> list[dict]:
+    """
+    Renders interactive per-LS figures for many runs. The data of every distinct
+    (run, ME) and of the reference run is fetched once, trigger rates are fetched
+    in batches, and figures are rendered in a process pool (one figure per run, or
+    per run and ME if per_me is set) from figure templates compiled once per
+    worker. Writes and returns a manifest of the outputs.
+    """
+    os.makedirs(outdir, exist_ok=True)
+    runnbs = sorted(set(int(runnb) for runnb in runnbs))
+    runs_dfs, ref_df, trig_rates = fetch_runs(
+        runnbs, me_names, plots_config, ref_runnb=ref_runnb, dials=dials
+    )
+
+    manifest = []
+    jobs = []
+    for runnb in runnbs:
+        run_df = runs_dfs.get(runnb)
+        if run_df is None:
+            manifest.append({"run": runnb, "mes": [], "status": "no data"})
+            continue
+        groups = run_df.groupby("me") if per_me else [(None, run_df)]
+        for me, me_df in groups:
+            suffix = "" if me is None else "_" + me.replace("/", "__")
+            fname = os.path.join(outdir, f"{runnb}{suffix}.html")
+            jobs.append((runnb, me_df, fname, trig_rates.get(runnb)))
+
+    print(f"[NOTE] Rendering {len(jobs)} figures...")
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=init_worker,
+        initargs=(ref_df, plots_config, fig_config),
+    ) as executor:
+        futures = {executor.submit(render, *job): job for job in jobs}
+        for future in as_completed(futures):
+            runnb, me_df, fname, _ = futures[future]
+            try:
+                manifest.append(future.result())
+            except Exception as e:
+                print(f"WARNING: Unable to render {fname}: {e}")
+                manifest.append(
+                    {
+                        "run": runnb,
+                        "mes": sorted(me_df["me"].unique()),
+                        "output": fname,
+                        "status": "failed",
+                        "error": str(e),
+                    }
+                )
+
+    manifest.sort(key=lambda entry: (entry["run"], entry.get("output", "")))
+    with open(os.path.join(outdir, MANIFEST_FNAME), "w") as f:
+        json.dump({"ref_run": ref_runnb, "figures": manifest}, f, indent=4, default=str)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="A script to render per-LS plots for many runs in parallel"
+    )
+    parser.add_argument(
+        "-r", "--runnbs", type=int, nargs="+", help="Run number(s) to plot."
+    )
+    parser.add_argument(
+        "--from-file",
+        type=str,
+        default=None,
+        help="File with run numbers separated by whitespace or commas ('-' for stdin).",
+    )
+    parser.add_argument(
+        "-p", "--plot_config", type=str, help="Path to the plot configuration file."
+    )
+    parser.add_argument(
+        "-f", "--fig_config", type=str, help="Path to the figure configuration file."
+    )
+    parser.add_argument(
+        "-m",
+        "--mes",
+        type=str,
+        nargs="+",
+        default=None,
+        help="MEs to plot. Default: all MEs in the plot configuration.",
+    )
+    parser.add_argument(
+        "-e",
+        "--ref_runnb",
+        type=int,
+        default=0,
+        help="Reference run number for comparison.",
+    )
+    parser.add_argument(
+        "-o", "--outdir", type=str, default="./plots", help="Output directory."
+    )
+    parser.add_argument(
+        "--per-me", action="store_true", help="Render one figure per run and ME."
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of rendering processes. Default: number of cores.",
+    )
+    args = parser.parse_args()
+
+    if args.runnbs is None and args.from_file is None:
+        parser.error("One of -r/--runnbs or --from-file is required.")
+    runnbs = list(args.runnbs or []) + (
+        read_runnbs(args.from_file).tolist() if args.from_file else []
+    )
+
+    plots_config = {}
+    if args.plot_config:
+        with open(args.plot_config) as f:
+            plots_config = json.load(f)
+    fig_config = {}
+    if args.fig_config:
+        with open(args.fig_config) as f:
+            fig_config = json.load(f)
+    me_names = args.mes if args.mes else list(plots_config.keys())
+    if not me_names:
+        parser.error("No MEs given. Use -m/--mes or a plot configuration.")
+
+    manifest = render_batch(
+        runnbs,
+        me_names,
+        plots_config,
+        fig_config,
+        args.outdir,
+        ref_runnb=args.ref_runnb if args.ref_runnb != 0 else None,
+        per_me=args.per_me,
+        max_workers=args.jobs,
+    )
+    for entry in manifest:
+        print(f"{entry['run']}: {entry.get('output', '-')} ({entry['status']})")
+
+
+if __name__ == "__main__":
+    main()
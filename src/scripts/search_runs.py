@@ -1,9 +1,34 @@
 from dqmexplore.certhelper import CHRunData
 import argparse
 import os
+import re
+import sys
+import numpy as np
 from tabulate import tabulate
 
 
+def read_runnbs(fname: str) -> np.ndarray:
+    """Reads run numbers separated by whitespace or commas from a file or stdin ('-')."""
+    if fname == "-":
+        text = sys.stdin.read()
+    else:
+        with open(fname) as f:
+            text = f.read()
+    return np.array(re.findall(r"\d+", text), dtype=np.int64)
+
+
+def stream_results(search_results, out, fmt: str, chunk_size: int = 10000):
+    """Writes results to an open file in chunks as CSV or JSON lines."""
+    for start in range(0, len(search_results), chunk_size):
+        chunk = search_results.iloc[start : start + chunk_size]
+        if fmt == "csv":
+            chunk.to_csv(out, index=False, header=(start == 0))
+        else:
+            out.write(chunk.to_json(orient="records", lines=True))
+    if search_results.empty and fmt == "csv":
+        search_results.to_csv(out, index=False)
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Script to search for runs/reference runs given a set of run numbers"
@@ -13,9 +38,15 @@ def main():
         "--runnbs",
         nargs="*",
         type=int,
-        required=True,
+        default=[],
         help="Run numbers to search for",
     )
+    parser.add_argument(
+        "--from-file",
+        type=str,
+        default=None,
+        help="File with run numbers to search for, separated by whitespace or commas. Use '-' to read from stdin. Enables batch mode.",
+    )
     parser.add_argument(
         "-m",
         "--mode",
@@ -43,15 +74,36 @@ def main():
         default="all",
         help="Reconstruction type to filter by. Default: 'all'",
     )
+    parser.add_argument(
+        "--format",
+        type=str,
+        choices=["csv", "jsonl"],
+        default=None,
+        help="Stream results as CSV or JSON lines to the output file, or to stdout if none is given. Default in batch mode: 'csv'",
+    )
+    parser.add_argument(
+        "-c",
+        "--columns",
+        type=str,
+        default=None,
+        help="Comma-separated list of columns to output.",
+    )
     args = parser.parse_args()
 
+    if not args.runnbs and args.from_file is None:
+        parser.error("Run numbers must be given through --runnbs or --from-file.")
+
     if not os.path.exists(args.input):
         raise FileNotFoundError(
             f"Input file {args.input} does not exist. Please download the CertHelper data first."
         )
 
+    runnbs = np.array(args.runnbs, dtype=np.int64)
+    if args.from_file is not None:
+        runnbs = np.concatenate([runnbs, read_runnbs(args.from_file)])
+
     ch_data = CHRunData(args.input)
-    search_results = ch_data.searchRuns(args.runnbs, ref=(args.mode == "ref"))
+    search_results = ch_data.searchRuns(runnbs, ref=(args.mode == "ref"))
 
     if args.reco_type != "all":
         search_results = search_results[
@@ -65,6 +117,28 @@ def main():
             == args.reco_type
         ]
 
+    if args.columns is not None:
+        columns = [col.strip() for col in args.columns.split(",")]
+        unknown = [col for col in columns if col not in search_results.columns]
+        if unknown:
+            parser.error(
+                f"Unknown column(s) {', '.join(unknown)} in --columns. "
+                f"Available columns: {', '.join(search_results.columns)}."
+            )
+        search_results = search_results[columns]
+
+    # Batch mode: streaming results without rendering a table
+    fmt = args.format
+    if fmt is None and args.from_file is not None:
+        fmt = "csv"
+    if fmt is not None:
+        if len(args.fname) == 0:
+            stream_results(search_results, sys.stdout, fmt)
+        else:
+            with open(args.fname, "w") as out:
+                stream_results(search_results, out, fmt)
+        return
+
     if len(args.fname) == 0:
         print("No output file specified. Printing results to console only.")
         print(
@@ -0,0 +1,150 @@
+import pytest
+
+
+class FakeOMS:
+    """Stands in for dials.oms, answering queries from in-memory rows per endpoint."""
+
+    OPERATORS = {
+        "EQ": lambda a, b: a == b,
+        "NEQ": lambda a, b: a != b,
+        "LT": lambda a, b: a < b,
+        "GT": lambda a, b: a > b,
+        "LE": lambda a, b: a <= b,
+        "GE": lambda a, b: a >= b,
+    }
+
+    def __init__(self, rows: dict) -> None:
+        self.rows = rows
+        self.queries = []
+
+    def query(self, endpoint, filters, pages):
+        self.queries.append((endpoint, filters))
+        rows = self.rows.get(endpoint, [])
+        for fltr in filters:
+            op = self.OPERATORS[fltr.operator]
+            rows = [row for row in rows if op(row[fltr.attribute_name], fltr.value)]
+        pages = {page.attribute_name: page.value for page in pages}
+        offset = pages.get("offset", 0)
+        rows = rows[offset : offset + pages["limit"]]
+        return {"data": [{"attributes": row} for row in rows]}
+
+
+class FakeDials:
+    def __init__(self, rows: dict) -> None:
+        self.oms = FakeOMS(rows)
+
+
+def rate_rows(runnbs, lss=range(1, 31)):
+    """Rows of the datasetrates endpoint, rate = run + LS / 1000."""
+    return [
+        {
+            "run_number": runnb,
+            "dataset_name": "ZeroBias",
+            "first_lumisection_number": ls,
+            "last_lumisection_number": ls,
+            "rate": runnb + ls / 1000,
+        }
+        for runnb in runnbs
+        for ls in lss
+    ]
+
+
+def ls_rows(runnbs, lss=range(1, 11), num_flags=3, pileup=50.0):
+    """Rows of the lumisections endpoint with num_flags boolean flags."""
+    return [
+        {
+            "run_number": runnb,
+            "lumisection_number": ls,
+            "fill_type_runtime": "PROTONS",
+            "pileup": pileup + ls,
+            **{f"flag{k}_ready": bool((ls + k) % 3) for k in range(num_flags)},
+        }
+        for runnb in runnbs
+        for ls in lss
+    ]
+
+
+def real_mes(dim=1, num=2):
+    """Names of MEs in the ME id map, which figure builders look MEs up in."""
+    from dqmexplore.utils.datautils import get_me_id_map
+
+    me_id_map = get_me_id_map()
+    return me_id_map[me_id_map["dim"] == dim]["me"].tolist()[:num]
+
+
+def me_df(runnb=1, lss=range(1, 21), mes=(("A/1d", 1, 10),), seed=0):
+    """
+    DIALS-like ME rows of one run. mes holds (name, dimensions, number of x bins)
+    tuples; 2D MEs have 4 y bins.
+    """
+    import numpy as np
+    import pandas as pd
+    from dqmexplore.me_ids import meIDs1D, meIDs2D
+
+    rng = np.random.default_rng(seed)
+    rows = []
+    for name, dim, num_bins in mes:
+        for ls in lss:
+            shape = (4, num_bins) if dim == 2 else (num_bins,)
+            data = rng.integers(0, 10, shape)
+            rows.append(
+                {
+                    "run_number": runnb,
+                    "ls_number": ls,
+                    "me": name,
+                    "me_id": meIDs2D[0] if dim == 2 else meIDs1D[0],
+                    "data": data.tolist(),
+                    "entries": int(data.sum()),
+                    "x_min": 0.0,
+                    "x_max": 1.0,
+                    "x_bin": num_bins,
+                    "y_min": 0.0,
+                    "y_max": 1.0,
+                    "y_bin": 4,
+                }
+            )
+    return pd.DataFrame(rows)
+
+
+CH_RECORDS = [
+    # (run, reco type, reference run, reference reco type, dataset)
+    (100, "express", 90, "express", "/Express/Collisions2024/DQM"),
+    (101, "express", 100, "express", "/Express/Collisions2024/DQM"),
+    (101, "prompt", 100, "prompt", "/PromptReco/Collisions2024/DQM"),
+    (102, "express", 101, "express", "/Express/Collisions2024/DQM"),
+    (103, "express", 104, "express", "/Express/Cosmics2024/DQM"),
+    (104, "express", 103, "express", "/Express/Cosmics2024/DQM"),
+    (105, "prompt", 105, "prompt", "/PromptReco/Collisions2024/DQM"),
+]
+
+
+@pytest.fixture
+def ch_json(tmp_path):
+    """Certification Helper JSON file of CH_RECORDS, shuffled."""
+    import json
+
+    path = tmp_path / "ch.json"
+    keys = [
+        "run_number",
+        "run_reconstruction_type",
+        "reference_run_number",
+        "reference_run_reconstruction_type",
+        "dataset",
+    ]
+    records = [dict(zip(keys, record)) for record in CH_RECORDS]
+    path.write_text(json.dumps(records[::-1]))
+    return str(path)
+
+
+@pytest.fixture
+def fake_dials():
+    return FakeDials
+
+
+@pytest.fixture(autouse=True)
+def clear_oms_cache():
+    from dqmexplore import oms
+
+    oms.clear_cache()
+    yield
+    oms.clear_cache()
@@ -0,0 +1,89 @@
+import json
+import pytest
+from dqmexplore import certhelper
+from dqmexplore.certhelper import CHRunData
+
+
+def test_get_run_and_search_runs(ch_json):
+    chdata = CHRunData(ch_json, snapshot=False)
+    assert chdata.getRun(101)["run_reconstruction_type"].tolist() == [
+        "express",
+        "prompt",
+    ]
+    assert len(chdata.getRun(101, "prompt")) == 1
+    assert len(chdata.getRun(999)) == 0
+    assert chdata.searchRuns([100, 102])["run_number"].tolist() == [100, 102]
+    assert chdata.searchRuns(100, ref=True)["run_number"].tolist() == [101, 101]
+
+
+def test_get_ref_runs_keeps_query_order(ch_json):
+    chdata = CHRunData(ch_json, snapshot=False)
+    refs = chdata.getRefRuns([102, 999, 101], reco_type="express")
+    assert refs["run_number"].tolist() == [102, 999, 101]
+    assert refs["reference_run_number"].tolist() == [101, -1, 100]
+    assert chdata.getRefRun(101, run_reconstruction_type="prompt") == 100
+    with pytest.raises(LookupError):
+        chdata.getRefRun(101)
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_golden_json_marks_good_runs(ch_json, tmp_path, stream, monkeypatch):
+    if stream:
+        pytest.importorskip("ijson")
+    golden_path = tmp_path / "golden.json"
+    golden_path.write_text(json.dumps({"101": [[1, 10]], "105": [[1, 2]]}))
+    loaded = []
+    load = certhelper.loadJSONasDF
+    monkeypatch.setattr(
+        certhelper,
+        "loadJSONasDF",
+        lambda path, **kwargs: loaded.append(path) or load(path, **kwargs),
+    )
+    chdata = CHRunData(ch_json, str(golden_path), snapshot=False, stream=stream)
+    assert loaded == [ch_json]  # The golden JSON is only parsed by GoldenJSON
+    assert sorted(chdata.getRuns(exclude_bad=True)["run_number"]) == [101, 101, 105]
+    assert 105 in chdata.golden
+    assert chdata.getRun(105)["good_lss"].tolist() == [[[1, 2]]]
+    assert chdata.getRun(102)["good_lss"].isna().all()
+
+
+def test_apply_filter_glob_patterns(ch_json):
+    chdata = CHRunData(ch_json, snapshot=False)
+    runs = chdata.applyFilter({"dataset": "/Express/*"}, return_df=False)
+    assert runs == [100, 101, 102, 103, 104]
+    runs = chdata.applyFilter(
+        {"dataset": ["*Cosmics*", "/PromptReco/*"], "run_number": [[101, 104]]},
+        return_df=False,
+    )
+    assert runs == [101, 103, 104]
+    assert chdata.applyFilter({"run_reconstruction_type": "exp?ess"}).shape[0] == 5
+    # Like an empty run number list, an empty pattern list matches no runs
+    assert chdata.applyFilter({"dataset": []}).empty
+    assert chdata.applyFilter({"run_number": []}).empty
+    with pytest.raises(KeyError):
+        chdata.applyFilter({"unknown": "x"})
+
+
+def test_ref_run_graph_chains_and_cycles(ch_json):
+    graph = CHRunData(ch_json, snapshot=False).getRefGraph()
+    anchors = graph.getAnchors([102, 103], reco_type="express")
+    assert anchors["anchor_run_number"].tolist() == [90, -1]
+    assert anchors["depth"].tolist() == [3, -1]
+    assert anchors["cyclic"].tolist() == [False, True]
+    assert graph.getChain(102, "express") == [
+        (102, "express"),
+        (101, "express"),
+        (100, "express"),
+        (90, "express"),
+    ]
+    # Self-referencing runs anchor on themselves
+    assert graph.getAnchors(105)["anchor_run_number"].tolist() == [105]
+    assert graph.getAnchors(105)["depth"].tolist() == [0]
+
+
+def test_ref_run_graph_referencing(ch_json):
+    graph = CHRunData(ch_json, snapshot=False).getRefGraph()
+    referencing = graph.getReferencing(100, "express")
+    assert referencing["run_number"].tolist() == [101, 102]
+    assert graph.getReferencing(90)["run_number"].tolist() == [100, 101, 102]
+    assert sorted(graph.getReferencing(103)["run_number"]) == [103, 104]
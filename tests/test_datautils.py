@@ -0,0 +1,107 @@
+import os
+import json
+import threading
+import numpy as np
+import pandas as pd
+import pytest
+from dqmexplore.utils import datautils
+
+
+@pytest.fixture
+def records_json(tmp_path):
+    path = tmp_path / "records.json"
+    records = [
+        {"run": 1, "name": "a", "value": 1.5, "flag": True, "count": None},
+        {"run": 2, "name": "b", "value": None, "flag": False, "count": 3},
+        {"run": 3, "name": "a", "value": 2.5, "flag": True, "count": 4},
+    ]
+    path.write_text(json.dumps(records))
+    return str(path)
+
+
+def test_snapshot_round_trip(records_json):
+    df = datautils.loadJSONasDF(records_json)
+    assert datautils.writeSnapshot(df, records_json)
+    snap = datautils.readSnapshot(records_json)
+    pd.testing.assert_frame_equal(snap, df, check_dtype=False)
+    assert (snap.dtypes.astype(str) == df.dtypes.astype(str)).all()
+    assert datautils.loadJSONasDF(records_json, snapshot=True).equals(snap)
+
+
+def test_snapshot_stale_after_json_changes(records_json):
+    datautils.loadJSONasDF(records_json, snapshot=True)
+    with open(records_json, "w") as f:
+        json.dump([{"run": 9, "name": "z", "value": 0.0, "flag": True}], f)
+    assert datautils.readSnapshot(records_json) is None
+    assert datautils.loadJSONasDF(records_json, snapshot=True)["run"].tolist() == [9]
+    assert datautils.readSnapshot(records_json)["run"].tolist() == [9]
+
+
+def test_snapshot_leaves_no_temporary_dirs(records_json):
+    df = datautils.loadJSONasDF(records_json)
+    datautils.writeSnapshot(df, records_json)
+    datautils.writeSnapshot(df, records_json)  # Snapshot already in place
+    assert sorted(os.listdir(os.path.dirname(records_json))) == [
+        "records.json",
+        "records.json.snapshot",
+    ]
+
+
+def test_concurrent_snapshots(records_json):
+    df = datautils.loadJSONasDF(records_json)
+    errors = []
+
+    def write():
+        try:
+            for _ in range(20):
+                datautils.writeSnapshot(df, records_json)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    pd.testing.assert_frame_equal(
+        datautils.readSnapshot(records_json), df, check_dtype=False
+    )
+    assert len(os.listdir(os.path.dirname(records_json))) == 2
+
+
+def test_snapshot_refuses_object_columns(tmp_path):
+    path = tmp_path / "nested.json"
+    path.write_text(json.dumps([{"a": [1, 2]}]))
+    df = datautils.loadJSONasDF(str(path))
+    assert not datautils.writeSnapshot(df, str(path))
+    assert not os.path.exists(str(path) + ".snapshot")
+
+
+def test_top_level_object_gives_key_value_columns(tmp_path):
+    path = tmp_path / "golden.json"
+    path.write_text(json.dumps({"1": [[1, 2]], "2": [[3, 4]]}))
+    df = datautils.loadJSONasDF(str(path))
+    assert df.columns.tolist() == [0, 1]
+    assert df[0].tolist() == ["1", "2"]
+    assert df[1].tolist() == [[[1, 2]], [[3, 4]]]
+
+
+def test_record_builder_matches_json_load(records_json):
+    records = list(datautils._iterJSONRecords(records_json, stream=False))
+    built = datautils._recordsToDF(records).convert_dtypes()
+    pd.testing.assert_frame_equal(built, datautils.loadJSONasDF(records_json))
+
+
+def test_streaming_is_opt_in(records_json, monkeypatch):
+    assert not datautils._useStreaming(records_json)
+    if datautils.ijson is None:
+        with pytest.raises(ImportError):
+            datautils.loadJSONasDF(records_json, stream=True)
+    else:
+        monkeypatch.setattr(datautils, "STREAM_MIN_BYTES", 0)
+        assert datautils._useStreaming(records_json)
+        pd.testing.assert_frame_equal(
+            datautils.loadJSONasDF(records_json, stream=True),
+            datautils.loadJSONasDF(records_json, stream=False),
+        )
@@ -0,0 +1,61 @@
+import threading
+import plotly.graph_objects as go
+import pytest
+from dqmexplore import export
+
+
+class FakeKaleido:
+    """Stands in for kaleido.Kaleido, writing the figure JSON instead of an image."""
+
+    fail_start = False
+
+    def __init__(self, n=1, timeout=90):
+        self.n = n
+
+    async def __aenter__(self):
+        if self.fail_start:
+            raise RuntimeError("Chrome not found")
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+    async def write_fig(self, fig, path, opts):
+        if "fail" in path:
+            raise RuntimeError("render failed")
+        with open(path, "w") as f:
+            f.write(fig.to_json())
+
+
+@pytest.fixture
+def fake_kaleido(monkeypatch):
+    module = type("kaleido", (), {"Kaleido": FakeKaleido})
+    monkeypatch.setattr(export, "kaleido", module)
+    return FakeKaleido
+
+
+def test_requires_kaleido(monkeypatch):
+    monkeypatch.setattr(export, "kaleido", None)
+    with pytest.raises(ImportError, match="dqmexplore\\[export\\]"):
+        export.StaticExporter()
+
+
+def test_export_batch(fake_kaleido, tmp_path):
+    figs = [go.Figure(go.Bar(y=[1, 2])), {"data": [{"type": "bar", "y": [3]}]}]
+    paths = [str(tmp_path / "a.png"), str(tmp_path / "sub" / "fail.svg")]
+    with export.StaticExporter(num_workers=2) as exporter:
+        results = exporter.export(figs, paths)
+    assert results["format"].tolist() == ["png", "svg"]
+    assert results["status"].tolist() == ["written", "failed"]
+    assert exporter.stats["images"] == 2 and exporter.stats["failed"] == 1
+    assert (tmp_path / "a.png").exists()
+    with pytest.raises(ValueError):
+        export.export_figures(figs[:1], [str(tmp_path / "a.gif")])
+
+
+def test_failed_start_stops_loop_thread(fake_kaleido, monkeypatch):
+    monkeypatch.setattr(fake_kaleido, "fail_start", True)
+    num_threads = threading.active_count()
+    with pytest.raises(RuntimeError, match="Chrome"):
+        export.StaticExporter()
+    assert threading.active_count() == num_threads
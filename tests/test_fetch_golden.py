@@ -0,0 +1,117 @@
+import os
+import json
+import sys
+import types
+import pytest
+from scripts import fetch_golden
+
+
+@pytest.fixture
+def fake_rr(monkeypatch):
+    """Replaces Run Registry requests, recording the generated outputs."""
+    calls = []
+
+    def generate_json(dataset, json_logic, fname, meta=False):
+        calls.append(fname)
+        with open(fname, "w") as f:
+            json.dump({"dataset": dataset, "logic": json_logic}, f)
+        return fname
+
+    monkeypatch.setattr(fetch_golden, "generate_json", generate_json)
+    return calls
+
+
+@pytest.fixture
+def logic_files(tmp_path):
+    paths = []
+    for subdir in ["a", "b"]:
+        os.makedirs(tmp_path / subdir)
+        path = tmp_path / subdir / "rr_config.json"
+        path.write_text(json.dumps({"and": [subdir]}))
+        paths.append(str(path))
+    return paths
+
+
+def test_output_fname_uses_relative_logic_path(tmp_path):
+    assert (
+        fetch_golden.output_fname("/Express/Collisions2024/DQM", "configs/rr.json")
+        == "Express_Collisions2024_DQM__rr.json"
+    )
+    assert (
+        fetch_golden.output_fname(
+            "/Express/Collisions2024/DQM",
+            str(tmp_path / "a" / "rr.json"),
+            str(tmp_path),
+        )
+        == "Express_Collisions2024_DQM__a_rr.json"
+    )
+
+
+def test_same_basename_logic_files_do_not_collide(fake_rr, logic_files, tmp_path):
+    outdir = str(tmp_path / "out")
+    status = fetch_golden.generate_jsons(["/Express/X/DQM"], logic_files, outdir)
+    assert sorted(os.path.basename(fname) for fname in status) == [
+        "Express_X_DQM__a_rr_config.json",
+        "Express_X_DQM__b_rr_config.json",
+    ]
+    assert set(status.values()) == {"generated"}
+
+
+def test_unchanged_outputs_skipped_until_max_age(fake_rr, logic_files, tmp_path):
+    outdir = str(tmp_path / "out")
+    fetch_golden.generate_jsons(["/Express/X/DQM"], logic_files, outdir)
+    status = fetch_golden.generate_jsons(["/Express/X/DQM"], logic_files, outdir)
+    assert set(status.values()) == {"skipped"}
+    assert len(fake_rr) == 2
+
+    status = fetch_golden.generate_jsons(
+        ["/Express/X/DQM"], logic_files, outdir, max_age=0
+    )
+    assert set(status.values()) == {"generated"}
+    status = fetch_golden.generate_jsons(
+        ["/Express/X/DQM"], logic_files, outdir, force=True
+    )
+    assert set(status.values()) == {"generated"}
+
+
+def test_changed_logic_or_output_regenerates(fake_rr, logic_files, tmp_path):
+    outdir = str(tmp_path / "out")
+    status = fetch_golden.generate_jsons(["/Express/X/DQM"], logic_files, outdir)
+    with open(logic_files[0], "w") as f:
+        json.dump({"and": ["changed"]}, f)
+    with open(sorted(status)[1], "w") as f:
+        f.write("{}")
+    status = fetch_golden.generate_jsons(["/Express/X/DQM"], logic_files, outdir)
+    assert set(status.values()) == {"generated"}
+
+
+def test_failed_requests_reported(monkeypatch, logic_files, tmp_path):
+    def fail(*args, **kwargs):
+        raise RuntimeError("RR down")
+
+    monkeypatch.setattr(fetch_golden, "generate_json", fail)
+    status = fetch_golden.generate_jsons(
+        ["/Express/X/DQM"], logic_files[:1], str(tmp_path / "out")
+    )
+    assert [str(result) for result in status.values()] == ["RR down"]
+
+
+def test_generate_json_sets_up_runregistry_once(monkeypatch, tmp_path):
+    setups = []
+    runregistry = types.ModuleType("runregistry")
+    runregistry.setup = setups.append
+    runregistry.create_json = lambda json_logic, dataset_name_filter: {
+        "generated_json": {"1": [[1, 2]]},
+        "dataset": dataset_name_filter,
+    }
+    monkeypatch.setitem(sys.modules, "runregistry", runregistry)
+    monkeypatch.setattr(fetch_golden, "_rr_setup", False)
+
+    for meta in [False, True]:
+        fname = str(tmp_path / f"{meta}.json")
+        fetch_golden.generate_json("/Express/X/DQM", {}, fname, meta=meta)
+    assert setups == ["production"]
+    with open(tmp_path / "False.json") as f:
+        assert json.load(f) == {"1": [[1, 2]]}
+    with open(tmp_path / "True.json") as f:
+        assert json.load(f)["dataset"] == "/Express/X/DQM"
@@ -0,0 +1,72 @@
+import json
+import numpy as np
+from dqmexplore.golden import GoldenJSON
+from dqmexplore.medata import MEData
+from dqmexplore.utils import datautils
+from conftest import me_df
+
+
+def test_ranges_are_sorted_and_merged():
+    golden = GoldenJSON({"2": [[5, 6], [1, 3], [4, 4], [10, 12], [11, 20]], "1": []})
+    assert golden.getRuns() == [2]
+    assert golden.getRanges(2) == [[1, 6], [10, 20]]
+    assert golden.getRanges(3) == []
+    assert golden.toDict() == {"2": [[1, 6], [10, 20]]}
+    assert 2 in golden and 1 not in golden
+
+
+def test_contains_is_inclusive():
+    golden = GoldenJSON({"1": [[2, 4]], "3": [[1, 1]]})
+    runs = [1, 1, 1, 1, 2, 3, 3]
+    lss = [1, 2, 4, 5, 3, 1, 2]
+    assert golden.contains(runs, lss).tolist() == [
+        False,
+        True,
+        True,
+        False,
+        False,
+        True,
+        False,
+    ]
+    assert not GoldenJSON().contains([1], [1]).any()
+
+
+def test_set_operations():
+    a = GoldenJSON({"1": [[1, 10]], "2": [[1, 5]]})
+    b = GoldenJSON({"1": [[5, 15]], "3": [[1, 1]]})
+    assert (a | b).toDict() == {"1": [[1, 15]], "2": [[1, 5]], "3": [[1, 1]]}
+    assert (a & b).toDict() == {"1": [[5, 10]]}
+    assert (a - b).toDict() == {"1": [[1, 4]], "2": [[1, 5]]}
+    assert (b - a).toDict() == {"1": [[11, 15]], "3": [[1, 1]]}
+    assert len(a & GoldenJSON()) == 0
+
+
+def test_set_operations_match_brute_force():
+    rng = np.random.default_rng(1)
+
+    def random_json():
+        return {
+            str(run): [
+                sorted(rng.integers(1, 40, 2).tolist()) for _ in range(rng.integers(4))
+            ]
+            for run in range(1, 5)
+        }
+
+    a, b = GoldenJSON(random_json()), GoldenJSON(random_json())
+    runs, lss = np.meshgrid(np.arange(1, 5), np.arange(0, 42), indexing="ij")
+    runs, lss = runs.ravel(), lss.ravel()
+    in_a, in_b = a.contains(runs, lss), b.contains(runs, lss)
+    np.testing.assert_array_equal((a | b).contains(runs, lss), in_a | in_b)
+    np.testing.assert_array_equal((a & b).contains(runs, lss), in_a & in_b)
+    np.testing.assert_array_equal((a - b).contains(runs, lss), in_a & ~in_b)
+
+
+def test_from_file_and_medata_mask(tmp_path):
+    path = tmp_path / "golden.json"
+    path.write_text(json.dumps({"7": [[2, 3]]}))
+    golden = GoldenJSON(str(path))
+    if datautils.ijson is not None:
+        streamed = GoldenJSON(str(path), stream=True)
+        assert streamed.toDict() == golden.toDict() == {"7": [[2, 3]]}
+    me_data = MEData(me_df(runnb=7, lss=[1, 2, 3, 5]))
+    assert golden.getMask(me_data).tolist() == [False, True, True, False]
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+from dqmexplore import interplt
+from dqmexplore.medata import MEData
+from conftest import me_df, real_mes
+
+MES = real_mes(dim=1, num=2)
+
+
+def make_medata(runnb=1, num_lss=5, seed=0):
+    return MEData(
+        me_df(
+            runnb=runnb,
+            lss=range(1, num_lss + 1),
+            mes=tuple((me, 1, 10) for me in MES),
+            seed=seed,
+        )
+    )
+
+
+def test_frames_mode_one_trace_per_me():
+    me_data = make_medata()
+    fig = interplt.plotMEs(me_data, {}, {})
+    assert len(fig.data) == len(MES)
+    assert len(fig.frames) == 5
+    assert [step["method"] for step in fig.layout.sliders[0].steps] == ["animate"] * 5
+    # Frames are named and filled by LS position, the first trace shows LS 1
+    np.testing.assert_array_equal(fig.data[0].y, me_data.getData(MES[0])[0])
+    np.testing.assert_array_equal(
+        fig.frames[3].data[1].y, me_data.getData(MES[1])[3].astype(np.float32)
+    )
+    assert fig.frames[3].name == "4"
+
+
+def test_traces_mode_and_reference():
+    fig = interplt.plotMEs(
+        make_medata(),
+        {MES[0]: {"norm": "norm"}},
+        {"slider_mode": "traces"},
+        ref_data=make_medata(runnb=2, seed=1),
+    )
+    assert len(fig.data) == len(MES) * 5 + len(MES)
+    assert not fig.frames
+    with pytest.raises(ValueError):
+        interplt.plotMEs(make_medata(), {}, {"slider_mode": "bogus"})
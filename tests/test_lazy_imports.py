@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+import pytest
+import dqmexplore
+
+SRC_DIR = os.path.dirname(os.path.dirname(dqmexplore.__file__))
+
+
+def loaded_modules(code):
+    """Heavy modules in sys.modules after running code in a fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-c", f"import sys\n{code}\nprint(sorted(sys.modules))"],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**os.environ, "PYTHONPATH": SRC_DIR},
+    )
+    modules = set(eval(result.stdout.strip().splitlines()[-1]))
+    return {name for name in ["plotly", "cmsdials", "pandas"] if name in modules}
+
+
+def test_import_loads_no_heavy_dependencies():
+    assert loaded_modules("import dqmexplore") == set()
+
+
+def test_submodule_loaded_on_attribute_access():
+    assert loaded_modules("import dqmexplore as dqme\ndqme.medata") == {"pandas"}
+    assert "plotly" in loaded_modules("import dqmexplore as dqme\ndqme.interplt")
+
+
+def test_getattr_and_dir():
+    assert dqmexplore.medata is sys.modules["dqmexplore.medata"]
+    assert "medata" in vars(dqmexplore)  # Cached after the first access
+    assert set(dqmexplore.__all__) <= set(dir(dqmexplore))
+    with pytest.raises(AttributeError):
+        dqmexplore.bogus
@@ -0,0 +1,72 @@
+import os
+import pandas as pd
+import pytest
+from scripts import make_report
+from conftest import me_df, real_mes
+
+MES = real_mes(dim=1, num=2)
+
+
+@pytest.fixture
+def fake_runs(monkeypatch):
+    """Serves the MEs of runs 1 and 2 and trigger rates that tests can change."""
+    mes = tuple((me, 1, 10) for me in MES)
+    runs_dfs = {runnb: me_df(runnb=runnb, lss=range(1, 6), mes=mes) for runnb in [1, 2]}
+    rates = {
+        runnb: pd.Series([10.0] * 5, index=pd.Index(range(1, 6), name="lumisection"))
+        for runnb in [1, 2]
+    }
+
+    def fetch_runs(runnbs, me_names, plots_config, ref_runnb=None, dials=None):
+        trignorm = any(
+            plots_config.get(me, {}).get("norm") == "trignorm" for me in me_names
+        )
+        return runs_dfs, None, dict(rates) if trignorm else {}
+
+    monkeypatch.setattr(make_report, "fetch_runs", fetch_runs)
+    return rates
+
+
+def statuses(entries):
+    return {entry["run"]: entry["status"] for entry in entries}
+
+
+def run_report(outdir, plots_config, runnbs=[1, 2, 3], **kwargs):
+    return make_report.make_report(
+        runnbs, MES, plots_config, {}, str(outdir), max_workers=1, **kwargs
+    )
+
+
+def test_report_pages_index_and_skip(fake_runs, tmp_path):
+    entries = run_report(tmp_path, {})
+    assert statuses(entries) == {1: "rendered", 2: "rendered", 3: "no data"}
+    for fname in ["index.html", make_report.PLOTLYJS_FNAME, make_report.CACHE_FNAME]:
+        assert os.path.exists(tmp_path / fname)
+    with open(entries[0]["output"]) as f:
+        assert f"../{make_report.PLOTLYJS_FNAME}" in f.read()
+
+    # Unchanged inputs are skipped unless forced or the page is missing
+    os.remove(entries[1]["output"])
+    assert statuses(run_report(tmp_path, {})) == {
+        1: "skipped",
+        2: "rendered",
+        3: "no data",
+    }
+    entries = run_report(tmp_path, {}, force=True)
+    assert statuses(entries) == {1: "rendered", 2: "rendered", 3: "no data"}
+    # A config change re-renders all pages
+    assert statuses(run_report(tmp_path, {MES[0]: {"norm": "norm"}}))[1] == "rendered"
+
+
+def test_rerender_on_trigger_rate_change(fake_runs, tmp_path):
+    plots_config = {MES[0]: {"norm": "trignorm"}}
+    run_report(tmp_path, plots_config, runnbs=[1, 2])
+    assert set(
+        statuses(run_report(tmp_path, plots_config, runnbs=[1, 2])).values()
+    ) == {"skipped"}
+
+    fake_runs[2] = fake_runs[2] * 2
+    assert statuses(run_report(tmp_path, plots_config, runnbs=[1, 2])) == {
+        1: "skipped",
+        2: "rendered",
+    }
@@ -0,0 +1,105 @@
+import warnings
+import numpy as np
+import pandas as pd
+import pytest
+from dqmexplore import oms
+from dqmexplore.medata import MEData
+from dqmexplore.utils.datautils import align_lss
+from conftest import FakeDials, me_df, rate_rows
+
+
+def test_align_lss_gaps_and_duplicates():
+    aligned = align_lss([1, 2, 3, 4], [4, 1, 2, 2], [40.0, 10.0, 20.0, 21.0])
+    assert aligned.mask.tolist() == [False, False, True, False]
+    assert aligned.compressed().tolist() == [10.0, 20.0, 40.0]
+
+
+def test_align_lss_empty_source():
+    assert align_lss([1, 2], [], []).mask.all()
+
+
+def test_ls_numbers_kept_per_me():
+    me_data = MEData(me_df(lss=[1, 2, 5]))
+    assert me_data.getLSNumbers("A/1d").tolist() == [1, 2, 5]
+
+
+def test_trignorm_aligns_series_on_ls_number():
+    me_data = MEData(me_df(lss=[1, 2, 3, 4]))
+    # Rate of LS 3 missing, LS 2 duplicated
+    rate = pd.Series([1.0, 2.0, 5.0, 4.0], index=[1, 2, 2, 4])
+    with pytest.warns(UserWarning, match="1 LS"):
+        me_data.normData(trigger_rate=rate)
+    data = me_data.getData("A/1d")
+    trignorm = me_data.getTrigNorm("A/1d")
+    np.testing.assert_allclose(trignorm[0], data[0] / 1.0)
+    np.testing.assert_allclose(trignorm[1], data[1] / 2.0)
+    assert not trignorm[2].any()
+    np.testing.assert_allclose(trignorm[3], data[3] / 4.0)
+
+
+def test_trignorm_rejects_misaligned_array():
+    me_data = MEData(me_df(lss=[1, 2, 3, 4]))
+    with pytest.raises(ValueError, match="pd.Series"):
+        me_data.normData(trigger_rate=np.ones(3))
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        me_data.normData(trigger_rate=np.arange(1.0, 5.0))
+    np.testing.assert_allclose(
+        me_data.getTrigNorm("A/1d")[3], me_data.getData("A/1d")[3] / 4
+    )
+
+
+def test_trignorm_with_get_rates_gap():
+    rows = rate_rows([7], lss=[1, 2, 4])
+    rates = oms.get_rates([7], dials=FakeDials({"datasetrates": rows}))[7]
+    assert rates.index.tolist() == [1, 2, 4]
+    me_data = MEData(me_df(runnb=7, lss=[1, 2, 3, 4]))
+    with pytest.warns(UserWarning):
+        me_data.normData(trigger_rate=rates)
+    np.testing.assert_allclose(
+        me_data.getTrigNorm("A/1d")[3], me_data.getData("A/1d")[3] / (7 + 4 / 1000)
+    )
+
+
+def test_ls_quantities_by_name():
+    me_data = MEData(me_df(lss=[2, 3]))
+    me_data.setLSQuantities([1, 2, 3], pileup=[10.0, 20.0, 30.0])
+    assert me_data.getLSQuantity("pileup").tolist() == [20.0, 30.0]
+    with pytest.raises(KeyError):
+        me_data.getLSQuantity("rate")
+
+
+def test_rebin_merges_bins_for_all_data_types():
+    me_data = MEData(me_df(mes=(("A/1d", 1, 10), ("B/2d", 2, 6))))
+    data = me_data.getData("A/1d").copy()
+    me_data.normData()
+    me_data.integrateData()
+    me_data.rebin("A/1d", 3)
+    assert me_data.getData("A/1d").shape == (20, 4)
+    np.testing.assert_array_equal(me_data.getData("A/1d")[:, 0], data[:, :3].sum(1))
+    np.testing.assert_array_equal(me_data.getData("A/1d")[:, 3], data[:, 9])
+    np.testing.assert_allclose(me_data.getNorm("A/1d").sum(axis=1), 1)
+    assert me_data.getIntegral("A/1d").sum() == data.sum()
+    assert len(me_data.getBins("A/1d")) == 4
+
+    data_2d = me_data.getData("B/2d").copy()
+    me_data.rebin("B/2d", 2, axis="y")
+    assert me_data.getData("B/2d").shape == (20, 2, 6)
+    np.testing.assert_array_equal(
+        me_data.getData("B/2d")[:, 0], data_2d[:, :2].sum(axis=1)
+    )
+    with pytest.raises(ValueError):
+        me_data.rebin("A/1d", 2, axis="y")
+
+
+def test_rebin_to_edges():
+    me_data = MEData(me_df(mes=(("A/1d", 1, 5),)))  # Bins at 0, 0.25, ..., 1
+    data = me_data.getData("A/1d").copy()
+    me_data.rebin_to("A/1d", [0.1, 0.5, 1.0])
+    np.testing.assert_array_equal(me_data.getData("A/1d")[:, 0], data[:, 1])
+    np.testing.assert_array_equal(
+        me_data.getData("A/1d")[:, 1], data[:, 2:].sum(axis=1)
+    )
+    np.testing.assert_allclose(me_data.getBins("A/1d"), [0.3, 0.75])
+    with pytest.raises(ValueError):
+        me_data.rebin_to("A/1d", [1.0, 0.5])
@@ -0,0 +1,79 @@
+import numpy as np
+from dqmexplore import oms
+from conftest import FakeDials, rate_rows
+
+
+def test_run_batches_bounds_unrequested_runs():
+    assert oms._run_batches([1, 2, 3, 10], max_gap=5) == [[1, 2, 3], [10]]
+    assert oms._run_batches([1, 3, 5, 7], max_gap=3) == [[1, 3, 5, 7]]
+    # A range query never spans more than max_gap unrequested runs
+    for batch in oms._run_batches([1, 4, 7, 10, 13, 100, 101], max_gap=4):
+        assert (batch[-1] - batch[0] + 1) - len(batch) <= 4
+    assert oms._run_batches(range(10), batch_size=4) == [
+        [0, 1, 2, 3],
+        [4, 5, 6, 7],
+        [8, 9],
+    ]
+
+
+def test_get_rates_sparse_runs_query_individually():
+    dials = FakeDials({"datasetrates": rate_rows([100, 200, 300])})
+    rates = oms.get_rates([100, 300], dials=dials)
+    assert sorted(rates) == [100, 300]
+    for _, filters in dials.oms.queries:
+        run_filters = [fltr for fltr in filters if fltr.attribute_name == "run_number"]
+        assert [fltr.operator for fltr in run_filters] == ["EQ"]
+
+
+def test_get_rates_cache():
+    dials = FakeDials({"datasetrates": rate_rows([1, 2])})
+    oms.get_rates([1, 2], dials=dials)
+    num_queries = len(dials.oms.queries)
+    oms.get_rates([1, 2], dials=dials)
+    assert len(dials.oms.queries) == num_queries
+
+
+def test_get_rates_use_cache_false_skips_cache():
+    dials = FakeDials({"datasetrates": rate_rows([1])})
+    oms.get_rates([1], dials=dials, use_cache=False)
+    assert len(oms._cache) == 0
+    oms.get_rates([1], dials=dials)
+    assert len(oms._cache) == 1
+    num_queries = len(dials.oms.queries)
+    oms.get_rates([1], dials=dials, use_cache=False)
+    assert len(dials.oms.queries) == num_queries + 1
+
+
+def test_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(oms, "CACHE_SIZE", 3)
+    dials = FakeDials({"datasetrates": rate_rows(range(1, 6))})
+    oms.get_rates(range(1, 6), dials=dials)
+    assert len(oms._cache) == 3
+    # Least recently used runs are evicted first
+    assert {key[-1] for key in oms._cache} == {3, 4, 5}
+
+
+def test_query_all_pages_follows_offsets():
+    dials = FakeDials({"datasetrates": rate_rows([1], lss=range(1, 12))})
+    data = oms._query_all_pages(dials, "datasetrates", [], limit=4)
+    assert len(data["data"]) == 11
+    assert len(dials.oms.queries) == 3
+
+
+def test_get_rates_missing_run_is_empty():
+    dials = FakeDials({"datasetrates": rate_rows([1])})
+    rates = oms.get_rates([1, 2], dials=dials)
+    assert len(rates[1]) == 30
+    assert len(rates[2]) == 0
+
+
+def test_scalar_run_numbers_and_get_rate():
+    dials = FakeDials({"datasetrates": rate_rows([1], lss=[3, 1, 2])})
+    rates = oms.get_rates(np.int64(1), dials=dials)
+    assert list(rates) == [1]
+    assert rates[1].index.tolist() == [1, 2, 3]
+    quantities = oms.get_ls_quantities(np.int64(1), dials=dials, quantities=["rate"])
+    assert list(quantities) == [1]
+    rate = oms.get_rate(1, dials=dials)
+    assert isinstance(rate, np.ndarray)
+    np.testing.assert_allclose(rate, [1.001, 1.002, 1.003])
@@ -0,0 +1,138 @@
+import numpy as np
+import pytest
+from dqmexplore.omsdata import OMSData
+from conftest import FakeDials, ls_rows
+
+
+def make_omsdata(rows, runs):
+    omsdata = OMSData(dials=FakeDials({"lumisections": rows}))
+    omsdata.setFilters({"runs": runs})
+    return omsdata
+
+
+def test_fetch_keeps_flag_columns_by_default():
+    omsdata = make_omsdata(ls_rows([1, 2]), [[1, 2]])
+    df = omsdata.fetchData("lumisections")
+    assert df["flag0_ready"].dtype == bool
+    assert df["run_number"].dtype == np.int64
+    assert omsdata.getFlags("lumisections")["flag1_ready"].equals(df["flag1_ready"])
+
+
+def test_compact_packs_flags():
+    rows = ls_rows([1, 2], num_flags=70)
+    omsdata = make_omsdata(rows, [[1, 2]])
+    df = omsdata.fetchData("lumisections", compact=True)
+    assert "flag0_ready" not in df.columns
+    assert {"packed_flags_0", "packed_flags_1"} <= set(df.columns)
+    assert df["fill_type_runtime"].dtype == "category"
+    flags = omsdata.getFlags("lumisections")
+    expected = np.array([row["flag69_ready"] for row in rows])
+    np.testing.assert_array_equal(flags["flag69_ready"].to_numpy(), expected)
+    assert "flag69_ready" in omsdata.getAvailFtrs()["lumisections"]
+    with pytest.raises(KeyError):
+        omsdata.getFlags("lumisections", ["unknown"])
+    report = omsdata.memory_report()
+    assert (
+        report.loc["lumisections", "after_MB"] < report.loc["lumisections", "before_MB"]
+    )
+
+
+def test_switching_to_uncompacted_unpacks_existing_data():
+    omsdata = make_omsdata(ls_rows([1, 2]), [[1, 1]])
+    omsdata.fetchData("lumisections", compact=True)
+    omsdata.setFilters({"runs": [2]})
+    df = omsdata.fetchData("lumisections")
+    assert df["flag2_ready"].dtype == bool
+    assert not any(col.startswith("packed_flags") for col in df.columns)
+    assert len(df) == 20
+
+
+def test_refetch_replaces_only_fetched_lumisections():
+    omsdata = make_omsdata(ls_rows([1, 2, 3]), [[1, 3]])
+    omsdata.fetchData("lumisections")
+    omsdata.dials.oms.rows["lumisections"] = ls_rows([2], lss=range(1, 6), pileup=0)
+    omsdata.setFilters({"runs": [2]})
+    df = omsdata.fetchData("lumisections")
+    assert df.index.is_monotonic_increasing
+    assert len(df.loc[2]) == 10  # LSs 6-10 are not refetched and survive
+    assert (df.loc[2].loc[1:5, "pileup"] < 10).all()
+    assert (df.loc[2].loc[6:10, "pileup"] > 50).all()
+    assert (df.loc[[1, 3], "pileup"] > 50).all()
+
+
+def test_fetching_new_lumisections_extends_run():
+    omsdata = make_omsdata(ls_rows([1, 2]), [[1, 2]])
+    omsdata.fetchData("lumisections")
+    omsdata.dials.oms.rows["lumisections"] = ls_rows([2], lss=range(11, 16))
+    omsdata.setFilters({"runs": [2]})
+    df = omsdata.fetchData("lumisections")
+    assert df.loc[2].index.tolist() == list(range(1, 16))
+    assert len(df) == 25
+
+
+def test_upsert_sorts_interleaved_runs():
+    omsdata = make_omsdata(ls_rows([1, 5]), [[1, 5]])
+    omsdata.fetchData("lumisections")
+    omsdata.dials.oms.rows["lumisections"] = ls_rows([3, 7])
+    omsdata.setFilters({"runs": [3, 7]})
+    df = omsdata.fetchData("lumisections")
+    assert df.index.is_monotonic_increasing
+    assert df.index.get_level_values("runnb").unique().tolist() == [1, 3, 5, 7]
+
+
+def test_compact_upsert_keeps_existing_dtypes():
+    omsdata = make_omsdata(ls_rows([1, 2]), [[1, 2]])
+    first = omsdata.fetchData("lumisections", compact=True)
+    dtypes = first.dtypes
+
+    rows = ls_rows([3], num_flags=5)
+    for row in rows:
+        row["fill_type_runtime"] = "IONS"
+        row["lumisection_number"] += 1000  # No longer fits the downcast dtype
+    omsdata.dials.oms.rows["lumisections"] = rows
+    omsdata.setFilters({"runs": [3]})
+    df = omsdata.fetchData("lumisections", compact=True)
+
+    assert df["fill_type_runtime"].dtype == "category"
+    assert df["fill_type_runtime"].tolist()[-1] == "IONS"
+    assert df["packed_flags_0"].dtype == np.uint64
+    assert df["run_number"].dtype == dtypes["run_number"]
+    assert df["lumisection_number"].max() == 1010
+    flags = omsdata.getFlags("lumisections")
+    # Flags not fetched for the first runs are False there
+    assert not flags.loc[[1, 2], "flag4_ready"].any()
+    assert flags.loc[3, "flag4_ready"].tolist() == [row["flag4_ready"] for row in rows]
+
+
+def test_apply_golden_json_filters_lumisections():
+    omsdata = make_omsdata(ls_rows([1, 2, 3]), [[1, 3]])
+    omsdata.fetchData("lumisections")
+    omsdata.applyGoldenJSON({"1": [[2, 4], [8, 9]], "3": [[1, 1]]}, keep=[2])
+    good = omsdata["lumisections"]
+    assert good.loc[1].index.tolist() == [2, 3, 4, 8, 9]
+    assert len(good.loc[2]) == 10  # Kept entirely
+    assert good.loc[3].index.tolist() == [1]
+    bad = omsdata._baddata["lumisections"]
+    assert len(bad) + len(good) == 30
+    assert 2 not in bad.index.get_level_values("runnb")
+
+
+def test_memory_report_describes_current_data():
+    rows = ls_rows([1, 2], num_flags=70)
+    plain = make_omsdata(rows, [[1, 2]])
+    plain.fetchData("lumisections")
+    compact = make_omsdata(rows, [[1, 2]])
+    compact.fetchData("lumisections", compact=True)
+    plain_report, report = plain.memory_report(), compact.memory_report()
+    assert plain_report.loc["lumisections", "ratio"] == 1
+    assert report.loc["lumisections", "before_MB"] == pytest.approx(
+        plain_report.loc["lumisections", "after_MB"]
+    )
+
+    # Refetching replaced rows does not grow the reported sizes
+    compact.setFilters({"runs": [2]})
+    compact.fetchData("lumisections", compact=True)
+    # (up to the index rebuilt by the merge)
+    assert compact.memory_report().loc["lumisections", "before_MB"] == pytest.approx(
+        report.loc["lumisections", "before_MB"], rel=0.05
+    )
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+from dqmexplore.utils.pltutils import (
+    typed_array,
+    bin_kwargs,
+    aggregate_rows,
+    minmax_decimate,
+)
+
+
+def test_typed_array():
+    assert typed_array(np.arange(3.0)).dtype == np.float32
+    assert typed_array(np.arange(3.0), float32=False).dtype == np.float64
+    assert typed_array(np.arange(3)).dtype == np.arange(3).dtype
+    assert typed_array(np.ones((3, 4))[:, ::2]).flags.c_contiguous
+    masked = typed_array(np.ma.masked_array([1, 2], mask=[False, True]))
+    assert masked[0] == 1 and np.isnan(masked[1])
+
+
+def test_bin_kwargs():
+    assert bin_kwargs(np.linspace(0, 1, 5)) == {"x0": 0.0, "dx": 0.25}
+    assert bin_kwargs(np.linspace(0, 1, 5), axis="y") == {"y0": 0.0, "dy": 0.25}
+    irregular = bin_kwargs([0.0, 1.0, 3.0])
+    np.testing.assert_array_equal(irregular["x"], [0, 1, 3])
+    assert irregular["x"].dtype == np.float32
+    assert list(bin_kwargs([2.0])) == ["x"]
+
+
+def test_aggregate_rows():
+    data = np.arange(10 * 3).reshape(10, 3)
+    same, block = aggregate_rows(data, max_rows=10)
+    assert block == 1 and same is not None
+    summed, block = aggregate_rows(data, max_rows=4)
+    assert block == 3
+    np.testing.assert_array_equal(summed[0], data[:3].sum(axis=0))
+    np.testing.assert_array_equal(summed[-1], data[9])
+    maxed, _ = aggregate_rows(data, max_rows=4, how="max")
+    np.testing.assert_array_equal(maxed[1], data[5])
+    with pytest.raises(ValueError):
+        aggregate_rows(data, how="mean")
+
+
+def test_minmax_decimate_keeps_extremes():
+    y = np.zeros(10000)
+    y[1234], y[8765] = 5.0, -5.0
+    y[50] = np.nan
+    idxs, values = minmax_decimate(y, max_points=100)
+    assert len(idxs) <= 100
+    assert 1234 in idxs and 8765 in idxs
+    assert not np.isnan(values).any()
+    np.testing.assert_array_equal(values, y[idxs])
+    short = np.arange(5.0)
+    np.testing.assert_array_equal(minmax_decimate(short)[1], short)
+
+
+def test_heatmap_and_trend_level_of_detail():
+    from dqmexplore.medata import MEData
+    from dqmexplore.staticplt import create_heatmap
+    from dqmexplore.trends import compute_trends, plot_trends
+    from conftest import me_df, real_mes
+
+    me = real_mes(dim=1, num=1)[0]
+    me_data = MEData(me_df(lss=range(1, 101), mes=((me, 1, 10),)))
+    fig = create_heatmap(me_data, {me: {}}, {"max_rows": 30})
+    assert len(fig.data[0].z) == 25 and fig.data[0].dy == 4
+    fig = create_heatmap(me_data, {me: {}}, {"max_rows": 30, "full_resolution": True})
+    assert len(fig.data[0].z) == 100
+
+    trends = compute_trends(me_data)
+    fig = plot_trends(trends, me, max_points=20, webgl_threshold=10)
+    assert all(len(trace.y) <= 20 for trace in fig.data)
+    assert fig.data[0].type == "scattergl"
+    fig = plot_trends(trends, me, full_resolution=True)
+    assert len(fig.data[0].y) == 100 and fig.data[0].type == "scatter"
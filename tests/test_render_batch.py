@@ -0,0 +1,74 @@
+import os
+import json
+import pandas as pd
+import pytest
+import dqmexplore as dqme
+from scripts import render_batch
+from conftest import FakeDials, me_df, rate_rows, real_mes
+
+MES = real_mes(dim=1, num=2)
+
+
+@pytest.fixture
+def fake_fetch(monkeypatch):
+    """Serves the MEs of runs 1 to 3 (run 3 with an LS missing) instead of DIALS."""
+    mes = tuple((me, 1, 10) for me in MES)
+    data = pd.concat(
+        [
+            me_df(runnb=1, lss=range(1, 6), mes=mes),
+            me_df(runnb=2, lss=range(1, 6), mes=mes),
+        ]
+        + [me_df(runnb=3, lss=[1, 2, 4, 5], mes=mes)],
+        ignore_index=True,
+    )
+
+    def fetch_data(runnbs, me_names, dials=None):
+        return data[data["run_number"].isin(runnbs) & data["me"].isin(me_names)]
+
+    monkeypatch.setattr(dqme.utils.datautils, "fetch_data", fetch_data)
+
+
+def test_render_batch_writes_figures_and_manifest(fake_fetch, tmp_path):
+    manifest = render_batch.render_batch(
+        [2, 1, 3, 9],
+        MES,
+        {MES[0]: {"norm": "trignorm"}},
+        {},
+        str(tmp_path),
+        ref_runnb=3,
+        max_workers=1,
+        dials=FakeDials({"datasetrates": rate_rows([1, 2, 3])}),
+    )
+    assert [entry["run"] for entry in manifest] == [1, 2, 3, 9]
+    assert [entry["status"] for entry in manifest] == [
+        "rendered",
+        "rendered",
+        "rendered",
+        "no data",
+    ]
+    assert all(os.path.exists(entry["output"]) for entry in manifest[:3])
+    with open(tmp_path / render_batch.MANIFEST_FNAME) as f:
+        assert json.load(f)["ref_run"] == 3
+
+
+def test_render_batch_per_me(fake_fetch, tmp_path):
+    manifest = render_batch.render_batch(
+        [1], MES, {}, {}, str(tmp_path), per_me=True, max_workers=1
+    )
+    assert len(manifest) == len(MES)
+    assert all(entry["mes"] == [me] for entry, me in zip(manifest, sorted(MES)))
+    assert len(os.listdir(tmp_path)) == len(MES) + 1
+
+
+def test_render_batch_traces_slider_mode(fake_fetch, tmp_path):
+    manifest = render_batch.render_batch(
+        [1, 2],
+        MES,
+        {},
+        {"slider_mode": "traces"},
+        str(tmp_path),
+        ref_runnb=3,
+        max_workers=1,
+    )
+    assert [entry["status"] for entry in manifest] == ["rendered", "rendered"]
+    assert all(os.path.exists(entry["output"]) for entry in manifest)
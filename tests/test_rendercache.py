@@ -0,0 +1,107 @@
+import os
+import json
+import numpy as np
+import pytest
+from dqmexplore.medata import MEData
+from dqmexplore.rendercache import RenderCache, config_hash, data_hash
+from conftest import me_df, real_mes
+
+MES = real_mes(dim=1, num=2)
+
+
+def make_medata(runnb=1, seed=0):
+    return MEData(
+        me_df(
+            runnb=runnb,
+            lss=range(1, 6),
+            mes=tuple((me, 1, 10) for me in MES),
+            seed=seed,
+        )
+    )
+
+
+def test_hashes():
+    assert data_hash(make_medata()) == data_hash(make_medata())
+    assert data_hash(make_medata()) != data_hash(make_medata(seed=1))
+    assert config_hash({"a": 1, "b": [1, 2]}) == config_hash({"b": [1, 2], "a": 1})
+    assert config_hash({"a": np.int64(1)}) == config_hash({"a": 1})
+    assert config_hash({"a": 1}) != config_hash({"a": 2})
+
+
+def test_render_hits_and_misses():
+    cache = RenderCache()
+    plots_config = {MES[0]: {"norm": "norm"}, MES[1]: {}}
+    fig = cache.plotMEs(make_medata(), plots_config, {})
+    # Equal data and configs (in any key order) hit the cache
+    assert cache.plotMEs(make_medata(), dict(reversed(plots_config.items())), {}) is fig
+    assert (cache.hits, cache.misses) == (1, 1)
+    # The caller's config is not filled in by the plotting function
+    assert plots_config[MES[1]] == {}
+
+    assert cache.plotMEs(make_medata(seed=1), plots_config, {}) is not fig
+    assert cache.plotMEs(make_medata(), {}, {}) is not fig
+    assert cache.plotMEs(make_medata(), plots_config, {}, ref_data=make_medata(2))
+    assert (cache.hits, cache.misses) == (1, 4)
+
+
+def test_render_leaves_data_unchanged():
+    cache = RenderCache()
+    plots_config = {MES[0]: {"norm": "norm"}}
+    me_data, ref_data = make_medata(), make_medata(runnb=2, seed=1)
+    raw = me_data.getData(MES[0]).copy()
+    me_keys, ref_keys = set(me_data[MES[0]]), set(ref_data[MES[0]])
+    for _ in range(2):  # Miss, then hit
+        cache.plotMEs(me_data, plots_config, {}, ref_data=ref_data)
+        np.testing.assert_array_equal(me_data.getData(MES[0]), raw)
+        # Neither normalized nor integrated in place
+        assert set(me_data[MES[0]]) == me_keys
+        assert set(ref_data[MES[0]]) == ref_keys
+    assert cache.hits == 1
+
+
+def test_trigger_rates_by_name_hash_their_values():
+    cache = RenderCache()
+    plots_config = {MES[0]: {"norm": "trignorm"}}
+    me_data = make_medata()
+    me_data.setLSQuantities(range(1, 6), rate=[1.0] * 5)
+    fig = cache.plotMEs(me_data, plots_config, {}, trigger_rates="rate")
+    assert cache.plotMEs(me_data, plots_config, {}, trigger_rates="rate") is fig
+
+    me_data.setLSQuantities(range(1, 6), rate=[2.0] * 5)
+    assert cache.plotMEs(me_data, plots_config, {}, trigger_rates="rate") is not fig
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_memory_lru_and_disk(tmp_path):
+    cache = RenderCache(maxsize=1, directory=str(tmp_path))
+    fig = cache.plotMEs(make_medata(), {}, {})
+    cache.plotMEs(make_medata(seed=1), {}, {})
+    assert len(cache) == 1 and len(os.listdir(tmp_path)) == 2
+
+    # Evicted from memory, read back from disk
+    disk_fig = cache.plotMEs(make_medata(), {}, {})
+    assert cache.hits == 1
+    assert disk_fig is not fig
+    assert json.loads(disk_fig.to_json())["data"] == json.loads(fig.to_json())["data"]
+    # A fresh cache on the same directory reuses the stored figures
+    other = RenderCache(directory=str(tmp_path))
+    other.plotMEs(make_medata(seed=1), {}, {})
+    assert (other.hits, other.misses) == (1, 0)
+
+    cache.clear(disk=True)
+    assert len(cache) == 0 and os.listdir(tmp_path) == []
+
+
+def test_disk_eviction_least_recently_used(tmp_path):
+    cache = RenderCache(directory=str(tmp_path))
+    keys = []
+    for seed in range(3):
+        cache.plotMEs(make_medata(seed=seed), {}, {})
+        keys.append(list(cache._figures)[-1])
+    sizes = [os.path.getsize(cache._diskPath(key)) for key in keys]
+    # Make the first figure the most recently used, then shrink the budget
+    os.utime(cache._diskPath(keys[1]), ns=(0, 0))
+    os.utime(cache._diskPath(keys[2]), ns=(1, 1))
+    cache.max_disk_bytes = sizes[0] + 1
+    cache._evictDisk()
+    assert os.listdir(tmp_path) == [f"{keys[0]}.json"]
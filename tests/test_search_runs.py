@@ -0,0 +1,58 @@
+import sys
+import json
+import pytest
+from scripts import search_runs
+
+
+def run_main(monkeypatch, args):
+    monkeypatch.setattr(sys, "argv", ["search_runs"] + args)
+    search_runs.main()
+
+
+def test_read_runnbs(tmp_path):
+    path = tmp_path / "runs.txt"
+    path.write_text("100, 101\n102 103,\n")
+    assert search_runs.read_runnbs(str(path)).tolist() == [100, 101, 102, 103]
+
+
+def test_batch_mode_streams_csv(monkeypatch, capsys, ch_json, tmp_path):
+    path = tmp_path / "runs.txt"
+    path.write_text("101 102")
+    run_main(
+        monkeypatch,
+        ["-i", ch_json, "--from-file", str(path), "-c", "run_number,dataset"],
+    )
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0] == "run_number,dataset"
+    assert len(lines) == 4
+
+
+def test_jsonl_output_file(monkeypatch, ch_json, tmp_path):
+    out = tmp_path / "out.jsonl"
+    run_main(
+        monkeypatch,
+        ["-i", ch_json, "-r", "100", "-m", "ref", "--format", "jsonl", "-f", str(out)],
+    )
+    records = [json.loads(line) for line in out.read_text().splitlines()]
+    assert [record["run_number"] for record in records] == [101, 101]
+
+
+def test_unknown_columns_error_before_output(monkeypatch, capsys, ch_json):
+    with pytest.raises(SystemExit) as exc:
+        run_main(monkeypatch, ["-i", ch_json, "-r", "101", "-c", "run_number,bogus"])
+    assert exc.value.code == 2
+    captured = capsys.readouterr()
+    assert captured.out == ""
+    assert "bogus" in captured.err
+
+
+def test_stream_results_chunks(ch_json):
+    import io
+    from dqmexplore.certhelper import CHRunData
+
+    results = CHRunData(ch_json, snapshot=False).RunsDF
+    out = io.StringIO()
+    search_runs.stream_results(results, out, "csv", chunk_size=2)
+    lines = out.getvalue().splitlines()
+    assert len(lines) == len(results) + 1
+    assert lines.count(lines[0]) == 1  # Header written once
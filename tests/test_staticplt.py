@@ -0,0 +1,91 @@
+import zlib
+import struct
+import numpy as np
+import pytest
+from dqmexplore import staticplt
+from dqmexplore.medata import MEData
+from conftest import me_df
+
+
+def read_png(fname):
+    """Minimal PNG decoder for unfiltered 8-bit images, checking every chunk CRC."""
+    with open(fname, "rb") as f:
+        content = f.read()
+    assert content[:8] == b"\x89PNG\r\n\x1a\n"
+    pos, chunks = 8, {}
+    while pos < len(content):
+        (length,) = struct.unpack(">I", content[pos : pos + 4])
+        tag = content[pos + 4 : pos + 8]
+        payload = content[pos + 8 : pos + 8 + length]
+        (crc,) = struct.unpack(">I", content[pos + 8 + length : pos + 12 + length])
+        assert crc == zlib.crc32(tag + payload)
+        chunks.setdefault(tag, []).append(payload)
+        pos += 12 + length
+    width, height, depth, color_type = struct.unpack(">IIBB", chunks[b"IHDR"][0][:10])
+    channels = 3 if color_type == 2 else 1
+    raw = np.frombuffer(zlib.decompress(b"".join(chunks[b"IDAT"])), dtype=np.uint8)
+    raw = raw.reshape(height, width * channels + 1)
+    assert not raw[:, 0].any()  # Filter type none
+    image = (
+        raw[:, 1:]
+        .reshape(height, width, channels)
+        .squeeze(axis=2 if channels == 1 else ())
+    )
+    palette = (
+        np.frombuffer(chunks[b"PLTE"][0], dtype=np.uint8).reshape(-1, 3)
+        if b"PLTE" in chunks
+        else None
+    )
+    text = dict(
+        payload.decode("latin-1").split("\0") for payload in chunks.get(b"tEXt", [])
+    )
+    return image, palette, text
+
+
+@pytest.mark.parametrize("compress_level", [0, 1, 9])
+def test_write_png_indexed_round_trip(tmp_path, compress_level):
+    image = np.arange(12, dtype=np.uint8).reshape(3, 4)
+    palette = np.stack([np.arange(256)] * 3, axis=1).astype(np.uint8)
+    fname = str(tmp_path / "indexed.png")
+    staticplt.write_png(
+        image,
+        fname,
+        palette=palette,
+        text={"Title": "me"},
+        compress_level=compress_level,
+    )
+    read_image, read_palette, text = read_png(fname)
+    np.testing.assert_array_equal(read_image, image)
+    np.testing.assert_array_equal(read_palette, palette)
+    assert text == {"Title": "me"}
+
+
+def test_write_png_rgb_round_trip(tmp_path):
+    image = np.random.default_rng(0).integers(0, 256, (5, 7, 3), dtype=np.uint8)
+    fname = str(tmp_path / "rgb.png")
+    staticplt.write_png(image, fname)
+    read_image, palette, _ = read_png(fname)
+    assert palette is None
+    np.testing.assert_array_equal(read_image, image)
+
+
+def test_create_raster():
+    data = np.array([[0.0, 5.0, 10.0], [np.nan, -1.0, 20.0]])
+    idxs, palette = staticplt.create_raster(data, zmin=0, zmax=10, nan_color=(1, 2, 3))
+    assert idxs.tolist() == [[0, 127, 254], [255, 0, 254]]
+    assert palette.shape == (256, 3) and palette[255].tolist() == [1, 2, 3]
+    log_idxs, _ = staticplt.create_raster(data, log=True)
+    assert log_idxs[1, 1] == 255  # Non-positive values are NaNs on a log scale
+    assert log_idxs[0, 0] == 255
+
+
+def test_plotraster(tmp_path):
+    me_data = MEData(me_df(lss=range(1, 8), mes=(("A/1d", 1, 10), ("B/2d", 2, 6))))
+    fname = str(tmp_path / "a.png")
+    image = staticplt.plotraster(me_data, "A/1d", fname, scale=2)
+    read_image, _, text = read_png(fname)
+    assert read_image.shape == (14, 20)
+    np.testing.assert_array_equal(read_image, image)
+    assert text["y"] == "LS 1 to 7"
+    image = staticplt.plotraster(me_data, "B/2d", str(tmp_path / "b.png"))
+    assert image.shape == (4, 6)
@@ -0,0 +1,92 @@
+import os
+import numpy as np
+import pytest
+from dqmexplore.medata import MEData
+from dqmexplore.summary import SummaryStore, SUMMARY_STATS
+from conftest import me_df
+
+MES = (("A/1d", 1, 10), ("B/2d", 2, 6))
+
+
+def test_add_runs_sorted_and_replaced(tmp_path):
+    store = SummaryStore(str(tmp_path))
+    for runnb in [3, 1, 2]:
+        store.addRun(MEData(me_df(runnb=runnb, mes=MES, seed=runnb)))
+    assert store.getRuns("A/1d").tolist() == [1, 2, 3]
+    assert store.getMENames() == ["A/1d", "B/2d"]
+
+    store.addRun(MEData(me_df(runnb=2, mes=MES, seed=10)))
+    assert store.getRuns("A/1d").tolist() == [1, 2, 3]
+    expected = MEData(me_df(runnb=2, mes=MES, seed=10)).getData("B/2d").sum(axis=0)
+    np.testing.assert_array_equal(store.getSummary("B/2d")["integral"][1], expected)
+
+    # Reloaded from disk
+    trends = SummaryStore(str(tmp_path)).getTrends("A/1d", run_range=[2, 3])
+    assert trends.index.tolist() == [2, 3]
+
+
+def test_entries_from_medata_and_no_side_effects(tmp_path):
+    me_data = MEData(me_df(runnb=5, lss=range(1, 11), mes=MES))
+    me_data.me_dict["A/1d"]["entries"] = np.arange(10) * 100
+    me_data.normData()
+    store = SummaryStore(str(tmp_path))
+    store.addRun(me_data, exclude=[(1, 2), 10])
+
+    assert store.getTrends("A/1d")["entries"].tolist() == [sum(range(2, 9)) * 100]
+    np.testing.assert_array_equal(
+        store.getSummary("A/1d")["integral"][0],
+        me_data.getData("A/1d")[2:9].sum(axis=0),
+    )
+    assert me_data.getExcluded() == []
+    assert "integral" not in me_data["A/1d"]
+
+
+def test_binning_mismatch_raises(tmp_path):
+    store = SummaryStore(str(tmp_path))
+    store.addRun(MEData(me_df(runnb=1, mes=MES)))
+
+    other_y = me_df(runnb=2, mes=MES)
+    other_y["y_max"] = 2.0
+    with pytest.raises(ValueError, match="B/2d"):
+        store.addRun(MEData(other_y), mes=["B/2d"])
+
+    other_x = me_df(runnb=2, mes=MES)
+    other_x["x_min"] = -1.0
+    with pytest.raises(ValueError, match="A/1d"):
+        store.addRun(MEData(other_x), mes=["A/1d"])
+    assert store.getRuns("A/1d").tolist() == [1]
+
+
+def test_add_runs_matches_add_run(tmp_path):
+    medatas = [MEData(me_df(runnb=runnb, mes=MES, seed=runnb)) for runnb in [4, 2, 3]]
+    one_by_one = SummaryStore(str(tmp_path / "single"))
+    for medata in medatas:
+        one_by_one.addRun(medata, exclude=[1])
+    batched = SummaryStore(str(tmp_path / "batch"))
+    batched.addRuns(medatas[:1], exclude=[1])
+    # Run 2 twice in one batch keeps the last summary
+    duplicate = MEData(me_df(runnb=2, mes=MES, seed=99))
+    batched.addRuns([duplicate] + medatas[1:], exclude=[1])
+
+    for me in ["A/1d", "B/2d"]:
+        expected, summary = one_by_one.getSummary(me), batched.getSummary(me)
+        assert sorted(summary) == sorted(expected)
+        for key in expected:
+            np.testing.assert_array_equal(summary[key], expected[key])
+
+
+def test_queries_read_only_requested_arrays(tmp_path):
+    SummaryStore(str(tmp_path)).addRuns(
+        [MEData(me_df(runnb=runnb, mes=MES)) for runnb in [1, 2]]
+    )
+    assert sorted(os.listdir(tmp_path / "B__2d")) == sorted(
+        f"{key}.npy"
+        for key in ["runs", "integral", "x_bins", "y_bins"] + list(SUMMARY_STATS)
+    )
+
+    store = SummaryStore(str(tmp_path))
+    assert store.getTrends("A/1d").index.tolist() == [1, 2]
+    assert "integral" not in store._loaded["A/1d"]
+    integral = store.getSummary("B/2d", run_range=[2, 2])["integral"]
+    assert isinstance(store._loaded["B/2d"]["integral"], np.memmap)
+    assert integral.shape == (1, 4, 6)
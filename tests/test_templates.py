@@ -0,0 +1,116 @@
+import numpy as np
+import pytest
+import plotly.graph_objects as go
+from dqmexplore import interplt, staticplt
+from dqmexplore.medata import MEData
+from dqmexplore.templates import FigureTemplate
+from conftest import me_df, real_mes
+
+MES_1D = real_mes(dim=1, num=2)
+
+
+def make_medata(runnb=1, num_lss=5, num_bins=10, seed=0):
+    return MEData(
+        me_df(
+            runnb=runnb,
+            lss=range(1, num_lss + 1),
+            mes=tuple((me, 1, num_bins) for me in MES_1D),
+            seed=seed,
+        )
+    )
+
+
+def assert_same_traces(fig, fig_dict):
+    """Compares the trace data of a plotted figure and a filled template."""
+    template_fig = go.Figure(fig_dict)
+    assert len(template_fig.data) == len(fig.data)
+    for trace, template_trace in zip(fig.data, template_fig.data):
+        assert trace.type == template_trace.type
+        key = "z" if trace.type == "heatmap" else "y"
+        np.testing.assert_allclose(
+            np.asarray(template_trace[key], dtype=float),
+            np.asarray(trace[key], dtype=float),
+            rtol=1e-6,
+        )
+    return template_fig
+
+
+def test_invalid_kind_and_slider_mode():
+    with pytest.raises(ValueError):
+        FigureTemplate({}, {}, kind="bogus")
+    with pytest.raises(ValueError):
+        FigureTemplate({}, {"slider_mode": "traces"})
+
+
+def test_interactive_fill_matches_plotMEs():
+    plots_config = {me: {"norm": "norm"} for me in MES_1D}
+    template = FigureTemplate(plots_config, {})
+    ref = make_medata(runnb=2, seed=1)
+    fig_dict = template.fill(make_medata(seed=3), ref_data=ref, title="Run 1")
+    fig = interplt.plotMEs(
+        make_medata(seed=3),
+        {me: {"norm": "norm"} for me in MES_1D},
+        {},
+        ref_data=make_medata(runnb=2, seed=1),
+    )
+    template_fig = assert_same_traces(fig, fig_dict)
+    assert template_fig.layout.title.text == "Run 1"
+    assert len(fig_dict["frames"]) == len(fig.frames)
+    np.testing.assert_allclose(
+        np.asarray(template_fig.frames[-1].data[1].y, dtype=float),
+        np.asarray(fig.frames[-1].data[1].y, dtype=float),
+        rtol=1e-6,
+    )
+
+
+def test_heatmap_fill_matches_create_heatmap():
+    plots_config = {me: {} for me in MES_1D}
+    fig_config = {"max_rows": 4}
+    template = FigureTemplate(plots_config, fig_config, kind="heatmap")
+    fig_dict = template.fill(make_medata(num_lss=9))
+    fig = staticplt.plotheatmaps1D(make_medata(num_lss=9), plots_config, fig_config)
+    template_fig = assert_same_traces(fig, fig_dict)
+    # 9 LSs are merged into blocks of 3 rows, drawn centred on their LSs
+    assert template_fig.data[0].dy == fig.data[0].dy == 3
+    assert template_fig.data[0].y0 == fig.data[0].y0 == 1
+
+
+def test_static_fill_matches_plotMEs1D_static():
+    template = FigureTemplate({}, {}, kind="static")
+    fig_dict = template.fill(
+        make_medata(), ref_data=make_medata(runnb=2, seed=1), exclude=[2, 3]
+    )
+    fig = staticplt.plotMEs1D_static(
+        make_medata(), ref_data=make_medata(runnb=2, seed=1), to_exclude=[2, 3]
+    )
+    template_fig = assert_same_traces(fig, fig_dict)
+    assert template_fig.layout.yaxis.range == fig.layout.yaxis.range
+
+
+def test_recompiles_on_binning_change(monkeypatch):
+    template = FigureTemplate({me: {} for me in MES_1D}, {})
+    compiled = []
+    compile = template.compile
+    monkeypatch.setattr(
+        template, "compile", lambda *args: compiled.append(1) or compile(*args)
+    )
+    template.fill(make_medata())
+    template.fill(make_medata(runnb=2, seed=1, num_lss=7))
+    assert len(compiled) == 1  # Same MEs and binning, only the data is replaced
+
+    fig_dict = template.fill(make_medata(runnb=3, num_bins=20))
+    assert len(compiled) == 2
+    assert len(fig_dict["data"][0]["y"]) == 20
+
+
+def test_validates_first_fill_only():
+    template = FigureTemplate({me: {} for me in MES_1D}, {})
+    fig_dict = template.fill(make_medata())
+    assert template._validated
+    assert len(fig_dict["frames"]) == 5
+
+    # A broken skeleton is caught on the first fill after compiling
+    template._traces[0]["bogus"] = 1
+    template._validated = False
+    with pytest.raises(ValueError):
+        template.fill(make_medata())